@@ -0,0 +1,79 @@
+""" Benchmark of notarization and verification against a local in-process chain. \n
+Every round creates a notarization transaction with ``create_notarization_transaction``, sends it with ``send_transaction`` (which waits for the receipt, the local chain mines right away)
+and finally verifies it with ``verify_via_transaction``. Each of the three steps is timed on its own, so the numbers measure the code and the RPC handling, not the time blocks take on a real network.
+"""
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from common import local_chain
+from common import measure
+from common import summarize
+from common import time_calls
+from notarization import create_notarization_transaction
+from notarization import send_transaction
+from payload import encode_payload
+from verification import verify_via_transaction
+
+
+def run(transactions=100):
+    """Runs the benchmark.
+    Args:
+        transactions (int, optional): Number of notarizations to create, send and verify (defaults to 100).
+
+    Returns:
+        dictionary: Per step ("create_notarization_transaction", "send_transaction" and "verify_via_transaction") the summary of the latencies, see ``summarize``.
+    """
+    chain = local_chain()
+    web3_connection = chain["web3_connection"]
+    hash_values = [
+        hashlib.sha256(f"benchmark {i}".encode()).hexdigest()
+        for i in range(transactions)
+    ]
+
+    # every transaction has to be sent before the next one is created, so both are timed within the same loop
+    create_latencies = []
+    send_latencies = []
+    tx_hashes = []
+    for hash_value in hash_values:
+        tx, latency = measure(
+            create_notarization_transaction,
+            web3_connection=web3_connection,
+            account=chain["account"],
+            string_to_save=encode_payload(hash_value),
+        )
+        create_latencies.append(latency)
+        result, latency = measure(
+            send_transaction,
+            web3_connection=web3_connection,
+            transaction=tx,
+            private_key=chain["private_key"],
+        )
+        send_latencies.append(latency)
+        tx_hashes.append(result["tx_hash"])
+
+    results, verify_summary = time_calls(
+        lambda arguments: verify_via_transaction(
+            web3_connection=web3_connection,
+            tx_hash=arguments[0],
+            hash_value=arguments[1],
+        ),
+        list(zip(tx_hashes, hash_values)),
+    )
+    if not all(result["verified"] for result in results):
+        raise RuntimeError("A notarization of the benchmark could not be verified.")
+    return {
+        "create_notarization_transaction": summarize(
+            create_latencies, sum(create_latencies)
+        ),
+        "send_transaction": summarize(send_latencies, sum(send_latencies)),
+        "verify_via_transaction": verify_summary,
+    }
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    print(run())
+    print(f"Took {time.perf_counter() - started:.1f} seconds.")
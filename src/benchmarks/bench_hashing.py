@@ -0,0 +1,43 @@
+""" Benchmark of file hashing with ``calculate_hash_of_file_via_path`` at several file sizes. The files are random and written to a temporary directory once, before they are hashed repeatedly.
+Note that after the first round the files are in the page cache of the operating system, so the numbers measure hashing rather than the disk.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from common import time_calls
+from utils import calculate_hash_of_file_via_path
+
+# 1 KiB, 64 KiB, 1 MiB, 16 MiB and 64 MiB
+DEFAULT_SIZES = [2**10, 2**16, 2**20, 2**24, 2**26]
+
+
+def run(sizes=DEFAULT_SIZES, repetitions=20):
+    """Runs the benchmark.
+    Args:
+        sizes (list, optional): The file sizes to hash, in bytes (defaults to ``DEFAULT_SIZES``).\n
+        repetitions (int, optional): Number of times every file is hashed (defaults to 20).
+
+    Returns:
+        dictionary: Per file size (as string) the summary of the latencies, see ``summarize``, and the throughput in "mib_per_second".
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, f"{size}.bin")
+            with open(path, "wb") as f:
+                f.write(os.urandom(size))
+            _, summary = time_calls(
+                calculate_hash_of_file_via_path, [path] * repetitions
+            )
+            summary["mib_per_second"] = summary["per_second"] * size / 2**20
+            results[str(size)] = summary
+    return results
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    print(run())
+    print(f"Took {time.perf_counter() - started:.1f} seconds.")
@@ -0,0 +1,82 @@
+""" Benchmark of the import time of the notarization modules. Every import is measured in a fresh Python process, so nothing is cached from an earlier import.
+Besides the latencies, it reports which of the slow dependencies (web3, eth_account, requests) the import loaded. Hashing-only modules should load none of them.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import summarize
+
+DEFAULT_MODULES = [
+    "hashing",
+    "utils",
+    "manifest",
+    "verification",
+    "notarization",
+    "cli",
+    "connection",
+    # what the oTree app imports when it is loaded
+    "otree_hashing",
+]
+
+# dependencies that take long to import
+HEAVY_DEPENDENCIES = ["web3", "eth_account", "requests"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {path!r})
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def import_once(module):
+    """Imports a module in a fresh Python process.
+    Args:
+        module (string): Name of the module in ``src/notarization_code``.
+
+    Returns:
+        tuple: The import time in seconds and the list of heavy dependencies that were loaded.
+    """
+    script = IMPORT_SCRIPT.format(
+        path=os.path.abspath("src/notarization_code"),
+        module=module,
+        heavy=HEAVY_DEPENDENCIES,
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    # the last line, in case the module prints something when it is imported
+    result = json.loads(output.strip().splitlines()[-1])
+    return result["seconds"], result["loaded"]
+
+
+def run(modules=DEFAULT_MODULES, repetitions=5):
+    """Runs the benchmark.
+    Args:
+        modules (list, optional): The modules to import (defaults to ``DEFAULT_MODULES``).\n
+        repetitions (int, optional): Number of times every module is imported (defaults to 5).
+
+    Returns:
+        dictionary: Per module the summary of the import times, see ``summarize``, and the heavy dependencies it loaded in "loaded".
+    """
+    results = {}
+    for module in modules:
+        latencies = []
+        for _ in range(repetitions):
+            seconds, loaded = import_once(module)
+            latencies.append(seconds)
+        summary = summarize(latencies, sum(latencies))
+        summary["loaded"] = loaded
+        results[module] = summary
+    return results
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    print(run())
+    print(f"Took {time.perf_counter() - started:.1f} seconds.")
@@ -0,0 +1,97 @@
+""" Helpers shared by the benchmarks: timing of repeated calls, latency percentiles and a local in-process chain (eth-tester), so that no infura URL is needed. """
+import contextlib
+import io
+import time
+
+
+def percentile(values, q):
+    """Computes a percentile with linear interpolation between the closest ranks.
+    Args:
+        values (list): The measured values.\n
+        q (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile, None if there are no values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(latencies, total_seconds):
+    """Summarizes the latencies of repeated calls.
+    Args:
+        latencies (list): The latency of every call, in seconds.\n
+        total_seconds (float): The time all calls took together, in seconds.
+
+    Returns a dictionary containing:
+        count (int): The number of calls.\n
+        per_second (float): The number of calls per second.\n
+        mean_ms, p50_ms, p95_ms, p99_ms (float): The mean latency and latency percentiles, in milliseconds.
+    """
+    return {
+        "count": len(latencies),
+        "per_second": len(latencies) / total_seconds if total_seconds else None,
+        "mean_ms": 1000 * sum(latencies) / len(latencies),
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+    }
+
+
+def measure(function, *args, **kwargs):
+    """Calls a function once and measures how long it takes. Output of the function (e.g. its ``print`` calls) is discarded.
+    Args:
+        function (function): The function to measure.\n
+        args, kwargs: The arguments of the call.
+
+    Returns:
+        tuple: The result of the call and its latency, in seconds.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        result = function(*args, **kwargs)
+        return result, time.perf_counter() - started
+
+
+def time_calls(function, arguments):
+    """Calls a function once per argument, one after the other, and measures every call.
+    Args:
+        function (function): The function to measure.\n
+        arguments (list): The argument of every call.
+
+    Returns:
+        tuple: The results of the calls and their summary, see ``summarize``.
+    """
+    results = []
+    latencies = []
+    started = time.perf_counter()
+    for argument in arguments:
+        result, latency = measure(function, argument)
+        results.append(result)
+        latencies.append(latency)
+    return results, summarize(latencies, time.perf_counter() - started)
+
+
+def local_chain():
+    """Starts a local in-process chain (eth-tester) that mines every transaction right away.
+
+    Returns a dictionary containing:
+        web3_connection (Web3 object): The web3 connection to the chain.\n
+        account (string): A funded account.\n
+        private_key (string): The private key of the account.
+    """
+    from web3 import EthereumTesterProvider
+    from web3 import Web3
+
+    provider = EthereumTesterProvider()
+    account_key = provider.ethereum_tester.backend.account_keys[0]
+    return {
+        "web3_connection": Web3(provider),
+        "account": account_key.public_key.to_checksum_address(),
+        "private_key": account_key.to_hex(),
+    }
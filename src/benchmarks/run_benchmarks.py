@@ -0,0 +1,125 @@
+""" Runs all benchmarks and writes the results to a JSON file, e.g. from the root of the repository:
+
+    python src/benchmarks/run_benchmarks.py --output benchmark_results.json
+
+No infura URL is needed, notarization and verification run against a local in-process chain (eth-tester).
+The import times of the modules are measured as well, each in a fresh Python process. \n
+To catch regressions, the results can be compared with those of an earlier run (e.g. of the last release) via ``--baseline``.
+A throughput that is more than ``--tolerance`` lower or a p95 latency that is more than ``--tolerance`` higher than in the baseline is reported as regression and the script exits with status 1.
+So is a module whose import loads a slow dependency (e.g. web3) that it did not load in the baseline.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import bench_chain
+import bench_hashing
+import bench_imports
+
+# higher is better for these metrics, lower is better for the latencies
+THROUGHPUT_METRICS = ["per_second", "mib_per_second"]
+LATENCY_METRICS = ["p95_ms"]
+
+
+def metadata():
+    """Describes the environment the benchmarks ran in.
+
+    Returns:
+        dictionary: The time, the git commit (None if unknown), the Python and web3 versions and the platform.
+    """
+    import web3
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "web3": web3.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare(baseline, results, tolerance=0.2, path=""):
+    """Compares benchmark results with a baseline.
+    Args:
+        baseline (dictionary): The results of an earlier run.\n
+        results (dictionary): The current results.\n
+        tolerance (float, optional): The relative change that is still accepted (defaults to 0.2, i.e. 20%).\n
+        path (string, optional): Name of the compared results, used in the messages (defaults to "").
+
+    Returns:
+        list: A message per regression, empty if there is none.
+    """
+    regressions = []
+    for key, value in results.items():
+        if key not in baseline or baseline[key] is None or value is None:
+            continue
+        name = f"{path}/{key}" if path else key
+        if isinstance(value, dict):
+            regressions += compare(baseline[key], value, tolerance, name)
+        elif key in THROUGHPUT_METRICS and value < baseline[key] * (1 - tolerance):
+            regressions.append(
+                f"{name} dropped from {baseline[key]:.2f} to {value:.2f}"
+            )
+        elif key in LATENCY_METRICS and value > baseline[key] * (1 + tolerance):
+            regressions.append(f"{name} rose from {baseline[key]:.2f} to {value:.2f}")
+        elif key == "loaded" and set(value) - set(baseline[key]):
+            # a module that loads a slow dependency it did not load before
+            regressions.append(
+                f"{name} now includes {', '.join(sorted(set(value) - set(baseline[key])))}"
+            )
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--transactions", type=int, default=100)
+    parser.add_argument("--repetitions", type=int, default=20)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=bench_hashing.DEFAULT_SIZES,
+        help="file sizes to hash, in bytes",
+    )
+    parser.add_argument(
+        "--import-repetitions",
+        type=int,
+        default=5,
+        help="number of times every module is imported",
+    )
+    parser.add_argument("--baseline", help="results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(args)
+
+    results = {
+        "chain": bench_chain.run(args.transactions),
+        "hashing": bench_hashing.run(args.sizes, args.repetitions),
+        "imports": bench_imports.run(repetitions=args.import_repetitions),
+    }
+    with open(args.output, "w") as f:
+        json.dump({"metadata": metadata(), "results": results}, f, indent=2)
+    print(f"Results written to {args.output}.")
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(baseline, results, args.tolerance)
+        for regression in regressions:
+            print("Regression:", regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
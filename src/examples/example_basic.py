@@ -13,6 +13,7 @@ from utils import (
 )
 from notarization import create_notarization_transaction
 from notarization import send_transaction
+from payload import encode_payload
 from verification import verify_via_transaction
 
 # importing infura_url from blockchain_config (needs to be added manually)
@@ -30,7 +31,8 @@ def notarization(web3_connection):
     account = input("Please enter the address of the account: ")
     private_key = input("Please enter the private key of the account: ")
     file_path = input("Please enter the full path of the file you want to notarize: ")
-    string_to_save = calculate_hash_of_file_via_path(file_path)
+    # the hash is stored as raw bytes, which needs about half the space of the hex string
+    string_to_save = encode_payload(calculate_hash_of_file_via_path(file_path))
     tx = create_notarization_transaction(
         web3_connection=web3_connection,
         account=account,
@@ -2,7 +2,6 @@
 NOTE: This is currently fairly specific to the oTree example. Much is hard-coded.
 The purpose is to illustrate the general principle. """
 # importing all necessary packages
-import hashlib
 import os
 import sys
 
@@ -10,12 +9,16 @@ import pandas as pd
 
 # importing all required modules, files and config data
 sys.path.insert(0, os.path.abspath("src/notarization_code"))
-from verification import verify_via_transaction
+from otree_hashing import build_verification_strings
+from otree_hashing import resolve_tx_hashes
+from outbox import Outbox
+from verification import verify_many
 from utils import establish_infura_connection
 
 otree_raw_data = pd.read_csv(sys.path[1] + "/example_file_otree.csv")
 
 sys.path.insert(0, os.path.abspath("src"))
+import blockchain_config
 from blockchain_config import INFURA_URL
 
 # Establish web3 connection via infura
@@ -25,38 +28,26 @@ web3_connection = establish_infura_connection(INFURA_URL)
 relevant_data = otree_raw_data.copy()
 relevant_data.columns = relevant_data.columns.str.replace(".", "_")
 
-
-def build_verification_string(
-    data, participant_code_column, time_started_column, input_data_columns
-):
-    """
-    Takes dataframe as input and calculates the payload string to check.
-    """
-    input_data_listed = data[input_data_columns].to_numpy().tolist()
-    data["input_data_generated"] = input_data_listed
-    data["input_data_generated"] = data["input_data_generated"].astype(str)
-    data["verification_string_without_hash"] = (
-        "participant_code: "
-        + data[participant_code_column]
-        + " time_started: "
-        + data[time_started_column]
-        + " decisions: "
-        + data["input_data_generated"]
-    )
-    data["hashes"] = data.apply(
-        lambda row: hashlib.sha256(
-            row.verification_string_without_hash.encode()
-        ).hexdigest(),
-        axis=1,
-    )
-    data["verification_string"] = (
-        data["verification_string_without_hash"] + " - " + data["hashes"]
+# The oTree app sends the notarizations in the background. Its custom export (see ``custom_export`` in the app) updates the tx_hashes from its outbox first,
+# in an export taken before, the tx_hash may only be a placeholder. In that case, the hashes are looked up in the outbox of the app by the exported outbox id.
+OUTBOX_PATH = getattr(
+    blockchain_config,
+    "OUTBOX_PATH",
+    os.path.abspath("src/otree_code/notarization_outbox.sqlite3"),
+)
+if "player_outbox_id" in relevant_data.columns and os.path.exists(OUTBOX_PATH):
+    outbox = Outbox(OUTBOX_PATH)
+    relevant_data["player_tx_hash"] = resolve_tx_hashes(
+        data=relevant_data,
+        tx_hash_column="player_tx_hash",
+        outbox_id_column="player_outbox_id",
+        outbox=outbox,
     )
-    return data["verification_string"]
+    outbox.close()
 
 
 # Step 1: Take the data and calculate the verification string as a new column.
-relevant_data["verification_string"] = build_verification_string(
+relevant_data["verification_string"] = build_verification_strings(
     data=relevant_data,
     participant_code_column="participant_code",
     time_started_column="participant_time_started",
@@ -64,14 +55,14 @@ relevant_data["verification_string"] = build_verification_string(
 )
 
 # Step 2: Look up if the verification string matches what is saved in the transaction specified
-relevant_data["verified"] = relevant_data.apply(
-    lambda row: verify_via_transaction(
-        web3_connection=web3_connection,
-        tx_hash=row.player_tx_hash,
-        hash_value=row.verification_string,
-    )["verified"],
-    axis=1,
+# (all transactions are looked up at once via batch requests)
+verification_results = verify_many(
+    web3_connection=web3_connection,
+    items=list(
+        zip(relevant_data["player_tx_hash"], relevant_data["verification_string"])
+    ),
 )
+relevant_data["verified"] = [result["verified"] for result in verification_results]
 
 # Show which rows have been verified.
 print(relevant_data["verified"])
@@ -0,0 +1,111 @@
+""" Local balance tracking. By default, ``create_notarization_transaction`` asks the node for the balance of the account before every transaction. \n
+The class ``BalanceLedger`` fetches the balance of an account once and then keeps track of it locally: every created transaction reserves its worst-case fee (gas limit times gas price).
+If the balance minus all reservations does not cover the fee of a new transaction, ``AccountBalanceInsufficient`` is raised, just like without the ledger. \n
+Once a transaction is mined, its reservation is settled and the balance is fetched again, as the actual fee is only known from the chain. The balance is also fetched again after ``refresh_interval`` seconds.
+Reservations are kept by nonce, so when the balance is fetched, the reservations of all transactions the node has already mined (nonce below the transaction count) are dropped as well.
+If a transaction could not be sent at all, its reservation is released without asking the node.
+"""
+import threading
+import time
+
+from notarization import AccountBalanceInsufficient
+from web3 import Web3
+
+
+class BalanceLedger:
+    """Keeps track of account balances locally. Can be shared between threads.
+
+    Attributes:
+        web3_connection (Web3 object): The web3 connection used to fetch balances.\n
+        refresh_interval (float): Number of seconds after which the balance is fetched again (defaults to 60).
+    """
+
+    def __init__(self, web3_connection, refresh_interval=60):
+        self.web3_connection = web3_connection
+        self.refresh_interval = refresh_interval
+        self._balances = {}
+        self._reservations = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, account):
+        """Fetches the balance of an account from the node and drops the reservations of mined transactions.
+        Args:
+            account (string): The address of the account.
+        """
+        # count first: a transaction mined in between is then paid in the balance and still reserved, never neither
+        mined_count = self.web3_connection.eth.getTransactionCount(account)
+        balance = self.web3_connection.eth.getBalance(account)
+        with self._lock:
+            self._balances[account] = {
+                "balance": balance,
+                "fetched_at": time.monotonic(),
+            }
+            reservations = self._reservations.get(account, {})
+            for nonce in [nonce for nonce in reservations if nonce < mined_count]:
+                del reservations[nonce]
+
+    def _is_stale(self, account):
+        balance = self._balances.get(account)
+        return (
+            balance is None
+            or time.monotonic() - balance["fetched_at"] > self.refresh_interval
+        )
+
+    def available(self, account):
+        """Returns the balance of an account that is not reserved for sent transactions yet.
+        Args:
+            account (string): The address of the account.
+
+        Returns:
+            int: The available balance in wei.
+        """
+        if self._is_stale(account):
+            self.refresh(account)
+        with self._lock:
+            reserved = sum(self._reservations.get(account, {}).values())
+            return self._balances[account]["balance"] - reserved
+
+    def reserve(self, account, nonce, amount):
+        """Reserves the worst-case fee of a transaction. Raises AccountBalanceInsufficient if the available balance does not cover it.
+        A reservation for the same nonce (e.g. of the transaction a replacement replaces) is replaced, not added to.
+        Args:
+            account (string): The address of the account.\n
+            nonce (int): The nonce of the transaction.\n
+            amount (int): The worst-case fee in wei.
+        """
+        if self._is_stale(account):
+            self.refresh(account)
+        with self._lock:
+            reservations = self._reservations.setdefault(account, {})
+            # a replacement (same nonce) takes the place of the earlier reservation
+            reserved = sum(
+                reserved_amount
+                for reserved_nonce, reserved_amount in reservations.items()
+                if reserved_nonce != nonce
+            )
+            available = self._balances[account]["balance"] - reserved
+            if available < amount:
+                raise AccountBalanceInsufficient(
+                    balance=Web3.fromWei(available, "gwei"),
+                    min_amount=Web3.fromWei(amount, "gwei"),
+                )
+            reservations[nonce] = amount
+
+    def release(self, account, nonce):
+        """Releases the reservation of a transaction that was not sent.
+        Args:
+            account (string): The address of the account.\n
+            nonce (int): The nonce of the transaction.
+        """
+        with self._lock:
+            self._reservations.get(account, {}).pop(nonce, None)
+
+    def settle(self, account, nonce):
+        """Settles the reservation of a mined transaction. The balance is fetched again the next time it is needed.
+        Args:
+            account (string): The address of the account.\n
+            nonce (int): The nonce of the transaction.
+        """
+        with self._lock:
+            self._reservations.get(account, {}).pop(nonce, None)
+            self._balances.pop(account, None)
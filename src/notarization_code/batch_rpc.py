@@ -0,0 +1,121 @@
+""" JSON-RPC batch requests. Looking up many transactions or blocks one request after the other means one round trip to the node per lookup. \n
+The function ``batch_request`` sends many requests at once: they are split into batches of ``batch_size`` requests, each batch is sent as a single JSON-RPC batch request,
+and up to ``max_workers`` batches are sent at the same time. The responses are returned in the order of the requests. \n
+Every batch is recorded in the shared metrics (see ``instrumentation.py``) under the method "batch", and every request in it under its own method, with the latency of the batch. \n
+Batch requests are only possible for HTTP providers. For other providers (e.g. the local test chain) the requests are sent one after the other instead, the results are the same.
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from instrumentation import metrics
+
+
+def _send_batch(provider, batch):
+    # batch is a list of (id, method, params)
+    started = time.perf_counter()
+    try:
+        responses = _post_batch(provider, batch)
+    except Exception:
+        seconds = time.perf_counter() - started
+        metrics.record_rpc("batch", seconds, error=True)
+        for _, method, _ in batch:
+            metrics.record_rpc(method, seconds, error=True)
+        raise
+    seconds = time.perf_counter() - started
+    metrics.record_rpc("batch", seconds)
+    # every request of the batch took as long as the batch, it failed if the node answered with an error
+    failed = {
+        response.get("id")
+        for response in responses
+        if "error" in response or "result" not in response
+    }
+    answered = {response.get("id") for response in responses}
+    for request_id, method, _ in batch:
+        metrics.record_rpc(
+            method,
+            seconds,
+            error=request_id in failed or request_id not in answered,
+        )
+    return responses
+
+
+def _post_batch(provider, batch):
+    payload = [
+        {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        for request_id, method, params in batch
+    ]
+    session = getattr(provider, "session", None) or requests
+    request_kwargs = provider.get_request_kwargs()
+    request_kwargs.setdefault("timeout", 30)
+    response = session.post(
+        provider.endpoint_uri, data=json.dumps(payload), **request_kwargs
+    )
+    response.raise_for_status()
+    responses = response.json()
+    if not isinstance(responses, list):
+        raise ValueError(f"The node did not accept the batch request: {responses}")
+    return responses
+
+
+def _send_one_by_one(web3_connection, requests_to_send):
+    responses = []
+    for method, params in requests_to_send:
+        try:
+            result = web3_connection.manager.request_blocking(method, params)
+            responses.append({"result": result})
+        except Exception as e:
+            responses.append({"error": str(e)})
+    return responses
+
+
+def batch_request(web3_connection, requests_to_send, batch_size=100, max_workers=4):
+    """Sends many JSON-RPC requests using batch requests.
+    Args:
+        web3_connection (Web3 object): The web3 connection, initialized via ' Web3(Web3.HTTPProvider( ))'.\n
+        requests_to_send (list): The requests as (method, params) pairs, e.g. ("eth_getTransactionByHash", [tx_hash]).\n
+        batch_size (int, optional): Maximum number of requests per batch (defaults to 100).\n
+        max_workers (int, optional): Maximum number of batches sent at the same time (defaults to 4).
+
+    Returns:
+        list: One dictionary per request, in the order of the requests. It contains either the key "result" or the key "error".
+        Requests the node did not answer get the error of the batch (a response without id) or "No response from node.".
+    """
+    provider = web3_connection.provider
+    if not hasattr(provider, "endpoint_uri") or not str(
+        provider.endpoint_uri
+    ).startswith("http"):
+        return _send_one_by_one(web3_connection, requests_to_send)
+
+    requests_with_ids = [
+        (request_id, method, params)
+        for request_id, (method, params) in enumerate(requests_to_send)
+    ]
+    batches = [
+        requests_with_ids[i : i + batch_size]
+        for i in range(0, len(requests_with_ids), batch_size)
+    ]
+    responses = [None] * len(requests_with_ids)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch, batch_responses in zip(
+            batches, executor.map(lambda batch: _send_batch(provider, batch), batches)
+        ):
+            # the node may answer in any order, the ids tell which response belongs to which request
+            batch_error = None
+            for response in batch_responses:
+                if response.get("id") is None:
+                    # an error without id (e.g. an invalid request) belongs to no single request, but to the batch
+                    batch_error = response.get("error", "Response without id.")
+                elif "error" in response:
+                    responses[response["id"]] = {"error": response["error"]}
+                else:
+                    responses[response["id"]] = {"result": response.get("result")}
+            if batch_error is not None:
+                for request_id, _, _ in batch:
+                    if responses[request_id] is None:
+                        responses[request_id] = {"error": batch_error}
+    return [
+        response if response is not None else {"error": "No response from node."}
+        for response in responses
+    ]
@@ -0,0 +1,129 @@
+""" Cache of block timestamps. To verify a transaction, the block it was mined in is fetched from the node just to read its timestamp.
+When many notarizations were mined in the same few blocks, the same blocks are fetched over and over again. \n
+The class ``BlockTimestampCache`` keeps the timestamps of recently used blocks in memory, up to ``max_size`` blocks (the least recently used block is evicted first).
+Only blocks that are at least ``confirmation_depth`` blocks deep are cached, so that a chain reorganization cannot leave a wrong timestamp in the cache.
+Blocks are cached per chain id, so verifying against several networks in one process never returns the timestamp of another chain. The chain id of a connection is only looked up once. \n
+``block_timestamp_cache`` is the cache that is shared by all verification calls in the process.
+"""
+import threading
+import weakref
+from collections import OrderedDict
+
+
+class BlockTimestampCache:
+    """Keeps the timestamps of confirmed blocks in memory. Can be shared between threads.
+
+    Attributes:
+        max_size (int): Maximum number of blocks kept (defaults to 10000).\n
+        confirmation_depth (int): Number of blocks that need to be mined on top of a block before it is cached (defaults to 12).
+    """
+
+    def __init__(self, max_size=10000, confirmation_depth=12):
+        self.max_size = max_size
+        self.confirmation_depth = confirmation_depth
+        # timestamps by (chain_id, block_number)
+        self._timestamps = OrderedDict()
+        self._latest_block_numbers = {}
+        self._chain_ids = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def chain_id(self, web3_connection):
+        """Returns the chain id of a connection, asks the node only the first time.
+        Args:
+            web3_connection (Web3 object): The web3 connection.
+
+        Returns:
+            int: The chain id.
+        """
+        with self._lock:
+            chain_id = self._chain_ids.get(web3_connection)
+        if chain_id is None:
+            chain_id = web3_connection.eth.chain_id
+            with self._lock:
+                self._chain_ids[web3_connection] = chain_id
+        return chain_id
+
+    def get(self, chain_id, block_number):
+        """Looks up the timestamp of a block.
+        Args:
+            chain_id (int): The chain id of the network, see ``chain_id``.\n
+            block_number (int): The number of the block.
+
+        Returns:
+            int: The timestamp of the block, or None if it is not in the cache.
+        """
+        with self._lock:
+            timestamp = self._timestamps.get((chain_id, block_number))
+            if timestamp is not None:
+                self._timestamps.move_to_end((chain_id, block_number))
+            return timestamp
+
+    def is_confirmed(self, chain_id, block_number):
+        """Checks whether a block is deep enough to be cached, based on the latest block number of the chain seen so far.
+        Args:
+            chain_id (int): The chain id of the network.\n
+            block_number (int): The number of the block.
+
+        Returns:
+            boolean: True if the block has at least ``confirmation_depth`` blocks on top of it.
+        """
+        latest_block_number = self._latest_block_numbers.get(chain_id, -1)
+        return latest_block_number - block_number >= self.confirmation_depth
+
+    def update_latest_block_number(self, chain_id, latest_block_number):
+        """Tells the cache the number of the latest block of a chain.
+        Args:
+            chain_id (int): The chain id of the network.\n
+            latest_block_number (int): The number of the latest block.
+        """
+        with self._lock:
+            self._latest_block_numbers[chain_id] = max(
+                self._latest_block_numbers.get(chain_id, -1), latest_block_number
+            )
+
+    def put(self, chain_id, block_number, timestamp):
+        """Stores the timestamp of a block, but only if the block is confirmed.
+        Args:
+            chain_id (int): The chain id of the network.\n
+            block_number (int): The number of the block.\n
+            timestamp (int): The timestamp of the block.
+        """
+        with self._lock:
+            if not self.is_confirmed(chain_id, block_number):
+                return
+            self._timestamps[(chain_id, block_number)] = timestamp
+            self._timestamps.move_to_end((chain_id, block_number))
+            while len(self._timestamps) > self.max_size:
+                self._timestamps.popitem(last=False)
+
+    def get_timestamp(self, web3_connection, block_number):
+        """Returns the timestamp of a block, from the cache if possible, otherwise from the node.
+        Args:
+            web3_connection (Web3 object): The web3 connection, initialized via ' Web3(Web3.HTTPProvider( ))'.\n
+            block_number (int): The number of the block.
+
+        Returns:
+            int: The timestamp of the block.
+        """
+        chain_id = self.chain_id(web3_connection)
+        timestamp = self.get(chain_id, block_number)
+        if timestamp is not None:
+            return timestamp
+        timestamp = web3_connection.eth.get_block(block_number)["timestamp"]
+        # the latest block number only needs to be looked up if the block might not be confirmed yet
+        if not self.is_confirmed(chain_id, block_number):
+            self.update_latest_block_number(chain_id, web3_connection.eth.block_number)
+        self.put(chain_id, block_number, timestamp)
+        return timestamp
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def clear(self):
+        """Removes all blocks from the cache."""
+        with self._lock:
+            self._timestamps.clear()
+
+
+# cache shared by all verification calls in the process
+block_timestamp_cache = BlockTimestampCache()
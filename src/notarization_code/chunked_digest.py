@@ -0,0 +1,185 @@
+""" Chunked file digests. ``calculate_hash_of_file_directly`` computes one flat SHA256 hash over the whole file: a file that grows by a few bytes has to be read again completely, and a file that does not match only tells that it differs, not where. \n
+A chunked digest splits the file into chunks of ``chunk_size`` bytes, hashes every chunk with SHA256 and builds a Merkle tree over the chunk hashes (see ``merkle.py``).
+The root of the tree is the digest that is notarized, as compact payload with the algorithm "chunked-merkle-sha256" (see ``payload.py``), e.g. ``encode_payload(digest["root"], algorithm=ALGORITHM)``.
+``verify_via_transaction`` recognizes the algorithm and computes the chunked digest of the file instead of the flat hash. The root depends on the chunk size, so files notarized with another chunk size than ``DEFAULT_CHUNK_SIZE`` have to be verified via ``verify_chunked_digest``. \n
+``chunked_digest`` hashes the chunks of a file in parallel threads (hashlib and reading files release the GIL, so threads hash in parallel without copying the chunks between processes).
+The returned digest contains the hashes of all chunks. Kept together with the notarization (e.g. as JSON), it allows to
+    - update the digest of a file that data was appended to with ``update_chunked_digest``, which only reads the last incomplete chunk and the new data, and
+    - find out where a file differs from the notarized one with ``verify_chunked_digest``, which reports the ranges of chunks (and bytes) that do not match.
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from merkle import build_merkle_tree
+from merkle import merkle_root
+
+ALGORITHM = "chunked-merkle-sha256"
+
+# number of bytes per chunk
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def _hash_chunks(path, chunk_size, first_chunk, last_chunk):
+    # hashes the chunks first_chunk to last_chunk (exclusive) of a file
+    chunk_hashes = []
+    with open(path, "rb", buffering=0) as f:
+        f.seek(first_chunk * chunk_size)
+        for _ in range(first_chunk, last_chunk):
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunk_hashes.append(hashlib.sha256(chunk).hexdigest())
+    return chunk_hashes
+
+
+def _hash_chunk_range(path, chunk_size, first_chunk, last_chunk, max_workers):
+    # spreads the chunks over threads, a few groups of consecutive chunks per thread
+    workers = max_workers or os.cpu_count() or 1
+    count = last_chunk - first_chunk
+    if workers == 1 or count < 2:
+        return _hash_chunks(path, chunk_size, first_chunk, last_chunk)
+    group_size = -(-count // (4 * workers))
+    starts = range(first_chunk, last_chunk, group_size)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        groups = executor.map(
+            lambda start: _hash_chunks(
+                path, chunk_size, start, min(start + group_size, last_chunk)
+            ),
+            starts,
+        )
+        return [chunk_hash for group in groups for chunk_hash in group]
+
+
+def chunk_root(chunk_hashes):
+    """Computes the Merkle root over the hashes of the chunks of a file.
+    Args:
+        chunk_hashes (list): The SHA256 hashes of the chunks as hex strings, in the order of the chunks.
+
+    Returns:
+        string: The root as hex string.
+    """
+    return merkle_root(
+        build_merkle_tree([bytes.fromhex(chunk_hash) for chunk_hash in chunk_hashes])
+    )
+
+
+def chunked_digest(path, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None):
+    """Computes the chunked digest of a file. An empty file consists of one empty chunk.
+    Args:
+        path (string): Path to the file.\n
+        chunk_size (int, optional): Number of bytes per chunk (defaults to 1 MiB).\n
+        max_workers (int, optional): Number of threads to hash with (defaults to None, i.e. the number of CPUs). With 1, the chunks are hashed in this thread.
+
+    Returns a dictionary containing:
+        algorithm (string): "chunked-merkle-sha256".\n
+        chunk_size (int): The number of bytes per chunk.\n
+        size (int): The size of the file in bytes.\n
+        chunk_hashes (list): The SHA256 hash of every chunk as hex string.\n
+        root (string): The Merkle root over the chunk hashes as hex string, the digest to notarize.
+    """
+    size = os.path.getsize(path)
+    chunk_count = max(-(-size // chunk_size), 1)
+    chunk_hashes = _hash_chunk_range(path, chunk_size, 0, chunk_count, max_workers)
+    if not chunk_hashes:
+        chunk_hashes = [hashlib.sha256(b"").hexdigest()]
+    return {
+        "algorithm": ALGORITHM,
+        "chunk_size": chunk_size,
+        "size": size,
+        "chunk_hashes": chunk_hashes,
+        "root": chunk_root(chunk_hashes),
+    }
+
+
+def update_chunked_digest(digest, path, max_workers=None):
+    """Updates the chunked digest of a file that data was appended to. Only the last, incomplete chunk of the old digest and the appended data are read.
+    IMPORTANT: It is not checked whether the data before was changed as well. If the file is smaller than before, it is hashed completely.
+    Args:
+        digest (dictionary): The digest of the file before the data was appended, as returned by ``chunked_digest``.\n
+        path (string): Path to the file.\n
+        max_workers (int, optional): Number of threads to hash with (defaults to None, i.e. the number of CPUs).
+
+    Returns:
+        dictionary: The new digest, see ``chunked_digest``.
+    """
+    chunk_size = digest["chunk_size"]
+    size = os.path.getsize(path)
+    if size < digest["size"]:
+        return chunked_digest(path, chunk_size=chunk_size, max_workers=max_workers)
+    if size == digest["size"]:
+        return dict(digest, chunk_hashes=list(digest["chunk_hashes"]))
+    # all complete chunks stay the same, the last chunk is only kept if it was complete
+    complete_chunks = digest["size"] // chunk_size
+    chunk_hashes = digest["chunk_hashes"][:complete_chunks]
+    chunk_hashes += _hash_chunk_range(
+        path, chunk_size, complete_chunks, -(-size // chunk_size), max_workers
+    )
+    return {
+        "algorithm": ALGORITHM,
+        "chunk_size": chunk_size,
+        "size": size,
+        "chunk_hashes": chunk_hashes,
+        "root": chunk_root(chunk_hashes),
+    }
+
+
+def compare_chunked_digests(expected, actual):
+    """Compares two chunked digests of the same chunk size chunk by chunk.
+    Args:
+        expected (dictionary): The digest of the original file, e.g. the one that was notarized.\n
+        actual (dictionary): The digest of the file to check.
+
+    Returns a dictionary containing:
+        verified (boolean): True if the roots match.\n
+        mismatches (list): One dictionary per range of consecutive chunks that differ (or exist in only one of the files), with the keys "chunks" ([first, last] chunk index) and "bytes" ([start, end] byte offsets, end exclusive), empty if the roots match.
+    """
+    if expected["chunk_size"] != actual["chunk_size"]:
+        raise ValueError(
+            f"Digests with chunk sizes {expected['chunk_size']} and {actual['chunk_size']} cannot be compared."
+        )
+    chunk_size = expected["chunk_size"]
+    size = max(expected["size"], actual["size"])
+    expected_hashes = expected["chunk_hashes"]
+    actual_hashes = actual["chunk_hashes"]
+    mismatches = []
+    for index in range(max(len(expected_hashes), len(actual_hashes))):
+        in_both = index < len(expected_hashes) and index < len(actual_hashes)
+        if in_both and expected_hashes[index] == actual_hashes[index]:
+            continue
+        end = min((index + 1) * chunk_size, size)
+        if mismatches and mismatches[-1]["chunks"][1] == index - 1:
+            # extend the range of the previous chunk
+            mismatches[-1]["chunks"][1] = index
+            mismatches[-1]["bytes"][1] = end
+        else:
+            mismatches.append(
+                {"chunks": [index, index], "bytes": [index * chunk_size, end]}
+            )
+    return {
+        "verified": expected["root"].lower() == actual["root"] and not mismatches,
+        "mismatches": mismatches,
+    }
+
+
+def verify_chunked_digest(path, digest, max_workers=None):
+    """Verifies a file against its chunked digest and reports where it differs.
+    The chunk hashes of the digest are checked against its root first, so a digest whose root matches the notarized one cannot report wrong chunks.
+    Args:
+        path (string): Path to the file to verify.\n
+        digest (dictionary): The digest of the original file, as returned by ``chunked_digest``.\n
+        max_workers (int, optional): Number of threads to hash with (defaults to None, i.e. the number of CPUs).
+
+    Returns a dictionary containing:
+        verified (boolean): True if the file matches the digest.\n
+        root (string): The root of the file, to compare with the notarized root via ``verify_via_transaction`` (with ``hash_value``).\n
+        mismatches (list): The ranges of chunks that differ, see ``compare_chunked_digests``.
+    """
+    if chunk_root(digest["chunk_hashes"]) != digest["root"].lower():
+        raise ValueError("The chunk hashes of the digest do not match its root.")
+    actual = chunked_digest(
+        path, chunk_size=digest["chunk_size"], max_workers=max_workers
+    )
+    report = compare_chunked_digests(digest, actual)
+    report["root"] = actual["root"]
+    return report
@@ -0,0 +1,430 @@
+""" Command line interface to notarize and verify many files in one run, e.g. in nightly archival jobs. \n
+``notarize`` hashes all given files (paths, directories and glob patterns, or the entries of a manifest written by ``write_manifest``) in parallel and notarizes them,
+by default all in one transaction via a Merkle tree (``--mode batch``, see ``create_batch_notarization_transaction``), or with one transaction per file (``--mode single``), sent back-to-back.
+The results (path, hash, tx_hash, Merkle proof and status of every file) are written to a JSON or CSV file, depending on the extension of ``--output``. \n
+``verify`` hashes the files again and verifies them against the results file of an earlier ``notarize`` run (``--receipts``), looking up all transactions with batch requests (see ``verify_many``). \n
+One connection is used for the whole run: ``--url`` for a node (e.g. infura) or ``--local`` for a local in-process chain (eth-tester), which needs no account or key.
+The private key is read from the environment variable given by ``--private-key-env`` or from an encrypted keystore (``--keystore``, password from ``--password-env``), never from the command line.
+Progress is reported on stderr. The exit status is 1 if a file could not be notarized or verified.
+If the run stops on an error (e.g. the node rejects a transaction), the error is reported on stderr, the results gathered so far are written and the exit status is 2. For example:
+
+    python src/notarization_code/cli.py notarize "data/**/*.csv" --url $INFURA_URL --account 0x... --output receipts.json
+    python src/notarization_code/cli.py verify "data/**/*.csv" --url $INFURA_URL --receipts receipts.json --output verification.csv
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+
+from manifest import collect_files
+from manifest import hash_files
+from manifest import read_manifest
+
+# number of files hashed between two progress reports
+PROGRESS_CHUNK = 256
+
+FIELDS = {
+    "notarize": ["path", "hash", "tx_hash", "proof", "status"],
+    "verify": ["path", "hash", "tx_hash", "verified", "timestamp", "error"],
+}
+
+
+class RunAborted(Exception):
+    """Raised if notarizing stopped on an error after some files were already handled.
+
+    Attributes:
+        error (Exception): The error that stopped the run.\n
+        results (list): The results gathered before the error.
+    """
+
+    def __init__(self, error, results):
+        super().__init__(describe_error(error))
+        self.error = error
+        self.results = results
+
+
+def describe_error(error):
+    """Describes an error that stopped the run. Some functions print a message and exit, so a ``SystemExit`` tells nothing by itself."""
+    if isinstance(error, SystemExit):
+        return "The node rejected the transaction (run with --verbose for details)."
+    return f"{type(error).__name__}: {error}"
+
+
+def progress(message):
+    """Reports progress on stderr, so it does not mix with results written to stdout."""
+    print(message, file=sys.stderr, flush=True)
+
+
+def hash_inputs(paths, manifest_path=None, rehash=False, max_workers=None):
+    """Hashes the files to notarize or verify.
+    Args:
+        paths (list): Paths of files or directories and glob patterns.\n
+        manifest_path (string, optional): Manifest whose entries are used in addition to the paths. Its paths are relative to the directory of the manifest.\n
+        rehash (boolean, optional): If True, the files of the manifest are hashed again instead of taking the hashes from the manifest (defaults to False).\n
+        max_workers (int, optional): Number of processes to hash with (defaults to None, i.e. the number of CPUs).
+
+    Returns:
+        list: One dictionary per file with keys "path" and "hash", sorted by path.
+    """
+    hashes = {}
+    files = collect_files(paths)
+    if manifest_path is not None:
+        manifest_directory = os.path.dirname(os.path.abspath(manifest_path))
+        for entry in read_manifest(manifest_path):
+            path = os.path.normpath(os.path.join(manifest_directory, entry["path"]))
+            if rehash:
+                files.append(path)
+            else:
+                hashes[path] = entry["hash"]
+    files = sorted(set(files) - set(hashes))
+    hashed = []
+
+    def report(path):
+        hashed.append(path)
+        if len(hashed) % PROGRESS_CHUNK == 0 or len(hashed) == len(files):
+            progress(f"Hashed {len(hashed)}/{len(files)} files.")
+
+    # one pool for all files, so the largest files are started first
+    for entry in hash_files(files, max_workers=max_workers, callback=report):
+        hashes[entry["path"]] = entry["hash"]
+    return [{"path": path, "hash": hashes[path]} for path in sorted(hashes)]
+
+
+def notarize_batch(web3_connection, account, signer, entries, time_limit):
+    """Notarizes all files in one transaction that stores the root of a Merkle tree over their hashes.
+    Args:
+        web3_connection (Web3 object): The web3 connection.\n
+        account (string): The address of the account to send from.\n
+        signer (Signer): The signer of the account.\n
+        entries (list): The files, dictionaries with keys "path" and "hash".\n
+        time_limit (int): Number of seconds to wait for the transaction to be mined.
+
+    Returns:
+        list: The entries, each with "tx_hash", "proof" and "status" added.
+    """
+    from notarization import create_batch_notarization_transaction
+    from notarization import send_transaction
+
+    batch = create_batch_notarization_transaction(
+        web3_connection=web3_connection,
+        account=account,
+        hashes_to_save=[entry["hash"] for entry in entries],
+    )
+    result = send_transaction(
+        web3_connection=web3_connection,
+        transaction=batch["tx"],
+        private_key=signer,
+        time_limit=time_limit,
+    )
+    if "tx_receipt" not in result:
+        status = "pending"
+    elif result["tx_receipt"]["status"] == 1:
+        status = "confirmed"
+    else:
+        status = "failed"
+    progress(
+        f"Notarized {len(entries)} files in transaction {result['tx_hash']}: {status}."
+    )
+    return [
+        dict(entry, tx_hash=result["tx_hash"], proof=proof["proof"], status=status)
+        for entry, proof in zip(entries, batch["proofs"])
+    ]
+
+
+def notarize_single(web3_connection, account, signer, entries, time_limit):
+    """Notarizes every file in a transaction of its own. All transactions are sent back-to-back and watched for their receipts in the background.
+    Args:
+        web3_connection (Web3 object): The web3 connection.\n
+        account (string): The address of the account to send from.\n
+        signer (Signer): The signer of the account.\n
+        entries (list): The files, dictionaries with keys "path" and "hash".\n
+        time_limit (int): Number of seconds to wait for each transaction to be mined.
+
+    Returns:
+        list: The entries, each with "tx_hash", "proof" (None) and "status" added.
+
+    Raises:
+        RunAborted: If a transaction could not be sent. Contains the results of the transactions sent before, once they are mined.
+    """
+    from confirmation import ConfirmationTracker
+    from fees import FeeEstimator
+    from nonce_manager import NonceManager
+    from notarization import create_notarization_transaction
+    from notarization import send_transaction
+    from payload import encode_payload
+
+    nonce_manager = NonceManager(web3_connection)
+    fee_estimator = FeeEstimator(web3_connection)
+    tracker = ConfirmationTracker(web3_connection, time_limit=time_limit)
+    results = []
+    error = None
+    for i, entry in enumerate(entries, 1):
+        try:
+            tx = create_notarization_transaction(
+                web3_connection=web3_connection,
+                account=account,
+                string_to_save=encode_payload(entry["hash"]),
+                nonce_manager=nonce_manager,
+                fee_estimator=fee_estimator,
+            )
+            tx_hash = send_transaction(
+                web3_connection=web3_connection,
+                transaction=tx,
+                private_key=signer,
+                time_limit=time_limit,
+                nonce_manager=nonce_manager,
+                confirmation_tracker=tracker,
+            )["tx_hash"]
+        except (Exception, SystemExit) as e:
+            # the transactions sent so far are still waited for, so their results can be written
+            error = e
+            break
+        results.append(dict(entry, tx_hash=tx_hash, proof=None))
+        if i % PROGRESS_CHUNK == 0 or i == len(entries):
+            progress(f"Sent {i}/{len(entries)} transactions.")
+    for i, result in enumerate(results, 1):
+        status = tracker.wait(result["tx_hash"])
+        result["tx_hash"] = status["tx_hash"]
+        result["status"] = status["status"]
+        if i % PROGRESS_CHUNK == 0 or i == len(results):
+            progress(f"Confirmed {i}/{len(results)} transactions.")
+    tracker.stop()
+    if error is not None:
+        raise RunAborted(error, results)
+    return results
+
+
+def verify(web3_connection, entries, receipts):
+    """Verifies the files against the results of an earlier notarization.
+    Args:
+        web3_connection (Web3 object): The web3 connection.\n
+        entries (list): The files, dictionaries with keys "path" and "hash".\n
+        receipts (list): The results of the notarization, as written by ``notarize``.
+
+    Returns:
+        list: The entries, each with "tx_hash", "verified", "timestamp" and "error" (None if there is none) added.
+    """
+    from verification import verify_many
+
+    by_path = {os.path.abspath(receipt["path"]): receipt for receipt in receipts}
+    notarized = []
+    results = []
+    for entry in entries:
+        receipt = by_path.get(os.path.abspath(entry["path"]))
+        if receipt is None:
+            results.append(
+                dict(
+                    entry,
+                    tx_hash=None,
+                    verified=False,
+                    timestamp=None,
+                    error="The file was not notarized.",
+                )
+            )
+        else:
+            notarized.append((entry, receipt))
+    verifications = verify_many(
+        web3_connection,
+        [
+            (receipt["tx_hash"], entry["hash"], receipt["proof"])
+            for entry, receipt in notarized
+        ],
+    )
+    for (entry, receipt), verification in zip(notarized, verifications):
+        results.append(
+            dict(
+                entry,
+                tx_hash=receipt["tx_hash"],
+                verified=verification["verified"],
+                timestamp=verification["timestamp"],
+                error=verification.get("error"),
+            )
+        )
+    progress(
+        f"Verified {sum(result['verified'] for result in results)}/{len(results)} files."
+    )
+    return sorted(results, key=lambda result: result["path"])
+
+
+def write_results(results, output_path, fields):
+    """Writes results to a JSON file or, if the path ends with ".csv", a CSV file (proofs are JSON-encoded).
+    Args:
+        results (list): The results, one dictionary per file.\n
+        output_path (string): Path of the file to write.\n
+        fields (list): The keys of the results to write, in this order.
+    """
+    if output_path.lower().endswith(".csv"):
+        with open(output_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            for result in results:
+                if "proof" in result:
+                    result = dict(result, proof=json.dumps(result["proof"]))
+                writer.writerow(result)
+    else:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(
+                [{field: result.get(field) for field in fields} for result in results],
+                f,
+                indent=2,
+            )
+
+
+def read_results(path):
+    """Reads results written by ``write_results``.
+    Args:
+        path (string): Path of the JSON or CSV file.
+
+    Returns:
+        list: The results, one dictionary per file.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            results = list(csv.DictReader(f))
+        for result in results:
+            if "proof" in result:
+                result["proof"] = json.loads(result["proof"] or "null")
+        return results
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def connect(args):
+    """Creates the connection for the run and finds the account and signer to notarize with.
+    Args:
+        args (Namespace): The parsed command line arguments.
+
+    Returns:
+        tuple: The web3 connection, the account (None for verify) and the signer (None for verify).
+
+    Raises:
+        ValueError: If ``--account`` is not the account of the key.
+    """
+    from signer import Signer
+
+    if args.local:
+        from web3 import EthereumTesterProvider
+        from web3 import Web3
+
+        provider = EthereumTesterProvider()
+        account_key = provider.ethereum_tester.backend.account_keys[0]
+        return (
+            Web3(provider),
+            account_key.public_key.to_checksum_address(),
+            Signer(account_key.to_hex()),
+        )
+
+    from connection import get_connection
+
+    if args.command != "notarize":
+        return get_connection(args.url), None, None
+    if args.keystore is not None:
+        signer = Signer.from_keystore(args.keystore, os.environ[args.password_env])
+    else:
+        signer = Signer(os.environ[args.private_key_env])
+    if args.account is not None and args.account.lower() != signer.address.lower():
+        # notarizations are sent from the account to itself, from another account they would be sent to that account instead
+        raise ValueError(
+            f"The account {args.account} does not belong to the key, whose account is {signer.address}."
+        )
+    return get_connection(args.url), signer.address, signer
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command in ["notarize", "verify"]:
+        subparser = subparsers.add_parser(command)
+        subparser.add_argument(
+            "paths", nargs="*", help="files, directories and glob patterns"
+        )
+        subparser.add_argument("--manifest", help="manifest of files and their hashes")
+        subparser.add_argument("--output", required=True, help="JSON or CSV file")
+        subparser.add_argument("--workers", type=int, help="number of hash processes")
+        node = subparser.add_mutually_exclusive_group(required=True)
+        node.add_argument("--url", help="URL of the node, e.g. the infura URL")
+        node.add_argument(
+            "--local", action="store_true", help="use a local in-process chain"
+        )
+        subparser.add_argument(
+            "--verbose", action="store_true", help="show the output of every call"
+        )
+        if command == "notarize":
+            subparser.add_argument(
+                "--mode", choices=["batch", "single"], default="batch"
+            )
+            subparser.add_argument("--account", help="defaults to the key's address")
+            subparser.add_argument(
+                "--private-key-env", default="NOTARIZATION_PRIVATE_KEY"
+            )
+            subparser.add_argument("--keystore", help="encrypted keystore file")
+            subparser.add_argument(
+                "--password-env", default="NOTARIZATION_KEYSTORE_PASSWORD"
+            )
+            subparser.add_argument("--time-limit", type=int, default=300)
+        else:
+            subparser.add_argument(
+                "--receipts", required=True, help="results file of notarize"
+            )
+    return parser.parse_args(args)
+
+
+def main(args=None, web3_connection=None, account=None, signer=None):
+    """Runs the command line interface.
+    Args:
+        args (list, optional): The command line arguments (defaults to None, i.e. ``sys.argv``).\n
+        web3_connection (Web3 object, optional): Connection to use instead of the one given by ``--url`` or ``--local``, e.g. to notarize and verify on the same local chain.\n
+        account (string, optional): Account to use together with web3_connection.\n
+        signer (Signer, optional): Signer to use together with web3_connection.
+
+    Returns:
+        int: The exit status, 0 if all files were notarized or verified, 1 if not and 2 if the run stopped on an error.
+    """
+    args = parse_args(args)
+    entries = hash_inputs(
+        args.paths,
+        manifest_path=args.manifest,
+        rehash=args.command == "verify",
+        max_workers=args.workers,
+    )
+    if not entries:
+        progress("No files found.")
+        return 1
+    if web3_connection is None:
+        web3_connection, account, signer = connect(args)
+    error = None
+    # the functions report every call on stdout, which is too much for thousands of files
+    with contextlib.ExitStack() as stack:
+        if not args.verbose:
+            devnull = stack.enter_context(open(os.devnull, "w"))
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+        try:
+            if args.command == "notarize":
+                notarize_files = (
+                    notarize_batch if args.mode == "batch" else notarize_single
+                )
+                results = notarize_files(
+                    web3_connection, account, signer, entries, args.time_limit
+                )
+                succeeded = all(result["status"] == "confirmed" for result in results)
+            else:
+                results = verify(web3_connection, entries, read_results(args.receipts))
+                succeeded = all(result["verified"] for result in results)
+        except RunAborted as e:
+            error, results = e.error, e.results
+        except (Exception, SystemExit) as e:
+            # some functions only print what went wrong (on the hidden stdout) and exit
+            error, results = e, []
+    if error is not None:
+        progress(f"Stopped on an error: {describe_error(error)}")
+    write_results(results, args.output, FIELDS[args.command])
+    progress(f"Results written to {args.output}.")
+    if error is not None:
+        return 2
+    return 0 if succeeded else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+""" Background confirmation tracking. ``send_transaction`` normally waits until the transaction is mined, which can take as long as a block takes (or longer).
+If a ``ConfirmationTracker`` is given to ``send_transaction`` instead, it returns the tx_hash as soon as the transaction was sent and the tracker watches for the receipt in a background thread. \n
+The tracker does not look up the receipt of every pending transaction over and over again. Instead, its background thread asks the node for the latest block number every ``poll_interval`` seconds
+and looks at the transactions of every new block, so the load on the node grows with the number of blocks, not with the number of pending transactions.
+Receipts are only looked up for transactions found in a block, and once for every newly tracked transaction, in case it was mined before.
+If more than ``max_catch_up_blocks`` blocks were missed (e.g. because the node was not reachable), the pending transactions are looked up directly instead. \n
+The status of every tracked transaction can be looked up by its tx_hash. It is either "pending", "mined" (in a block, but not ``confirmations`` blocks deep yet), "confirmed" (mined successfully and deep enough),
+"failed" (mined, but reverted) or "timeout" (not mined within the time limit). Before a transaction counts as confirmed with more than one confirmation, its receipt is looked up again,
+so that a transaction whose block was dropped by a chain reorganization is watched again instead.
+Optionally, a callback is called as soon as the status of a transaction is final, i.e. "confirmed", "failed" or "timeout".
+Transactions with a final status are forgotten after ``keep_resolved`` seconds, or earlier once more than ``max_resolved`` of them are kept, so that a long-running process does not keep every receipt. \n
+If a transaction is replaced with higher fees while it is pending (see ``send_transaction`` with a ``FeeBumpPolicy``), the tracker sends the replacements and watches all of them.
+It is still tracked under the hash it was sent with first, and its status tells which hash was finally mined.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from web3 import exceptions
+from web3 import Web3
+
+PENDING = "pending"
+MINED = "mined"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+TIMEOUT = "timeout"
+
+
+class ConfirmationTracker:
+    """Watches sent transactions for their receipts in a background thread, block by block.
+
+    Attributes:
+        web3_connection (Web3 object): The web3 connection used to look up blocks and receipts.\n
+        poll_interval (float): Number of seconds between two lookups of the latest block number (defaults to 1).\n
+        time_limit (float): Number of seconds after which a transaction that was not mined is given up on (defaults to 120).\n
+        confirmations (int): Number of blocks (including its own) a transaction has to be deep in the chain to be confirmed (defaults to 1, i.e. as soon as it is mined).\n
+        max_catch_up_blocks (int): Maximum number of missed blocks that are looked at one by one (defaults to 50).\n
+        keep_resolved (float): Number of seconds the status of a transaction is kept once it is final (defaults to 600).\n
+        max_resolved (int): Maximum number of transactions with a final status that are kept, the oldest are forgotten first (defaults to 10000).
+    """
+
+    def __init__(
+        self,
+        web3_connection,
+        poll_interval=1,
+        time_limit=120,
+        confirmations=1,
+        max_catch_up_blocks=50,
+        keep_resolved=600,
+        max_resolved=10000,
+    ):
+        self.web3_connection = web3_connection
+        self.poll_interval = poll_interval
+        self.time_limit = time_limit
+        self.confirmations = confirmations
+        self.max_catch_up_blocks = max_catch_up_blocks
+        self.keep_resolved = keep_resolved
+        self.max_resolved = max_resolved
+        self._transactions = {}
+        # tx_hashes of the transactions with a final status, in the order they were resolved, to the time they were resolved
+        self._resolved = OrderedDict()
+        # every sent tx_hash (including replacements) to the tx_hash it is tracked under
+        self._tracked_under = {}
+        self._last_block_number = None
+        self._lock = threading.Lock()
+        self._wake_up = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def track(
+        self,
+        tx_hash,
+        callback=None,
+        time_limit=None,
+        fee_bump=None,
+        fee_bump_interval=None,
+    ):
+        """Starts watching a transaction. Starts the background thread if it is not running yet.
+        Args:
+            tx_hash (string): The transaction hash.\n
+            callback (function, optional): Called as ``callback(tx_hash, status, tx_receipt)`` once the transaction is confirmed, failed or timed out. tx_receipt is None on timeout.
+            tx_hash is always the hash the transaction is tracked under, the receipt contains the hash that was mined.\n
+            time_limit (float, optional): Time limit for this transaction to be mined (defaults to None, i.e. the time limit of the tracker).\n
+            fee_bump (function, optional): Called without arguments every fee_bump_interval seconds while the transaction is pending. Sends a replacement and returns its hash, or None if there is none.\n
+            fee_bump_interval (float, optional): Number of seconds between two calls of fee_bump.
+        """
+        if time_limit is None:
+            time_limit = self.time_limit
+        now = time.monotonic()
+        with self._lock:
+            self._transactions[tx_hash] = {
+                "status": PENDING,
+                "tx_receipt": None,
+                "tx_hashes": [tx_hash],
+                "checked": False,
+                "deadline": now + time_limit,
+                "callback": callback,
+                "fee_bump": fee_bump,
+                "fee_bump_interval": fee_bump_interval,
+                "next_fee_bump": now + fee_bump_interval if fee_bump else None,
+                "done": threading.Event(),
+            }
+            self._tracked_under[tx_hash.lower()] = tx_hash
+            # tracked again, e.g. after it timed out
+            self._resolved.pop(tx_hash, None)
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wake_up.set()
+
+    def status(self, tx_hash):
+        """Looks up the status of a tracked transaction.
+        Args:
+            tx_hash (string): The transaction hash.
+
+        Returns:
+            dictionary: Contains the status, the transaction receipt (None as long as the transaction is not mined) and the "tx_hash" that was mined (or the last one sent, as long as none was mined).
+
+        Raises:
+            KeyError: If the transaction is not tracked, or was forgotten after its status became final (see ``keep_resolved`` and ``max_resolved``).
+        """
+        with self._lock:
+            if tx_hash not in self._transactions:
+                raise KeyError(f"Transaction {tx_hash} is not tracked.")
+            transaction = self._transactions[tx_hash]
+            if transaction["tx_receipt"] is not None:
+                final_tx_hash = Web3.toHex(transaction["tx_receipt"]["transactionHash"])
+            else:
+                final_tx_hash = transaction["tx_hashes"][-1]
+            return {
+                "status": transaction["status"],
+                "tx_receipt": transaction["tx_receipt"],
+                "tx_hash": final_tx_hash,
+            }
+
+    def wait(self, tx_hash, timeout=None):
+        """Blocks until the status of a tracked transaction is final.
+        Args:
+            tx_hash (string): The transaction hash.\n
+            timeout (float, optional): Maximum number of seconds to wait (defaults to None, i.e. no limit).
+
+        Returns:
+            dictionary: The status as returned by ``status``.
+        """
+        with self._lock:
+            done = self._transactions[tx_hash]["done"]
+        done.wait(timeout)
+        return self.status(tx_hash)
+
+    def stop(self):
+        """Stops the background thread. Transactions that are still pending stay pending."""
+        self._stopped = True
+        self._wake_up.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _in_status(self, status):
+        with self._lock:
+            return [
+                tx_hash
+                for tx_hash, transaction in self._transactions.items()
+                if transaction["status"] == status
+            ]
+
+    def _receipt(self, tx_hash):
+        try:
+            return self.web3_connection.eth.getTransactionReceipt(tx_hash)
+        except exceptions.TransactionNotFound:
+            return None
+
+    def _look_up_directly(self, tx_hash):
+        # the receipt of whichever of the sent transactions was mined
+        with self._lock:
+            tx_hashes = list(self._transactions[tx_hash]["tx_hashes"])
+        for sent_tx_hash in tx_hashes:
+            tx_receipt = self._receipt(sent_tx_hash)
+            if tx_receipt is not None:
+                self._mined(tx_hash, tx_receipt)
+                return
+
+    def _look_at_block(self, block_number):
+        block = self.web3_connection.eth.get_block(block_number)
+        for sent_tx_hash in block["transactions"]:
+            with self._lock:
+                tx_hash = self._tracked_under.get(Web3.toHex(sent_tx_hash))
+                if tx_hash is None or self._transactions[tx_hash]["status"] != PENDING:
+                    continue
+            tx_receipt = self._receipt(sent_tx_hash)
+            if tx_receipt is not None:
+                self._mined(tx_hash, tx_receipt)
+
+    def _mined(self, tx_hash, tx_receipt):
+        with self._lock:
+            self._transactions[tx_hash]["status"] = MINED
+            self._transactions[tx_hash]["tx_receipt"] = tx_receipt
+
+    def _confirm_if_deep_enough(self, tx_hash, latest_block_number):
+        with self._lock:
+            tx_receipt = self._transactions[tx_hash]["tx_receipt"]
+        if latest_block_number - tx_receipt["blockNumber"] + 1 < self.confirmations:
+            return
+        if self.confirmations > 1:
+            # the block may have been dropped by a chain reorganization in the meantime
+            current_receipt = self._receipt(tx_receipt["transactionHash"])
+            if current_receipt is None:
+                with self._lock:
+                    self._transactions[tx_hash]["status"] = PENDING
+                    self._transactions[tx_hash]["tx_receipt"] = None
+                    # it may be included again in a block that was scanned already
+                    self._transactions[tx_hash]["checked"] = False
+                return
+            if current_receipt["blockHash"] != tx_receipt["blockHash"]:
+                self._mined(tx_hash, current_receipt)
+                return
+        status = CONFIRMED if tx_receipt["status"] == 1 else FAILED
+        self._resolve(tx_hash, status, tx_receipt)
+
+    def _bump_fees_if_due(self, tx_hash):
+        with self._lock:
+            transaction = self._transactions[tx_hash]
+            if (
+                transaction["fee_bump"] is None
+                or time.monotonic() < transaction["next_fee_bump"]
+            ):
+                return
+            transaction["next_fee_bump"] = (
+                time.monotonic() + transaction["fee_bump_interval"]
+            )
+            fee_bump = transaction["fee_bump"]
+        try:
+            replacement_tx_hash = fee_bump()
+        except Exception as e:
+            print(f"Could not replace transaction {tx_hash}: {e}")
+            return
+        if replacement_tx_hash is not None:
+            with self._lock:
+                transaction["tx_hashes"].append(replacement_tx_hash)
+                self._tracked_under[replacement_tx_hash.lower()] = tx_hash
+
+    def _resolve(self, tx_hash, status, tx_receipt=None):
+        with self._lock:
+            transaction = self._transactions[tx_hash]
+            transaction["status"] = status
+            transaction["tx_receipt"] = tx_receipt
+            callback = transaction["callback"]
+            for sent_tx_hash in transaction["tx_hashes"]:
+                self._tracked_under.pop(sent_tx_hash.lower(), None)
+            # only the status is kept, not what is needed to watch the transaction
+            transaction["callback"] = None
+            transaction["fee_bump"] = None
+            self._resolved[tx_hash] = time.monotonic()
+        if callback is not None:
+            try:
+                callback(tx_hash, status, tx_receipt)
+            except Exception as e:
+                # a broken callback must not stop the tracking of other transactions
+                print(f"Callback for transaction {tx_hash} raised an error: {e}")
+        # only after the callback, so that waiting callers see its effects
+        transaction["done"].set()
+
+    def poll(self):
+        """Looks at the blocks that are new since the last round and updates the status of the tracked transactions.
+        Called by the background thread every ``poll_interval`` seconds, but can also be called directly while the thread is stopped.
+        """
+        latest_block_number = self.web3_connection.eth.block_number
+        with self._lock:
+            unchecked = [
+                tx_hash
+                for tx_hash, transaction in self._transactions.items()
+                if transaction["status"] == PENDING and not transaction["checked"]
+            ]
+        for tx_hash in unchecked:
+            # it may have been mined before it was tracked
+            self._look_up_directly(tx_hash)
+            with self._lock:
+                self._transactions[tx_hash]["checked"] = True
+        if self._last_block_number is None:
+            self._last_block_number = latest_block_number
+        elif latest_block_number - self._last_block_number > self.max_catch_up_blocks:
+            for tx_hash in self._in_status(PENDING):
+                self._look_up_directly(tx_hash)
+            self._last_block_number = latest_block_number
+        while self._last_block_number < latest_block_number:
+            self._look_at_block(self._last_block_number + 1)
+            self._last_block_number += 1
+        for tx_hash in self._in_status(MINED):
+            self._confirm_if_deep_enough(tx_hash, latest_block_number)
+        for tx_hash in self._in_status(PENDING):
+            with self._lock:
+                deadline = self._transactions[tx_hash]["deadline"]
+            if time.monotonic() > deadline:
+                self._resolve(tx_hash, TIMEOUT)
+            else:
+                self._bump_fees_if_due(tx_hash)
+        self._forget_resolved()
+
+    def _forget_resolved(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._resolved:
+                tx_hash, resolved_at = next(iter(self._resolved.items()))
+                if (
+                    len(self._resolved) <= self.max_resolved
+                    and now - resolved_at < self.keep_resolved
+                ):
+                    break
+                del self._resolved[tx_hash]
+                del self._transactions[tx_hash]
+
+    def _run(self):
+        while not self._stopped:
+            try:
+                self.poll()
+            except Exception as e:
+                # e.g. connection problems, try again in the next round
+                print(f"Could not look up new blocks: {e}")
+            self._wake_up.wait(self.poll_interval)
+            self._wake_up.clear()
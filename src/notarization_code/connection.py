@@ -0,0 +1,131 @@
+""" Reusable web3 connections. ``establish_infura_connection`` creates a new connection (and with it a new HTTP session) and checks it with an extra request every time it is called.
+When many notarizations are done in one process (e.g. one per participant in oTree), that is one TCP/TLS handshake and one request more than necessary per notarization. \n
+The class ``ConnectionManager`` keeps one connection per URL, backed by a keep-alive HTTP session pool, and reuses it. Its requests are recorded in the shared metrics (see ``instrumentation.py``). The check whether the connection works is only repeated after ``health_check_interval`` seconds.
+If the check fails or a caller reports a failure via ``reset``, the connection is thrown away and a fresh one is created the next time it is needed. \n
+``get_connection`` uses one ``ConnectionManager`` that is shared by the whole process. \n
+The class ``PooledHTTPProvider`` is the provider behind these connections. Unlike ``Web3.HTTPProvider``, it always sends its requests via its own session, no matter which thread makes the request.
+"""
+import threading
+import time
+
+import requests
+from instrumentation import instrument
+from requests.adapters import HTTPAdapter
+from utils import NoInfuraConnection
+from web3 import HTTPProvider
+from web3 import Web3
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """HTTP provider that sends all requests via one keep-alive session.
+
+    Attributes:
+        endpoint_uri (string): URL of the node.\n
+        session (requests.Session): The session all requests are sent with.
+    """
+
+    def __init__(self, endpoint_uri, session, request_kwargs=None):
+        super().__init__(endpoint_uri, request_kwargs=request_kwargs)
+        self.session = session
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        request_kwargs = self.get_request_kwargs()
+        request_kwargs.setdefault("timeout", 10)
+        response = self.session.post(
+            self.endpoint_uri, data=request_data, **request_kwargs
+        )
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+
+class ConnectionManager:
+    """Keeps one web3 connection per URL and reuses it. Can be shared between threads.
+
+    Attributes:
+        health_check_interval (float): Number of seconds a successful check of a connection stays valid (defaults to 30).\n
+        pool_maxsize (int): Maximum number of keep-alive HTTP connections per URL (defaults to 10).\n
+        provider_factory (function, optional): Creates the provider for a URL and a session. Defaults to ``PooledHTTPProvider``.
+    """
+
+    def __init__(
+        self, health_check_interval=30, pool_maxsize=10, provider_factory=None
+    ):
+        self.health_check_interval = health_check_interval
+        self.pool_maxsize = pool_maxsize
+        self.provider_factory = provider_factory
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, url):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if self.provider_factory is not None:
+            provider = self.provider_factory(url, session)
+        else:
+            provider = PooledHTTPProvider(url, session)
+        return {
+            "web3_connection": instrument(Web3(provider)),
+            "session": session,
+            "checked_at": None,
+        }
+
+    def get_connection(self, url):
+        """Returns the connection for a URL, creates it if there is none yet. Raises exception if the connection does not work.
+        Args:
+            url (string): URL of the node, e.g. the infura URL.
+
+        Returns:
+            web3_connection: A Web3 connection object that can be used in the following.
+        """
+        with self._lock:
+            connection = self._connections.get(url)
+            if connection is None:
+                connection = self._connect(url)
+                self._connections[url] = connection
+            checked_at = connection["checked_at"]
+            if (
+                checked_at is None
+                or time.monotonic() - checked_at > self.health_check_interval
+            ):
+                if connection["web3_connection"].isConnected() == False:
+                    self._close(url)
+                    raise NoInfuraConnection(infura_url=url)
+                connection["checked_at"] = time.monotonic()
+            return connection["web3_connection"]
+
+    def reset(self, url):
+        """Throws away the connection for a URL, e.g. after a request failed. The next ``get_connection`` creates a new one.
+        Args:
+            url (string): URL of the node.
+        """
+        with self._lock:
+            self._close(url)
+
+    def close_all(self):
+        """Closes all connections."""
+        with self._lock:
+            for url in list(self._connections):
+                self._close(url)
+
+    def _close(self, url):
+        connection = self._connections.pop(url, None)
+        if connection is not None:
+            connection["session"].close()
+
+
+# connection manager shared by the whole process
+connection_manager = ConnectionManager()
+
+
+def get_connection(url):
+    """Returns the shared, reusable connection for a URL. Raises exception if the connection does not work.
+    Args:
+        url (string): URL of the node, e.g. the infura URL.
+
+    Returns:
+        web3_connection: A Web3 connection object that can be used in the following.
+    """
+    return connection_manager.get_connection(url)
@@ -0,0 +1,212 @@
+""" Gas and fee estimation. A notarization transaction sends 0 ETH from an account back to itself, so it only needs the intrinsic gas of a transaction:
+21000 gas plus 4 gas per zero byte and 16 gas per non-zero byte of its data. Since EIP-7623 (Pectra), the gas limit also has to cover the floor cost of the data,
+21000 gas plus 10 gas per token, where a zero byte is one token and a non-zero byte four. ``intrinsic_gas`` computes the larger of both, there is no need for a fixed gas limit of 2000000. \n
+The class ``FeeEstimator`` estimates the fees of EIP-1559 (type 2) transactions from the fee history of the last ``history_blocks`` blocks.
+The priority fee (the tip for the miner) is the median of the tips paid at a percentile that depends on the selected speed: "slow", "standard" or "fast".
+The maximum fee is twice the base fee of the next block plus the priority fee, so the transaction stays includable even if the base fee rises for several blocks in a row.
+Only the actual base fee plus the priority fee is paid in the end. \n
+If the node does not support ``eth_feeHistory`` (like the local test chain), the base fee of the latest block and the node's suggested priority fee are used instead.
+An estimate is reused for ``refresh_interval`` seconds, so that sending many transactions does not mean asking the node for the fees every time.
+Transactions created without an estimator of their own share one estimator per connection, see ``shared_fee_estimator``. \n
+If a transaction is not mined in time nonetheless, it can be replaced by the same transaction (same nonce) with higher fees. A ``FeeBumpPolicy`` says when and by how much, and ``bump_fees`` builds the replacement.
+Nodes only accept a replacement if its fees are at least 10% higher, so by default they are raised by 12.5% each time, up to the cap of the policy.
+Once the cap does not leave room for 10% more, there is no further replacement, since the node would reject it as underpriced.
+"""
+import math
+import statistics
+import threading
+import time
+import weakref
+
+from web3 import Web3
+
+TX_BASE_GAS = 21000
+ZERO_BYTE_GAS = 4
+NONZERO_BYTE_GAS = 16
+# EIP-7623: floor cost per token of data, a non-zero byte counts as NONZERO_BYTE_TOKENS tokens
+FLOOR_GAS_PER_TOKEN = 10
+NONZERO_BYTE_TOKENS = 4
+
+# percentile of the tips paid in recent blocks, per speed
+SPEED_PERCENTILES = {"slow": 10, "standard": 50, "fast": 90}
+BASE_FEE_MULTIPLIER = 2
+
+
+def intrinsic_gas(data):
+    """Computes the gas a transaction without contract calls needs, given its data: the standard intrinsic gas or, if that is lower, the floor cost of the data (EIP-7623).
+    Args:
+        data (string or bytes): The data of the transaction, as hex string (e.g. from ``Web3.toHex(text=...)``) or bytes.
+
+    Returns:
+        int: The gas needed.
+    """
+    if isinstance(data, str):
+        data = Web3.toBytes(hexstr=data)
+    zero_bytes = data.count(0)
+    nonzero_bytes = len(data) - zero_bytes
+    standard_cost = (
+        TX_BASE_GAS + zero_bytes * ZERO_BYTE_GAS + nonzero_bytes * NONZERO_BYTE_GAS
+    )
+    floor_cost = TX_BASE_GAS + FLOOR_GAS_PER_TOKEN * (
+        zero_bytes + NONZERO_BYTE_TOKENS * nonzero_bytes
+    )
+    return max(standard_cost, floor_cost)
+
+
+class FeeEstimator:
+    """Estimates the fees of EIP-1559 transactions. Can be shared between threads.
+
+    Attributes:
+        web3_connection (Web3 object): The web3 connection used to look up the fees.\n
+        speed (string): "slow", "standard" or "fast" (defaults to "standard").\n
+        history_blocks (int): Number of recent blocks the fees are estimated from (defaults to 20).\n
+        refresh_interval (float): Number of seconds an estimate is reused (defaults to 12, about one block).
+    """
+
+    def __init__(
+        self, web3_connection, speed="standard", history_blocks=20, refresh_interval=12
+    ):
+        if speed not in SPEED_PERCENTILES:
+            raise ValueError(
+                f"Unknown speed {speed}, use one of {', '.join(SPEED_PERCENTILES)}."
+            )
+        self.web3_connection = web3_connection
+        self.speed = speed
+        self.history_blocks = history_blocks
+        self.refresh_interval = refresh_interval
+        self._chain_id = None
+        self._estimate = None
+        self._estimated_at = 0
+        self._lock = threading.Lock()
+
+    @property
+    def chain_id(self):
+        """The chain id of the connected chain, which type 2 transactions have to contain. Looked up only once."""
+        if self._chain_id is None:
+            self._chain_id = self.web3_connection.eth.chain_id
+        return self._chain_id
+
+    def _from_fee_history(self):
+        percentile = SPEED_PERCENTILES[self.speed]
+        fee_history = self.web3_connection.eth.fee_history(
+            self.history_blocks, "latest", [percentile]
+        )
+        # the last base fee is the one of the next block
+        base_fee = fee_history["baseFeePerGas"][-1]
+        tips = [reward[0] for reward in fee_history["reward"] if reward[0] > 0]
+        if tips:
+            priority_fee = int(statistics.median(tips))
+        else:
+            priority_fee = self.web3_connection.eth.max_priority_fee
+        return base_fee, priority_fee
+
+    def _from_latest_block(self):
+        base_fee = self.web3_connection.eth.get_block("latest")["baseFeePerGas"]
+        return base_fee, self.web3_connection.eth.max_priority_fee
+
+    def estimate(self):
+        """Estimates the fees of a transaction to be sent now.
+
+        Returns a dictionary containing:
+            maxFeePerGas (int, in wei): The highest fee per gas the transaction may cost.\n
+            maxPriorityFeePerGas (int, in wei): The tip per gas for the miner.
+        """
+        with self._lock:
+            if (
+                self._estimate is not None
+                and time.monotonic() - self._estimated_at < self.refresh_interval
+            ):
+                return dict(self._estimate)
+            try:
+                base_fee, priority_fee = self._from_fee_history()
+            except ValueError:
+                # e.g. "RPC Endpoint has not been implemented: eth_feeHistory"
+                base_fee, priority_fee = self._from_latest_block()
+            self._estimate = {
+                "maxFeePerGas": BASE_FEE_MULTIPLIER * base_fee + priority_fee,
+                "maxPriorityFeePerGas": priority_fee,
+            }
+            self._estimated_at = time.monotonic()
+            return dict(self._estimate)
+
+
+# estimators shared per connection, kept as long as the connection is
+_shared_estimators = weakref.WeakKeyDictionary()
+_shared_estimators_lock = threading.Lock()
+
+
+def shared_fee_estimator(web3_connection):
+    """Returns the fee estimator (with "standard" speed) shared by all transactions of a connection that are created without an estimator of their own,
+    so that their estimate and the chain id are reused instead of asking the node for every transaction.
+    Args:
+        web3_connection (Web3 object): The web3 connection.
+
+    Returns:
+        FeeEstimator: The estimator of the connection.
+    """
+    with _shared_estimators_lock:
+        fee_estimator = _shared_estimators.get(web3_connection)
+        if fee_estimator is None:
+            fee_estimator = FeeEstimator(web3_connection)
+            _shared_estimators[web3_connection] = fee_estimator
+        return fee_estimator
+
+
+class FeeBumpPolicy:
+    """Says when and how the fees of a transaction that is not mined yet are raised.
+
+    Attributes:
+        max_fee_per_gas (int, in wei): The highest (maximum) fee per gas a replacement may have.\n
+        wait (float): Number of seconds to wait for a transaction to be mined before it is replaced (defaults to 30).\n
+        multiplier (float): Factor by which the fees are raised each time, at least 1.1 (defaults to 1.125).\n
+        poll_interval (float): Number of seconds between two lookups of the receipts (defaults to 1).
+    """
+
+    def __init__(self, max_fee_per_gas, wait=30, multiplier=1.125, poll_interval=1):
+        if multiplier < 1.1:
+            raise ValueError(
+                "Nodes only accept replacements with at least 10% higher fees, the multiplier must be at least 1.1."
+            )
+        self.max_fee_per_gas = max_fee_per_gas
+        self.wait = wait
+        self.multiplier = multiplier
+        self.poll_interval = poll_interval
+
+
+def _raise_fee(fee, policy, cap):
+    return min(max(math.ceil(fee * policy.multiplier), fee + 1), cap)
+
+
+def _accepted_as_replacement(fee, raised_fee):
+    # nodes reject replacements whose fees are less than 10% higher
+    return raised_fee * 10 >= fee * 11
+
+
+def bump_fees(transaction, policy):
+    """Builds the replacement of a transaction, i.e. the same transaction with higher fees.
+    Args:
+        transaction (dictionary): The transaction to replace, either legacy (gasPrice) or EIP-1559 (maxFeePerGas and maxPriorityFeePerGas).\n
+        policy (FeeBumpPolicy): The policy that says by how much and up to which cap the fees are raised.
+
+    Returns:
+        dictionary: The replacement, or None if the cap does not allow fees that are at least 10% higher.
+    """
+    if "maxFeePerGas" in transaction:
+        max_fee = _raise_fee(
+            transaction["maxFeePerGas"], policy, policy.max_fee_per_gas
+        )
+        priority_fee = _raise_fee(transaction["maxPriorityFeePerGas"], policy, max_fee)
+        if not (
+            _accepted_as_replacement(transaction["maxFeePerGas"], max_fee)
+            and _accepted_as_replacement(
+                transaction["maxPriorityFeePerGas"], priority_fee
+            )
+        ):
+            return None
+        return dict(
+            transaction, maxFeePerGas=max_fee, maxPriorityFeePerGas=priority_fee
+        )
+    gas_price = _raise_fee(transaction["gasPrice"], policy, policy.max_fee_per_gas)
+    if not _accepted_as_replacement(transaction["gasPrice"], gas_price):
+        return None
+    return dict(transaction, gasPrice=gas_price)
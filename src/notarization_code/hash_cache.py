@@ -0,0 +1,176 @@
+""" Persistent cache of file hashes. Hashing a large archive again just to find out that nothing has changed takes as long as hashing it the first time. \n
+The class ``HashCache`` stores the hash of every file in a SQLite database, together with the path, size, modification time (in nanoseconds) and inode of the file.
+As long as none of these has changed, the stored hash is returned instead of reading the file again. Files modified within the last two seconds are not stored, because a change within the same tick of the file system clock would go unnoticed. \n
+The cache holds at most ``max_entries`` files, the ones used least recently are evicted first.
+When a stored hash is used, the time of use is only noted in memory. ``flush`` writes all noted times in one transaction; ``hash_files`` calls it once per call, and it also runs before evicting and on ``close``.
+So a warm cache costs no write per file. The database runs in WAL mode with ``synchronous=NORMAL``, which keeps the commits of ``put`` cheap as well.
+The cache is used by passing it to ``calculate_hash_of_file_via_path`` (or ``hash_files``). Passing ``paranoid=True`` there bypasses the lookup, the file is always read and the cache is updated.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+# files modified more recently than this (in seconds) are not cached
+RACY_WINDOW = 2
+
+# number of noted times of use from which on they are written without waiting for ``flush``
+MAX_PENDING_USES = 10000
+
+
+class HashCache:
+    """Stores file hashes in a SQLite database, keyed by path, size, modification time and inode. Can be shared between threads.
+
+    Attributes:
+        db_path (string): Path of the SQLite database (created if it does not exist).\n
+        max_entries (int, optional): Maximum number of files kept in the cache (defaults to 1000000). None means no limit.
+    """
+
+    def __init__(self, db_path, max_entries=1000000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        # time of last use per path, not yet written to the database
+        self._pending_uses = {}
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS file_hashes_last_used ON file_hashes (last_used)"
+        )
+        self._connection.commit()
+        self._size = self._connection.execute(
+            "SELECT COUNT(*) FROM file_hashes"
+        ).fetchone()[0]
+
+    def get(self, path):
+        """Returns the stored hash of a file if the file has not changed since.
+        Args:
+            path (string): Path of the file.
+
+        Returns:
+            string: The stored hash, or None if the file is not in the cache or has changed.
+        """
+        stat_result = os.stat(path)
+        key = os.path.realpath(path)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT hash FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+                (key, stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino),
+            ).fetchone()
+            if row is None:
+                return None
+            self._pending_uses[key] = time.time()
+            if len(self._pending_uses) >= MAX_PENDING_USES:
+                self._flush()
+        return row[0]
+
+    def flush(self):
+        """Writes the times the stored hashes were used to the database, all in one transaction."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending_uses:
+            return
+        with self._connection:
+            self._connection.executemany(
+                "UPDATE file_hashes SET last_used = ? WHERE path = ?",
+                [(last_used, key) for key, last_used in self._pending_uses.items()],
+            )
+        self._pending_uses = {}
+
+    def put(self, path, hash_value, stat_result):
+        """Stores the hash of a file.
+        Args:
+            path (string): Path of the file.\n
+            hash_value (string): The hash of the file.\n
+            stat_result (os.stat_result): Result of ``os.stat`` of the file, taken before the file was read.
+        """
+        now = time.time()
+        if stat_result.st_mtime_ns > (now - RACY_WINDOW) * 1e9:
+            return
+        # only store the hash if the file did not change while it was read
+        current = os.stat(path)
+        if (current.st_size, current.st_mtime_ns, current.st_ino) != (
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+            stat_result.st_ino,
+        ):
+            return
+        with self._lock:
+            inserted = self._connection.execute(
+                "INSERT OR IGNORE INTO file_hashes VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    os.path.realpath(path),
+                    stat_result.st_size,
+                    stat_result.st_mtime_ns,
+                    stat_result.st_ino,
+                    hash_value,
+                    now,
+                ),
+            ).rowcount
+            if inserted:
+                self._size += 1
+            else:
+                self._connection.execute(
+                    "UPDATE file_hashes SET size = ?, mtime_ns = ?, inode = ?, hash = ?, last_used = ? WHERE path = ?",
+                    (
+                        stat_result.st_size,
+                        stat_result.st_mtime_ns,
+                        stat_result.st_ino,
+                        hash_value,
+                        now,
+                        os.path.realpath(path),
+                    ),
+                )
+            self._connection.commit()
+            # evict in bulk, not for every single insert
+            if self.max_entries is not None and self._size > self.max_entries * 1.1:
+                self._evict()
+
+    def evict(self):
+        """Removes the least recently used files until the cache holds at most ``max_entries`` files."""
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        if self.max_entries is None:
+            return
+        # evict by the actual times of use
+        self._flush()
+        self._connection.execute(
+            "DELETE FROM file_hashes WHERE path NOT IN (SELECT path FROM file_hashes ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+        self._connection.commit()
+        self._size = self._connection.execute(
+            "SELECT COUNT(*) FROM file_hashes"
+        ).fetchone()[0]
+
+    def clear(self):
+        """Removes all files from the cache."""
+        with self._lock:
+            self._pending_uses = {}
+            self._connection.execute("DELETE FROM file_hashes")
+            self._connection.commit()
+            self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def close(self):
+        """Writes the pending times of use and closes the database."""
+        with self._lock:
+            self._flush()
+            self._connection.close()
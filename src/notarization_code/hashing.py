@@ -0,0 +1,81 @@
+""" Hashing of files. Only the standard library is needed, so importing this module is fast, no matter how long loading web3 takes.
+Hashing-only work (e.g. ``manifest.py``, or the ``verify`` step of the command line interface before it connects) therefore does not wait for web3 to load. \n
+The functions ``file_as_bytes``, ``calculate_hash_of_file_directly`` and ``calculate_hash_of_file_via_path`` are all for convenient hashing in other places.
+The hashing functions read the file in chunks of ``buffer_size`` bytes, so memory use does not grow with the size of the file.
+``calculate_hash_of_file_via_path`` can optionally use a ``HashCache`` (see ``hash_cache.py``) to skip files that have not changed since they were last hashed. """
+import hashlib
+import os
+import sys
+
+# number of bytes read at once when hashing files
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+def file_as_bytes(file):
+    """Reads file as binary.
+    Args:
+        file: File to read as binary
+
+    Returns:
+        binary file
+    """
+    with file:
+        return file.read()
+
+
+def calculate_hash_of_file_directly(file, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Calculate SHA256 checksum of binary file. The file is read in chunks, so it never has to fit into memory as a whole.
+    IMPORTANT: File needs to be encoded as binary.
+    Args:
+        file (binary): Binary file\n
+        buffer_size (int, optional): Number of bytes read at once (defaults to 1 MiB).
+
+    Returns:
+        calculated hash
+    """
+    hash_object = hashlib.sha256()
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with file:
+        # read into the same buffer over and over again instead of allocating a new one per chunk
+        while True:
+            size = file.readinto(buffer)
+            if not size:
+                break
+            hash_object.update(view[:size])
+    return hash_object.hexdigest()
+
+
+def calculate_hash_of_file_via_path(
+    path, buffer_size=DEFAULT_BUFFER_SIZE, cache=None, paranoid=False
+):
+    """Read file in as binary and apply hash.
+    If a hash cache is given and the file has not changed since it was last hashed, the stored hash is returned without reading the file.
+    Args:
+        path (string): Path to the file that is to be hashed\n
+        buffer_size (int, optional): Number of bytes read at once (defaults to 1 MiB).\n
+        cache (HashCache, optional): Cache of file hashes to look up and update (defaults to None).\n
+        paranoid (boolean, optional): If True, the file is always read, even if it is in the cache (defaults to False).
+
+    Returns:
+        string: calculated hash
+    """
+    try:
+        if cache is not None and not paranoid:
+            cached_hash = cache.get(path)
+            if cached_hash is not None:
+                return cached_hash
+        # the file is read in chunks anyway, no need for Python's own buffering
+        with open(path, "rb", buffering=0) as f:
+            stat_result = os.fstat(f.fileno())
+            calculated_hash = calculate_hash_of_file_directly(
+                f, buffer_size=buffer_size
+            )
+        if cache is not None:
+            cache.put(path, calculated_hash, stat_result)
+        return calculated_hash
+    except FileNotFoundError:
+        print(
+            f"No file exists under the specified path ({path}). Please make sure that you provide the full and correct path to the file."
+        )
+        sys.exit()
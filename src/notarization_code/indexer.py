@@ -0,0 +1,235 @@
+""" Finding notarizations by hash. To verify a file, ``verify_via_transaction`` needs the hash of the transaction it was notarized in. If that is lost, the transaction has to be found on the chain. \n
+The class ``ChainIndexer`` scans blocks for notarization transactions, i.e. transactions that one of the notarizing ``accounts`` sent to itself,
+and stores the hash each of them contains (compact or legacy text payload, see ``payload.py``) together with the transaction hash, the block number and the block timestamp in a SQLite database.
+After that, "is this file notarized, and when?" is answered by ``ChainIndexer.lookup`` or ``ChainIndexer.find_file`` from the local database. \n
+The blocks are fetched with JSON-RPC batch requests (see ``batch_rpc.py``), ``batch_size`` blocks per batch and up to ``max_workers`` batches at the same time.
+After every round of batches, the found notarizations and the number of the next block to scan (the checkpoint) are stored together, so an interrupted scan resumes where it stopped.
+There is a checkpoint per chain and account: a scan starts at the earliest checkpoint of its accounts, so an account that is added later is scanned from ``start_block`` on, and an index is not continued on another chain.
+Only blocks that are at least ``confirmations`` blocks deep are scanned, so that a chain reorganization cannot leave wrong entries behind the checkpoint.
+"""
+import sqlite3
+import threading
+
+from batch_rpc import batch_request
+from chunked_digest import ALGORITHM as CHUNKED_ALGORITHM
+from chunked_digest import chunked_digest
+from payload import decode_payload
+from hashing import calculate_hash_of_file_via_path
+from verification import format_timestamp
+from verification import get_input_data
+from verification import to_int
+from web3 import Web3
+
+
+class ChainIndexer:
+    """Scans blocks for notarization transactions and indexes them by the hash they contain. Can be shared between threads.
+
+    Attributes:
+        web3_connection (Web3 object): The web3 connection used to fetch the blocks.\n
+        accounts (list): The addresses of the notarizing accounts.\n
+        db_path (string): Path of the SQLite database (created if it does not exist).\n
+        start_block (int): The block to start scanning from if there is no checkpoint yet, e.g. the block the first notarization was sent in (defaults to 0).\n
+        confirmations (int): Number of blocks that need to be mined on top of a block before it is scanned (defaults to 12).\n
+        batch_size (int): Number of blocks fetched per batch request (defaults to 100).\n
+        max_workers (int): Maximum number of batch requests sent at the same time (defaults to 4).
+    """
+
+    def __init__(
+        self,
+        web3_connection,
+        accounts,
+        db_path,
+        start_block=0,
+        confirmations=12,
+        batch_size=100,
+        max_workers=4,
+    ):
+        self.web3_connection = web3_connection
+        self.accounts = {account.lower() for account in accounts}
+        self.db_path = db_path
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS notarizations (
+                tx_hash TEXT PRIMARY KEY,
+                hash_value TEXT NOT NULL,
+                algorithm TEXT,
+                account TEXT NOT NULL,
+                block_number INTEGER NOT NULL,
+                timestamp INTEGER NOT NULL
+            )"""
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS notarizations_hash_value ON notarizations (hash_value)"
+        )
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS checkpoints (
+                chain_id INTEGER NOT NULL,
+                account TEXT NOT NULL,
+                next_block INTEGER NOT NULL,
+                PRIMARY KEY (chain_id, account)
+            )"""
+        )
+        self._connection.commit()
+        self._chain_id = None
+
+    @property
+    def chain_id(self):
+        """The chain id of the connected chain. Looked up only once."""
+        if self._chain_id is None:
+            self._chain_id = self.web3_connection.eth.chain_id
+        return self._chain_id
+
+    @property
+    def next_block(self):
+        """The number of the next block to scan, i.e. the earliest checkpoint of the accounts on the connected chain (``start_block`` for an account without one)."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT account, next_block FROM checkpoints WHERE chain_id = ?",
+                (self.chain_id,),
+            ).fetchall()
+        checkpoints = dict(rows)
+        return min(
+            checkpoints.get(account, self.start_block) for account in self.accounts
+        )
+
+    def _notarizations(self, block):
+        # the notarization transactions of a block as rows of the database
+        rows = []
+        timestamp = to_int(block["timestamp"])
+        for tx in block["transactions"]:
+            sender = tx["from"].lower()
+            if sender not in self.accounts or (tx["to"] or "").lower() != sender:
+                continue
+            try:
+                payload = decode_payload(get_input_data(tx))
+            except (ValueError, UnicodeDecodeError):
+                # not a notarization, e.g. a plain transfer with other data
+                continue
+            tx_hash = (
+                tx["hash"] if isinstance(tx["hash"], str) else Web3.toHex(tx["hash"])
+            )
+            rows.append(
+                (
+                    tx_hash.lower(),
+                    payload["hash_value"].lower(),
+                    payload["algorithm"],
+                    sender,
+                    to_int(block["number"]),
+                    timestamp,
+                )
+            )
+        return rows
+
+    def scan(self, to_block=None):
+        """Scans the blocks from the checkpoint on.
+        Args:
+            to_block (int, optional): The last block to scan (defaults to None, i.e. the latest block that is at least ``confirmations`` blocks deep).
+
+        Returns:
+            int: The number of notarizations found.
+        """
+        last_final_block = self.web3_connection.eth.block_number - self.confirmations
+        if to_block is None or to_block > last_final_block:
+            to_block = last_final_block
+        found = 0
+        next_block = self.next_block
+        blocks_per_round = self.batch_size * self.max_workers
+        while next_block <= to_block:
+            block_numbers = range(
+                next_block, min(next_block + blocks_per_round, to_block + 1)
+            )
+            responses = batch_request(
+                self.web3_connection,
+                [
+                    ("eth_getBlockByNumber", [hex(block_number), True])
+                    for block_number in block_numbers
+                ],
+                batch_size=self.batch_size,
+                max_workers=self.max_workers,
+            )
+            rows = []
+            for block_number, response in zip(block_numbers, responses):
+                if response.get("result") is None:
+                    raise ValueError(
+                        f"Could not fetch block {block_number}: {response.get('error')}"
+                    )
+                rows += self._notarizations(response["result"])
+            next_block = block_numbers[-1] + 1
+            # the notarizations and the checkpoint are stored together, so a scan never skips or repeats blocks
+            with self._lock:
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO notarizations VALUES (?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                    # accounts whose checkpoint was further on keep it
+                    self._connection.executemany(
+                        "INSERT INTO checkpoints VALUES (?, ?, ?) ON CONFLICT (chain_id, account) DO UPDATE SET next_block = MAX(next_block, excluded.next_block)",
+                        [
+                            (self.chain_id, account, next_block)
+                            for account in self.accounts
+                        ],
+                    )
+            found += len(rows)
+        return found
+
+    def lookup(self, hash_value):
+        """Looks up the notarizations of a hash in the index.
+        Args:
+            hash_value (string): The hash as hex string (or a Merkle root, for batch notarizations).
+
+        Returns:
+            list: One dictionary per notarization, oldest first, with keys "tx_hash", "algorithm" (None for legacy text), "account", "block_number" and "timestamp" (in UTC, formatted like in ``verify_via_transaction``).
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT tx_hash, algorithm, account, block_number, timestamp FROM notarizations WHERE hash_value = ? ORDER BY block_number",
+                (hash_value.lower(),),
+            ).fetchall()
+        return [
+            {
+                "tx_hash": row[0],
+                "algorithm": row[1],
+                "account": row[2],
+                "block_number": row[3],
+                "timestamp": format_timestamp(row[4]),
+            }
+            for row in rows
+        ]
+
+    def find_file(self, path):
+        """Looks up the notarizations of a file in the index, by its flat SHA256 hash and by its chunked digest (with the default chunk size, see ``chunked_digest.py``).
+        Args:
+            path (string): Path to the file.
+
+        Returns:
+            list: The notarizations, oldest first, see ``lookup``.
+        """
+        notarizations = [
+            notarization
+            for notarization in self.lookup(calculate_hash_of_file_via_path(path))
+            if notarization["algorithm"] != CHUNKED_ALGORITHM
+        ] + [
+            notarization
+            for notarization in self.lookup(chunked_digest(path)["root"])
+            if notarization["algorithm"] == CHUNKED_ALGORITHM
+        ]
+        return sorted(
+            notarizations, key=lambda notarization: notarization["block_number"]
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM notarizations"
+            ).fetchone()[0]
+
+    def close(self):
+        """Closes the database."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,214 @@
+""" Instrumentation of RPC requests and notarization phases. Without it, the only way to see where the time of a notarization goes are the ``print`` calls. \n
+The web3 middleware ``instrumentation_middleware`` measures every JSON-RPC request a connection sends: per method, it counts the requests and the errors and sorts the latencies into a histogram (see ``LATENCY_BUCKETS``).
+``instrument`` adds it to a connection; the connections created by ``establish_infura_connection`` and ``get_connection`` are instrumented already.
+JSON-RPC batch requests (see ``batch_rpc.py``) are recorded under the method "batch", and each request in a batch under its own method, with the latency of the whole batch. \n
+Besides the requests, ``notarization.py`` and ``verification.py`` time the phases of their work with ``Metrics.phase``:
+"fees", "balance", "nonce", "sign", "send" and "confirm" for notarizations, "lookup" and "hash" for verifications.
+So it can be told whether the time is spent on the node, on signing or on waiting for the next block. \n
+Everything is recorded in the ``Metrics`` object ``metrics`` that is shared by the whole process. ``Metrics.stats`` returns the numbers as dictionary,
+``Metrics.prometheus_text`` in the text format of Prometheus, and ``serve_metrics`` serves that text via HTTP, so Prometheus can scrape it.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# upper bounds of the histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Metrics:
+    """Counts and times RPC requests and phases. Can be shared between threads.
+
+    Attributes:
+        buckets (tuple): Upper bounds of the histogram buckets, in seconds (defaults to ``LATENCY_BUCKETS``).
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {"rpc": {}, "phases": {}}
+
+    def _record(self, kind, name, seconds, error):
+        with self._lock:
+            series = self._series[kind].get(name)
+            if series is None:
+                series = {
+                    "count": 0,
+                    "errors": 0,
+                    "sum": 0.0,
+                    "buckets": [0] * len(self.buckets),
+                }
+                self._series[kind][name] = series
+            series["count"] += 1
+            series["errors"] += int(error)
+            series["sum"] += seconds
+            for i, upper_bound in enumerate(self.buckets):
+                if seconds <= upper_bound:
+                    series["buckets"][i] += 1
+                    break
+
+    def record_rpc(self, method, seconds, error=False):
+        """Records a JSON-RPC request.
+        Args:
+            method (string): The JSON-RPC method, e.g. "eth_getBalance".\n
+            seconds (float): How long the request took.\n
+            error (boolean, optional): Whether the request failed (defaults to False).
+        """
+        self._record("rpc", method, seconds, error)
+
+    def record_phase(self, phase, seconds, error=False):
+        """Records a phase, see ``phase``.
+        Args:
+            phase (string): Name of the phase, e.g. "sign".\n
+            seconds (float): How long the phase took.\n
+            error (boolean, optional): Whether the phase failed (defaults to False).
+        """
+        self._record("phases", phase, seconds, error)
+
+    @contextmanager
+    def phase(self, phase):
+        """Context manager that times the code within it as a phase, e.g. ``with metrics.phase("sign"):``. An exception counts as error and is raised again.
+        Args:
+            phase (string): Name of the phase.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.record_phase(phase, time.perf_counter() - started, error=True)
+            raise
+        self.record_phase(phase, time.perf_counter() - started)
+
+    def stats(self):
+        """Returns everything recorded so far.
+
+        Returns:
+            dictionary: Under "rpc" per method and under "phases" per phase a dictionary with the "count", the number of "errors", the "sum" and "mean" of the latencies (in seconds)
+            and the cumulative "histogram" (number of latencies up to each bucket bound, the last bound is "+Inf").
+        """
+        with self._lock:
+            stats = {}
+            for kind, all_series in self._series.items():
+                stats[kind] = {}
+                for name, series in all_series.items():
+                    histogram = {}
+                    cumulative = 0
+                    for upper_bound, count in zip(self.buckets, series["buckets"]):
+                        cumulative += count
+                        histogram[str(upper_bound)] = cumulative
+                    histogram["+Inf"] = series["count"]
+                    stats[kind][name] = {
+                        "count": series["count"],
+                        "errors": series["errors"],
+                        "sum": series["sum"],
+                        "mean": series["sum"] / series["count"],
+                        "histogram": histogram,
+                    }
+            return stats
+
+    def prometheus_text(self):
+        """Returns everything recorded so far in the text format of Prometheus.
+
+        Returns:
+            string: The metrics "notarization_rpc_duration_seconds" and "notarization_phase_duration_seconds" (histograms)
+            and "notarization_rpc_errors_total" and "notarization_phase_errors_total" (counters).
+        """
+        lines = []
+        stats = self.stats()
+        for kind, metric, label in [
+            ("rpc", "notarization_rpc", "method"),
+            ("phases", "notarization_phase", "phase"),
+        ]:
+            lines.append(f"# TYPE {metric}_duration_seconds histogram")
+            for name, series in stats[kind].items():
+                for upper_bound, count in series["histogram"].items():
+                    lines.append(
+                        f'{metric}_duration_seconds_bucket{{{label}="{name}",le="{upper_bound}"}} {count}'
+                    )
+                lines.append(
+                    f'{metric}_duration_seconds_sum{{{label}="{name}"}} {series["sum"]}'
+                )
+                lines.append(
+                    f'{metric}_duration_seconds_count{{{label}="{name}"}} {series["count"]}'
+                )
+            lines.append(f"# TYPE {metric}_errors_total counter")
+            for name, series in stats[kind].items():
+                lines.append(
+                    f'{metric}_errors_total{{{label}="{name}"}} {series["errors"]}'
+                )
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Forgets everything recorded so far."""
+        with self._lock:
+            self._series = {"rpc": {}, "phases": {}}
+
+
+# metrics shared by the whole process
+metrics = Metrics()
+
+
+def instrumentation_middleware(make_request, web3_connection):
+    """Web3 middleware that records every request in ``metrics``. A request counts as error if it raises or the node responds with an error."""
+
+    def middleware(method, params):
+        started = time.perf_counter()
+        try:
+            response = make_request(method, params)
+        except BaseException:
+            metrics.record_rpc(method, time.perf_counter() - started, error=True)
+            raise
+        metrics.record_rpc(
+            method,
+            time.perf_counter() - started,
+            error=isinstance(response, dict) and "error" in response,
+        )
+        return response
+
+    return middleware
+
+
+def instrument(web3_connection):
+    """Adds ``instrumentation_middleware`` to a connection, unless it has been added already.
+    It is added as the innermost middleware, so that the latencies are those of the node and not of the formatting of requests and responses.
+    Args:
+        web3_connection (Web3 object): The connection to instrument.
+
+    Returns:
+        web3_connection: The same connection.
+    """
+    if "instrumentation" not in web3_connection.middleware_onion:
+        web3_connection.middleware_onion.inject(
+            instrumentation_middleware, name="instrumentation", layer=0
+        )
+    return web3_connection
+
+
+def serve_metrics(port=9100, host="", metrics=metrics):
+    """Serves ``Metrics.prometheus_text`` via HTTP in a background thread, so Prometheus can scrape it.
+    Args:
+        port (int, optional): The port to listen on (defaults to 9100).\n
+        host (string, optional): The address to listen on (defaults to "", i.e. all addresses).\n
+        metrics (Metrics, optional): The metrics to serve (defaults to the metrics shared by the process).
+
+    Returns:
+        ThreadingHTTPServer: The server, stop it with ``shutdown``.
+    """
+    from http.server import BaseHTTPRequestHandler
+    from http.server import ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
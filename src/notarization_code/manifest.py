@@ -0,0 +1,174 @@
+""" Hashing of many files at once, e.g. a whole directory of experiment output. \n
+The function ``collect_files`` turns a list of files, directories and glob patterns into a sorted list of files. ``hash_files`` hashes them in parallel on several processes.
+The largest files are started first, so that a single huge file does not hold up the batch at the end. \n
+With ``write_manifest`` the result is written to a manifest file with one line per file (hash, size in bytes and path), sorted by path. The manifest is deterministic, so it can itself be hashed and notarized instead of every single file.
+``read_manifest`` reads such a manifest back in. ``hash_directory`` does all of this in one go.
+With a ``HashCache`` (see ``hash_cache.py``), only files that are new or have changed since the last run are read.
+"""
+import glob
+import os
+from concurrent.futures import as_completed
+from concurrent.futures import ProcessPoolExecutor
+
+from hashing import calculate_hash_of_file_directly
+from hashing import calculate_hash_of_file_via_path
+from hashing import DEFAULT_BUFFER_SIZE
+
+
+def collect_files(paths):
+    """Collects all files given as paths, directories (searched recursively) or glob patterns.
+    Args:
+        paths (list): Paths of files or directories and glob patterns (e.g. "data/**/*.csv").
+
+    Returns:
+        list: Sorted list of the paths of all files found, without duplicates.
+    """
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, filenames in os.walk(path):
+                files.update(os.path.join(directory, name) for name in filenames)
+        elif os.path.isfile(path):
+            files.add(path)
+        else:
+            files.update(
+                match
+                for match in glob.glob(path, recursive=True)
+                if os.path.isfile(match)
+            )
+    return sorted(files)
+
+
+def _hash_file(path, buffer_size):
+    # runs in the worker processes
+    with open(path, "rb", buffering=0) as f:
+        return calculate_hash_of_file_directly(f, buffer_size=buffer_size)
+
+
+def hash_files(
+    paths,
+    max_workers=None,
+    buffer_size=DEFAULT_BUFFER_SIZE,
+    cache=None,
+    paranoid=False,
+    callback=None,
+):
+    """Hashes many files in parallel.
+    Args:
+        paths (list): Paths of the files to hash.\n
+        max_workers (int, optional): Number of processes to use (defaults to None, i.e. the number of CPUs). With 1, the files are hashed in this process.\n
+        buffer_size (int, optional): Number of bytes read at once (defaults to 1 MiB).\n
+        cache (HashCache, optional): Cache of file hashes, only files that are not in the cache or have changed are read (defaults to None).\n
+        paranoid (boolean, optional): If True, all files are read, even if they are in the cache (defaults to False).\n
+        callback (function, optional): Called as ``callback(path)`` as soon as a file is hashed or found in the cache, e.g. to report progress (defaults to None).
+
+    Returns:
+        list: One dictionary per file with keys "path", "size" and "hash", sorted by path.
+    """
+    stat_results = {path: os.stat(path) for path in paths}
+    sizes = {path: stat_result.st_size for path, stat_result in stat_results.items()}
+    hashes = {}
+    if cache is not None and not paranoid:
+        for path in sizes:
+            cached_hash = cache.get(path)
+            if cached_hash is not None:
+                hashes[path] = cached_hash
+                if callback is not None:
+                    callback(path)
+    # largest files first, so that no huge file is started last
+    by_size = sorted(
+        (path for path in sizes if path not in hashes),
+        key=lambda path: (-sizes[path], path),
+    )
+    new_hashes = {}
+    if max_workers == 1 or len(by_size) < 2:
+        for path in by_size:
+            new_hashes[path] = _hash_file(path, buffer_size)
+            if callback is not None:
+                callback(path)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_hash_file, path, buffer_size): path for path in by_size
+            }
+            for future in as_completed(futures):
+                new_hashes[futures[future]] = future.result()
+                if callback is not None:
+                    callback(futures[future])
+    if cache is not None:
+        for path, hash_value in new_hashes.items():
+            cache.put(path, hash_value, stat_results[path])
+        # the times of use of all cache hits in one transaction
+        cache.flush()
+    hashes.update(new_hashes)
+    return [
+        {"path": path, "size": sizes[path], "hash": hashes[path]}
+        for path in sorted(sizes)
+    ]
+
+
+def write_manifest(entries, manifest_path, root=None):
+    """Writes a manifest of hashed files. Each line contains hash, size and path, separated by two spaces, sorted by path.
+    Args:
+        entries (list): Dictionaries with keys "path", "size" and "hash", as returned by ``hash_files``.\n
+        manifest_path (string): Path of the manifest file to write.\n
+        root (string, optional): If given, paths are written relative to this directory.
+
+    Returns:
+        string: The hash of the manifest file, which can be notarized.
+    """
+    lines = []
+    for entry in entries:
+        path = entry["path"]
+        if root is not None:
+            path = os.path.relpath(path, root)
+        # same separator on every operating system
+        path = path.replace(os.sep, "/")
+        lines.append(f"{entry['hash']}  {entry['size']}  {path}\n")
+    with open(manifest_path, "w", encoding="utf-8", newline="\n") as f:
+        f.writelines(sorted(lines, key=lambda line: line.split("  ", 2)[2]))
+    return calculate_hash_of_file_via_path(manifest_path)
+
+
+def read_manifest(manifest_path):
+    """Reads a manifest written by ``write_manifest``.
+    Args:
+        manifest_path (string): Path of the manifest file.
+
+    Returns:
+        list: One dictionary per file with keys "path", "size" and "hash".
+    """
+    entries = []
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line == "":
+                continue
+            hash_value, size, path = line.split("  ", 2)
+            entries.append({"path": path, "size": int(size), "hash": hash_value})
+    return entries
+
+
+def hash_directory(
+    paths, manifest_path=None, root=None, max_workers=None, cache=None, paranoid=False
+):
+    """Hashes all files in directories and glob patterns and optionally writes a manifest.
+    Args:
+        paths (list): Paths of files or directories and glob patterns.\n
+        manifest_path (string, optional): If given, a manifest is written to this path.\n
+        root (string, optional): If given, paths in the manifest are relative to this directory.\n
+        max_workers (int, optional): Number of processes to use (defaults to None, i.e. the number of CPUs).\n
+        cache (HashCache, optional): Cache of file hashes (defaults to None).\n
+        paranoid (boolean, optional): If True, all files are read, even if they are in the cache (defaults to False).
+
+    Returns a dictionary containing:
+        entries (list): One dictionary per file with keys "path", "size" and "hash".\n
+        manifest_hash (only if a manifest was written, string): The hash of the manifest file.
+    """
+    entries = hash_files(
+        collect_files(paths), max_workers=max_workers, cache=cache, paranoid=paranoid
+    )
+    result = {"entries": entries}
+    if manifest_path is not None:
+        result["manifest_hash"] = write_manifest(entries, manifest_path, root=root)
+    return result
@@ -0,0 +1,126 @@
+""" Merkle trees for batched notarization. Instead of sending one transaction per hash, many hashes can be collected into a Merkle tree of which only the root is stored on the blockchain. \n
+The function ``build_merkle_tree`` builds the tree from a list of leaves (usually hash values), ``merkle_root`` returns the root that is to be notarized and ``merkle_proof`` returns the inclusion proof for a single leaf.
+With ``verify_merkle_proof`` one can check that a leaf is part of a tree given only the leaf, its proof and the root, i.e. without knowing any of the other leaves. \n
+Leaves and inner nodes are hashed with different prefixes so that an inner node can never be passed off as a leaf. If a level has an odd number of nodes, the last node is carried up to the next level unchanged.
+"""
+import hashlib
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def hash_leaf(leaf):
+    """Hashes a single leaf of the tree.
+    Args:
+        leaf (string or bytes): The leaf, strings are encoded as UTF-8.
+
+    Returns:
+        bytes: SHA256 hash of the prefixed leaf.
+    """
+    if isinstance(leaf, str):
+        leaf = leaf.encode()
+    return hashlib.sha256(LEAF_PREFIX + leaf).digest()
+
+
+def hash_node(left, right):
+    """Hashes two child nodes into their parent node.
+    Args:
+        left (bytes): The left child.\n
+        right (bytes): The right child.
+
+    Returns:
+        bytes: SHA256 hash of the prefixed, concatenated children.
+    """
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def build_merkle_tree(leaves):
+    """Builds a Merkle tree from a list of leaves.
+    Args:
+        leaves (list): The leaves (strings or bytes), e.g. the hashes of the files to notarize. The order is kept.
+
+    Returns:
+        list: The levels of the tree, starting with the hashed leaves and ending with a list that only contains the root.
+    """
+    if len(leaves) == 0:
+        raise ValueError("A Merkle tree needs at least one leaf.")
+    levels = [[hash_leaf(leaf) for leaf in leaves]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        next_level = [
+            hash_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)
+        ]
+        # odd number of nodes: carry the last one up unchanged
+        if len(level) % 2 == 1:
+            next_level.append(level[-1])
+        levels.append(next_level)
+    return levels
+
+
+def merkle_root(tree):
+    """Returns the root of a tree built with ``build_merkle_tree``.
+    Args:
+        tree (list): The levels of the tree.
+
+    Returns:
+        string: The root as hex string (same format as the hash of a file).
+    """
+    return tree[-1][0].hex()
+
+
+def merkle_proof(tree, index):
+    """Creates the inclusion proof for a single leaf.
+    Args:
+        tree (list): The levels of the tree.\n
+        index (int): Position of the leaf in the list the tree was built from.
+
+    Returns:
+        list: The proof, a list of [side, sibling_hash] pairs from the bottom of the tree to the top. Side is either "left" or "right" and tells on which side the sibling is.
+    """
+    if index < 0 or index >= len(tree[0]):
+        raise IndexError(f"There is no leaf with index {index} in this tree.")
+    proof = []
+    for level in tree[:-1]:
+        sibling_index = index ^ 1
+        if sibling_index < len(level):
+            side = "left" if sibling_index < index else "right"
+            proof.append([side, level[sibling_index].hex()])
+        index //= 2
+    return proof
+
+
+def compute_root_from_proof(leaf, proof):
+    """Recomputes the root from a leaf and its inclusion proof.
+    Args:
+        leaf (string or bytes): The leaf.\n
+        proof (list): The proof as returned by ``merkle_proof``.
+
+    Returns:
+        string: The resulting root as hex string.
+    """
+    node = hash_leaf(leaf)
+    for side, sibling in proof:
+        sibling = bytes.fromhex(sibling)
+        if side == "left":
+            node = hash_node(sibling, node)
+        elif side == "right":
+            node = hash_node(node, sibling)
+        else:
+            raise ValueError(f"Invalid side in Merkle proof: {side}")
+    return node.hex()
+
+
+def verify_merkle_proof(leaf, proof, root):
+    """Checks whether a leaf is part of the tree with the given root.
+    Args:
+        leaf (string or bytes): The leaf.\n
+        proof (list): The proof as returned by ``merkle_proof``.\n
+        root (string): The root as hex string, e.g. as stored in a notarization transaction.
+
+    Returns:
+        boolean: True if the proof leads to the root, otherwise False.
+    """
+    try:
+        return compute_root_from_proof(leaf, proof) == root.lower()
+    except ValueError:
+        return False
@@ -0,0 +1,72 @@
+""" Local nonce management. By default, ``create_notarization_transaction`` asks the node for the nonce of every transaction.
+As the node only knows transactions it has already received, a second transaction cannot be built before the first one was sent (otherwise both would get the same nonce). \n
+The class ``NonceManager`` keeps track of the next nonce of each account in the process instead. It syncs once from the node (counting pending transactions) and afterwards hands out nonces locally, so many transactions can be built, signed and sent back-to-back.
+If a nonce gets lost (e.g. because sending failed) or the node rejects a nonce as too low, the account is resynced from the node. \n
+The function ``is_nonce_error`` checks whether an error raised when sending a transaction was caused by an outdated nonce.
+"""
+import threading
+
+# parts of the error messages nodes (and the local test chain) return for outdated nonces
+NONCE_ERROR_MESSAGES = ("nonce too low", "invalid transaction nonce")
+
+
+def is_nonce_error(error):
+    """Checks whether an error raised when sending a transaction was caused by an outdated nonce.
+    Args:
+        error (Exception): The error raised by ``sendRawTransaction``.
+
+    Returns:
+        boolean: True if the nonce of the transaction was too low.
+    """
+    message = str(error).lower()
+    return any(nonce_message in message for nonce_message in NONCE_ERROR_MESSAGES)
+
+
+class NonceManager:
+    """Hands out nonces for one or more accounts without asking the node for every transaction.
+    Can be shared between threads.
+
+    Attributes:
+        web3_connection (Web3 object): The web3 connection used to sync nonces from the node.
+    """
+
+    def __init__(self, web3_connection):
+        self.web3_connection = web3_connection
+        self._next_nonces = {}
+        self._lock = threading.Lock()
+
+    def sync(self, account):
+        """Gets the nonce of an account from the node, including transactions that are still pending.
+        Args:
+            account (string): The address of the account.
+
+        Returns:
+            int: The next nonce of the account.
+        """
+        nonce = self.web3_connection.eth.getTransactionCount(account, "pending")
+        with self._lock:
+            self._next_nonces[account] = nonce
+        return nonce
+
+    def resync(self, account):
+        """Forgets the local nonce of an account, so it is synced from the node again when the next nonce is needed.
+        Args:
+            account (string): The address of the account.
+        """
+        with self._lock:
+            self._next_nonces.pop(account, None)
+
+    def next_nonce(self, account):
+        """Hands out the next nonce of an account. Only the first call (and the first call after ``resync``) asks the node.
+        Args:
+            account (string): The address of the account.
+
+        Returns:
+            int: The nonce to use for the next transaction of the account.
+        """
+        with self._lock:
+            nonce = self._next_nonces.get(account)
+            if nonce is None:
+                nonce = self.web3_connection.eth.getTransactionCount(account, "pending")
+            self._next_nonces[account] = nonce + 1
+        return nonce
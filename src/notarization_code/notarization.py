@@ -2,14 +2,29 @@
 The former initializes the notarization to send, with the letter it is sent to the blockchain.
 The ``account_balance_sufficient`` function is just a little piece of helper code to check if the balance of the account is sufficient to send the transaction.
 Because the transaction is over 0 ETH sent from one account back to itself, the only cost is gas. Therefore, sufficient balance is determined by gas price and gas limit.
-The exception class ``AccountBalanceInsufficient`` is there to give nice feedback in case the balance is insufficient.
+By default, the gas limit is exactly the gas the transaction needs and the fees are estimated from recent blocks (see ``fees.py``).
+The exception class ``AccountBalanceInsufficient`` is there to give nice feedback in case the balance is insufficient. \n
+Both functions optionally take a ``NonceManager`` (see ``nonce_manager.py``), so that nonces are handed out locally and transactions can be sent back-to-back.
+With a ``ConfirmationTracker`` (see ``confirmation.py``), ``send_transaction`` does not wait for the transaction to be mined.
+With a ``BalanceLedger`` (see ``balance_ledger.py``), the balance is checked against a locally kept balance instead of asking the node before every transaction.
+With a ``FeeBumpPolicy`` (see ``fees.py``), ``send_transaction`` replaces a transaction that is not mined in time by the same transaction with higher fees (``replace_transaction``).
+Instead of a private key, a ``Signer`` (see ``signer.py``) can be given to sign with, which parses and checks the key only once.
+The phases "fees", "balance", "nonce", "sign", "send" and "confirm" are timed in the shared metrics (see ``instrumentation.py``). \n
+To notarize many hashes at once, ``create_batch_notarization_transaction`` builds a Merkle tree over them and only stores its root in a single transaction. It returns an inclusion proof for every hash that is needed for verification later on.
+The root is stored as compact payload (see ``payload.py``). To store a single hash compactly as well, pass ``encode_payload(hash_value)`` as ``string_to_save``. \n
+web3 and eth_account are only imported once a transaction is created or signed, so importing this module (e.g. when an oTree worker starts) is fast.
 
 """
 import binascii
 import sys
+import time
 
-from web3 import exceptions
-from web3 import Web3
+from instrumentation import metrics
+from merkle import build_merkle_tree
+from merkle import merkle_proof
+from merkle import merkle_root
+from nonce_manager import is_nonce_error
+from payload import encode_payload
 
 
 class AccountBalanceInsufficient(Exception):
@@ -40,75 +55,181 @@ def create_notarization_transaction(
     web3_connection,
     account,
     string_to_save,
-    gas_limit=2000000,
-    gas_price=50,
+    gas_limit=None,
+    gas_price=None,
+    nonce_manager=None,
+    balance_ledger=None,
+    fee_estimator=None,
 ):
     """Creates the transaction to be sent to blockchain, but does not send it yet.
 
     The function will get the current nonce (number of transactions sent so far) for the specified account and build a dictionary that details the transaction to be signed and sent.
+    If a nonce manager is given, the nonce is taken from it instead of asking the node, so several transactions can be created before the first one is mined.
 
     The transaction will just sent 0 ETH from the specified account back to itself. In this transaction, the string_to_save will be stored.
+    Unless a gas limit is given, the transaction gets exactly the gas it needs. Unless a gas price is given, it is an EIP-1559 transaction with fees estimated from recent blocks (see ``fees.py``).
 
     Args:
         web3_connection (Web3 object): The web3 connection, initialized via ' Web3(Web3.HTTPProvider( ))'\n
         account (string): The address of the account to be sent and received from.\n
-        string_to_save (string): The string to save.\n
-        gas_limit (int, optional): Gas limit, not focus of proof-of-concept implementation. Will be multiplied with gas price later (defaults to 2000000).\n
-        gas_price (int, in gwei, optional): The gas price specified in transaction to be sent (defaults to 50).
+        string_to_save (string or bytes): The string to save. Bytes (e.g. a compact payload from ``encode_payload``) are stored as they are.\n
+        gas_limit (int, optional): Gas limit (defaults to None, i.e. the intrinsic gas of the transaction).\n
+        gas_price (int, in gwei, optional): The gas price of a legacy transaction (defaults to None, i.e. an EIP-1559 transaction is created).\n
+        nonce_manager (NonceManager, optional): Local nonce manager to take the nonce from (defaults to None, i.e. the node is asked).\n
+        balance_ledger (BalanceLedger, optional): Local balance ledger the fee of the transaction is reserved in (defaults to None, i.e. the node is asked for the balance).\n
+        fee_estimator (FeeEstimator, optional): Estimator of the EIP-1559 fees, only used without gas price (defaults to None, i.e. the one shared by the connection, see ``shared_fee_estimator``).
 
 
     Returns:
         tx (dictionary): Details for the transaction to be sent. Can be signed and sent to Ethereum Blockchain.
 
     """
-    # check if balance of account is sufficient to execute transaction
-    check_balance = account_balance_sufficient(
+    from fees import intrinsic_gas
+    from fees import shared_fee_estimator
+    from web3 import Web3
+
+    if isinstance(string_to_save, bytes):
+        data = Web3.toHex(string_to_save)
+    else:
+        data = Web3.toHex(text=string_to_save)
+    if gas_limit is None:
+        gas_limit = intrinsic_gas(data)
+    if gas_price is not None:
+        fees = {"gasPrice": Web3.toWei(gas_price, "gwei")}
+        max_gas_price = gas_price
+    else:
+        if fee_estimator is None:
+            fee_estimator = shared_fee_estimator(web3_connection)
+        with metrics.phase("fees"):
+            fees = fee_estimator.estimate()
+            fees.update({"type": 2, "chainId": fee_estimator.chain_id})
+        max_gas_price = Web3.fromWei(fees["maxFeePerGas"], "gwei")
+
+    if balance_ledger is None:
+        # check if balance of account is sufficient to execute transaction
+        with metrics.phase("balance"):
+            check_balance = account_balance_sufficient(
+                web3_connection=web3_connection,
+                account=account,
+                gas_limit=gas_limit,
+                gas_price=max_gas_price,
+            )
+        if check_balance["sufficient"] == False:
+            raise AccountBalanceInsufficient(
+                balance=check_balance["balance"], min_amount=gas_limit * max_gas_price
+            )
+
+    # get nonce for account
+    with metrics.phase("nonce"):
+        if nonce_manager is not None:
+            nonce = nonce_manager.next_nonce(account)
+        else:
+            nonce = web3_connection.eth.getTransactionCount(account)
+
+    # build transaction
+    tx = {
+        "nonce": nonce,
+        "to": account,
+        "value": Web3.toWei(0, "ether"),  # sending just 0
+        "gas": gas_limit,
+        **fees,
+        "data": data,
+    }
+
+    if balance_ledger is not None:
+        # the reservation is kept by nonce, so the nonce is needed first
+        try:
+            with metrics.phase("balance"):
+                balance_ledger.reserve(account, nonce, worst_case_fee(tx))
+        except AccountBalanceInsufficient:
+            if nonce_manager is not None:
+                # the nonce is not used, hand it out again
+                nonce_manager.resync(account)
+            raise
+    return tx
+
+
+def worst_case_fee(transaction):
+    """Returns the highest fee a transaction can cost, i.e. its gas limit times its (maximum) gas price.
+    Args:
+        transaction (dictionary): A dictionary specifying the details of the transaction.
+
+    Returns:
+        int: The fee in wei.
+    """
+    return transaction["gas"] * transaction.get(
+        "maxFeePerGas", transaction.get("gasPrice", 0)
+    )
+
+
+def create_batch_notarization_transaction(
+    web3_connection,
+    account,
+    hashes_to_save,
+    gas_limit=None,
+    gas_price=None,
+    nonce_manager=None,
+    balance_ledger=None,
+    fee_estimator=None,
+):
+    """Creates one transaction that notarizes many hashes at once, but does not send it yet.
+
+    A Merkle tree is built over the hashes and only its root is stored in the transaction. For every hash, an inclusion proof is returned.
+    The proof has to be kept together with the hash (and the transaction hash) to be able to verify it later via ``verify_via_transaction``.
+
+    Args:
+        web3_connection (Web3 object): The web3 connection, initialized via ' Web3(Web3.HTTPProvider( ))'\n
+        account (string): The address of the account to be sent and received from.\n
+        hashes_to_save (list): The hashes (strings) to notarize. The order is kept.\n
+        gas_limit (int, optional): Gas limit (defaults to None, i.e. the intrinsic gas of the transaction).\n
+        gas_price (int, in gwei, optional): The gas price of a legacy transaction (defaults to None, i.e. an EIP-1559 transaction is created).\n
+        nonce_manager (NonceManager, optional): Local nonce manager to take the nonce from (defaults to None).\n
+        balance_ledger (BalanceLedger, optional): Local balance ledger the fee of the transaction is reserved in (defaults to None).\n
+        fee_estimator (FeeEstimator, optional): Estimator of the EIP-1559 fees (defaults to None).
+
+    Returns a dictionary containing:
+        tx (dictionary): Details for the transaction to be sent. Can be signed and sent to Ethereum Blockchain.\n
+        merkle_root (string): The root stored in the transaction.\n
+        proofs (list): One dictionary per hash with keys "hash" and "proof", in the order of hashes_to_save.
+    """
+    tree = build_merkle_tree(hashes_to_save)
+    root = merkle_root(tree)
+    tx = create_notarization_transaction(
         web3_connection=web3_connection,
         account=account,
+        string_to_save=encode_payload(root, "merkle-sha256"),
         gas_limit=gas_limit,
         gas_price=gas_price,
+        nonce_manager=nonce_manager,
+        balance_ledger=balance_ledger,
+        fee_estimator=fee_estimator,
     )
-
-    if check_balance["sufficient"] == False:
-        raise AccountBalanceInsufficient(
-            balance=check_balance["balance"], min_amount=gas_limit * gas_price
-        )
-    else:
-        # get nonce for account
-        nonce = web3_connection.eth.getTransactionCount(account)
-
-        # build transaction
-        tx = {
-            "nonce": nonce,
-            "to": account,
-            "value": Web3.toWei(0, "ether"),  # sending just 0
-            "gas": gas_limit,
-            "gasPrice": Web3.toWei(gas_price, "gwei"),
-            "data": Web3.toHex(text=string_to_save),
-        }
-        return tx
+    proofs = [
+        {"hash": hash_to_save, "proof": merkle_proof(tree, index)}
+        for index, hash_to_save in enumerate(hashes_to_save)
+    ]
+    return {"tx": tx, "merkle_root": root, "proofs": proofs}
 
 
-def send_transaction(web3_connection, transaction, private_key, time_limit=120):
-    """Signs a transaction with private key and sends it to the blockchain via the specified web3_connection.
+def sign_transaction(web3_connection, transaction, private_key):
+    """Signs a transaction with private key. Exits with a message if the private key is invalid.
     IMPORTANT: Signing requires private key, which needs to be treated carefully!
 
     Args:
         web3_connection (Web3 object): The web3 connection, initialized via ' Web3(Web3.HTTPProvider( ))'\n
         transaction (dictionary): A dictionary specifying the details of the transaction.\n
-        private_key (string): The private key for the account specified in transaction.\n
-        time_limit (int): Number of seconds to wait for confirmation of mining of transaction.\n
+        private_key (string or Signer): The private key for the account specified in transaction, or a ``Signer`` (see ``signer.py``).\n
 
-    Returns a dictionary containing:
-        tx_hash (string): The transaction hash of the signed transaction.\n
-        tx_receipt (only if successful, dictionary): The transaction receipt of a mined transaction.
+    Returns:
+        signed_tx: The signed transaction, containing the transaction hash and the raw transaction to send.
     """
+    from signer import Signer
 
-    # sign transaction, check for invalid private key
+    if isinstance(private_key, Signer):
+        # the key was checked already when the signer was created
+        return private_key.sign(transaction)
     try:
-        signed_tx = web3_connection.eth.account.signTransaction(
-            transaction, private_key
-        )
+        return web3_connection.eth.account.signTransaction(transaction, private_key)
     except binascii.Error:
         print(
             "The private key you specified is invalid. It may only contain [0-9a-fA-F] characters. Execution aborted."
@@ -124,31 +245,155 @@ def send_transaction(web3_connection, transaction, private_key, time_limit=120):
             sys.exit()
         else:
             raise
-    # get transaction hash
-    tx_hash = Web3.toHex(signed_tx[1])
 
-    # send transaction, check for incorrect private key
-    try:
-        web3_connection.eth.sendRawTransaction(signed_tx.rawTransaction)
-    except ValueError as e:
-        # this is a weird error that is thrown when you have incorrect pk.
-        # Provide better message.
-        if "'code': -32000" in str(e):
-            print("The private key you specified is incorrect. Execution aborted.")
-            sys.exit()
-        else:
-            raise
+
+def send_transaction(
+    web3_connection,
+    transaction,
+    private_key,
+    time_limit=120,
+    nonce_manager=None,
+    confirmation_tracker=None,
+    callback=None,
+    balance_ledger=None,
+    fee_bump_policy=None,
+    signed_callback=None,
+):
+    """Signs a transaction with private key and sends it to the blockchain via the specified web3_connection.
+    IMPORTANT: Signing requires private key, which needs to be treated carefully!
+
+    If a confirmation tracker is given, the function does not wait for the transaction to be mined. It returns the tx_hash right after sending and the tracker watches for the receipt in the background.
+    If a nonce manager is given and the node rejects the nonce as too low, the nonce manager is synced again and the transaction is sent once more with a new nonce.
+
+    Args:
+        web3_connection (Web3 object): The web3 connection, initialized via ' Web3(Web3.HTTPProvider( ))'\n
+        transaction (dictionary): A dictionary specifying the details of the transaction.\n
+        private_key (string or Signer): The private key for the account specified in transaction, or a ``Signer`` (see ``signer.py``).\n
+        time_limit (int): Number of seconds to wait for confirmation of mining of transaction.\n
+        nonce_manager (NonceManager, optional): The nonce manager the nonce of the transaction was taken from.\n
+        confirmation_tracker (ConfirmationTracker, optional): Tracker that watches for the receipt in the background instead of waiting for it.\n
+        callback (function, optional): Only used with a confirmation tracker. Called as ``callback(tx_hash, status, tx_receipt)`` once the transaction is confirmed, failed or timed out.\n
+        balance_ledger (BalanceLedger, optional): The balance ledger the fee of the transaction was reserved in. The reservation is settled once the transaction is mined and released if it could not be sent.\n
+        fee_bump_policy (FeeBumpPolicy, optional): If given, a transaction that is not mined within the wait of the policy is replaced by the same transaction with higher fees, repeatedly up to the fee cap (defaults to None, i.e. it is never replaced).\n
+        signed_callback (function, optional): Called as ``signed_callback(tx_hash, raw_transaction)`` after the transaction (or a replacement with higher fees) is signed and before it is sent, e.g. to record the signed transaction so that it can be sent again instead of signing a new one (defaults to None).\n
+
+    Returns a dictionary containing:
+        tx_hash (string): The transaction hash of the signed transaction. If it was replaced, the hash of the replacement that was mined (or of the last one sent, if none was mined in time).\n
+        tx_receipt (only if successful and not tracked in the background, dictionary): The transaction receipt of a mined transaction.\n
+        replaced_tx_hashes (only with fee bump policy and not tracked in the background, list): The hashes of the transactions that were replaced.
+    """
+    from web3 import Web3
+
+    # notarization transactions are sent from the account back to itself
+    account = transaction.get("from", transaction["to"])
+    for attempt in range(2):
+        # sign transaction, check for invalid private key
+        with metrics.phase("sign"):
+            signed_tx = sign_transaction(web3_connection, transaction, private_key)
+        # get transaction hash
+        tx_hash = Web3.toHex(signed_tx[1])
+        if signed_callback is not None:
+            signed_callback(tx_hash, bytes(signed_tx.rawTransaction))
+
+        # send transaction, check for outdated nonce and incorrect private key
+        try:
+            with metrics.phase("send"):
+                web3_connection.eth.sendRawTransaction(signed_tx.rawTransaction)
+            break
+        except Exception as e:
+            if balance_ledger is not None:
+                balance_ledger.release(account, transaction["nonce"])
+            if nonce_manager is not None:
+                # the local nonce is outdated or now has a gap, sync it again
+                nonce_manager.resync(account)
+                if is_nonce_error(e) and attempt == 0:
+                    transaction = dict(
+                        transaction, nonce=nonce_manager.next_nonce(account)
+                    )
+                    if balance_ledger is not None:
+                        balance_ledger.reserve(
+                            account, transaction["nonce"], worst_case_fee(transaction)
+                        )
+                    continue
+            # this is a weird error that is thrown when you have incorrect pk.
+            # Provide better message.
+            if (
+                isinstance(e, ValueError)
+                and "'code': -32000" in str(e)
+                and not is_nonce_error(e)
+            ):
+                print("The private key you specified is incorrect. Execution aborted.")
+                sys.exit()
+            else:
+                raise
+
+    # do not wait, the tracker looks for the receipt in the background
+    if confirmation_tracker is not None:
+        callback = _timing_callback(callback)
+        if balance_ledger is not None:
+            callback = _settling_callback(
+                balance_ledger, account, transaction["nonce"], callback
+            )
+        fee_bump = None
+        if fee_bump_policy is not None:
+            fee_bump = _fee_bumper(
+                web3_connection,
+                transaction,
+                private_key,
+                fee_bump_policy,
+                balance_ledger,
+                signed_callback,
+            )
+        confirmation_tracker.track(
+            tx_hash,
+            callback=callback,
+            time_limit=time_limit,
+            fee_bump=fee_bump,
+            fee_bump_interval=fee_bump_policy.wait if fee_bump_policy else None,
+        )
+        print("Transaction sent. Transaction Hash: ", tx_hash)
+        return {
+            "tx_hash": tx_hash,
+        }
 
     print(
         "Sending Transaction. Waiting for Confirmation. Time Limit: ",
         time_limit,
         " seconds.",
     )
+    if fee_bump_policy is not None:
+        started = time.perf_counter()
+        result = _wait_with_fee_bumps(
+            web3_connection,
+            tx_hash,
+            _fee_bumper(
+                web3_connection,
+                transaction,
+                private_key,
+                fee_bump_policy,
+                balance_ledger,
+                signed_callback,
+            ),
+            fee_bump_policy,
+            time_limit,
+            balance_ledger,
+            account,
+            transaction["nonce"],
+        )
+        metrics.record_phase(
+            "confirm",
+            time.perf_counter() - started,
+            error="tx_receipt" not in result,
+        )
+        return result
     # wait for confirmation
     try:
-        tx_receipt = web3_connection.eth.waitForTransactionReceipt(
-            transaction_hash=tx_hash, timeout=time_limit
-        )
+        with metrics.phase("confirm"):
+            tx_receipt = web3_connection.eth.waitForTransactionReceipt(
+                transaction_hash=tx_hash, timeout=time_limit
+            )
+        if balance_ledger is not None:
+            balance_ledger.settle(account, transaction["nonce"])
         print("Transaction successfully sent! Transaction Hash: ", tx_hash)
         return {"tx_hash": tx_hash, "tx_receipt": tx_receipt}
     except:
@@ -161,6 +406,161 @@ def send_transaction(web3_connection, transaction, private_key, time_limit=120):
         }
 
 
+def replace_transaction(
+    web3_connection,
+    transaction,
+    private_key,
+    fee_bump_policy,
+    balance_ledger=None,
+    signed_callback=None,
+):
+    """Replaces a transaction that was sent but not mined yet by the same transaction with higher fees.
+
+    Args:
+        web3_connection (Web3 object): The web3 connection, initialized via ' Web3(Web3.HTTPProvider( ))'\n
+        transaction (dictionary): The transaction to replace, as it was sent.\n
+        private_key (string or Signer): The private key for the account specified in transaction, or a ``Signer`` (see ``signer.py``).\n
+        fee_bump_policy (FeeBumpPolicy): The policy that says by how much and up to which cap the fees are raised.\n
+        balance_ledger (BalanceLedger, optional): The balance ledger the fee of the transaction was reserved in. The reservation is raised to the fee of the replacement.\n
+        signed_callback (function, optional): Called as ``signed_callback(tx_hash, raw_transaction)`` after the replacement is signed and before it is sent, see ``send_transaction``.
+
+    Returns a dictionary containing (or None if the fees are already at the cap, the balance does not cover the higher fees or the node did not accept the replacement, e.g. because the transaction was mined in the meantime):
+        transaction (dictionary): The replacement.\n
+        tx_hash (string): The transaction hash of the replacement.
+    """
+    from fees import bump_fees
+    from web3 import Web3
+
+    replacement = bump_fees(transaction, fee_bump_policy)
+    if replacement is None:
+        return None
+    account = transaction.get("from", transaction["to"])
+    if balance_ledger is not None:
+        try:
+            balance_ledger.reserve(
+                account, transaction["nonce"], worst_case_fee(replacement)
+            )
+        except AccountBalanceInsufficient:
+            return None
+    signed_tx = sign_transaction(web3_connection, replacement, private_key)
+    tx_hash = Web3.toHex(signed_tx[1])
+    if signed_callback is not None:
+        signed_callback(tx_hash, bytes(signed_tx.rawTransaction))
+    try:
+        web3_connection.eth.sendRawTransaction(signed_tx.rawTransaction)
+    except Exception as e:
+        if balance_ledger is not None:
+            balance_ledger.reserve(
+                account, transaction["nonce"], worst_case_fee(transaction)
+            )
+        print(f"Could not replace transaction: {e}")
+        return None
+    print("Transaction replaced with higher fees. Transaction Hash: ", tx_hash)
+    return {"transaction": replacement, "tx_hash": tx_hash}
+
+
+def _fee_bumper(
+    web3_connection,
+    transaction,
+    private_key,
+    fee_bump_policy,
+    balance_ledger,
+    signed_callback,
+):
+    # replaces the latest replacement each time it is called, returns the new tx_hash or None
+    latest = {"transaction": transaction}
+
+    def fee_bump():
+        replacement = replace_transaction(
+            web3_connection,
+            latest["transaction"],
+            private_key,
+            fee_bump_policy,
+            balance_ledger,
+            signed_callback,
+        )
+        if replacement is None:
+            return None
+        latest["transaction"] = replacement["transaction"]
+        return replacement["tx_hash"]
+
+    return fee_bump
+
+
+def _wait_with_fee_bumps(
+    web3_connection,
+    tx_hash,
+    fee_bump,
+    fee_bump_policy,
+    time_limit,
+    balance_ledger,
+    account,
+    nonce,
+):
+    from web3 import exceptions
+
+    tx_hashes = [tx_hash]
+    deadline = time.monotonic() + time_limit
+    next_fee_bump = time.monotonic() + fee_bump_policy.wait
+    while True:
+        # any of the sent transactions may be the one that is mined
+        for sent_tx_hash in tx_hashes:
+            try:
+                tx_receipt = web3_connection.eth.getTransactionReceipt(sent_tx_hash)
+            except exceptions.TransactionNotFound:
+                continue
+            if balance_ledger is not None:
+                balance_ledger.settle(account, nonce)
+            print("Transaction successfully sent! Transaction Hash: ", sent_tx_hash)
+            return {
+                "tx_hash": sent_tx_hash,
+                "tx_receipt": tx_receipt,
+                "replaced_tx_hashes": [
+                    replaced for replaced in tx_hashes if replaced != sent_tx_hash
+                ],
+            }
+        now = time.monotonic()
+        if now >= deadline:
+            print(
+                "Transaction has not been mined yet. Please check for the following Transaction Hash: ",
+                tx_hashes[-1],
+            )
+            return {"tx_hash": tx_hashes[-1], "replaced_tx_hashes": tx_hashes[:-1]}
+        if now >= next_fee_bump:
+            replacement_tx_hash = fee_bump()
+            if replacement_tx_hash is not None:
+                tx_hashes.append(replacement_tx_hash)
+            next_fee_bump = now + fee_bump_policy.wait
+        time.sleep(min(fee_bump_policy.poll_interval, deadline - now))
+
+
+def _timing_callback(callback):
+    # records how long the transaction took to be confirmed in the background, then calls the original callback
+    started = time.perf_counter()
+
+    def time_and_call(tx_hash, status, tx_receipt):
+        metrics.record_phase(
+            "confirm",
+            time.perf_counter() - started,
+            error=tx_receipt is None or tx_receipt["status"] != 1,
+        )
+        if callback is not None:
+            callback(tx_hash, status, tx_receipt)
+
+    return time_and_call
+
+
+def _settling_callback(balance_ledger, account, nonce, callback):
+    # settles the reservation once the transaction is mined, then calls the original callback
+    def settle_and_call(tx_hash, status, tx_receipt):
+        if tx_receipt is not None:
+            balance_ledger.settle(account, nonce)
+        if callback is not None:
+            callback(tx_hash, status, tx_receipt)
+
+    return settle_and_call
+
+
 def account_balance_sufficient(
     web3_connection, account, gas_limit=2000000, gas_price=50
 ):
@@ -175,6 +575,9 @@ def account_balance_sufficient(
     Returns:
         dictionary: Contains bolean indicating whether balance is sufficient and the balance.
     """
+    from web3 import exceptions
+    from web3 import Web3
+
     try:
         balance_wei = web3_connection.eth.getBalance(account)
         balance_gwei = Web3.fromWei(balance_wei, "gwei")
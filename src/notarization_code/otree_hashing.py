@@ -0,0 +1,150 @@
+""" Payload strings and hashes of oTree data. Within oTree, ``Player.notarize_player_input`` notarizes a payload string built from the participant code, the start time and the decisions of a participant, followed by the hash of that string.
+To verify an oTree data export, the same strings have to be rebuilt from the exported data. \n
+The function ``build_payload`` builds the payload of a single participant and is used by the oTree app itself, so both always use the same format.
+``build_payloads`` builds the payloads of all rows of a DataFrame from whole columns (instead of applying a function to every row), ``hash_payloads`` hashes them in chunks on several processes
+and ``build_verification_strings`` puts both together into the strings that were stored on the blockchain. \n
+The oTree app only stores a placeholder as tx_hash while a notarization waits in its outbox (see ``outbox.py``), ``resolve_tx_hashes`` looks up the hashes of the sent transactions by the exported outbox ids.
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def build_payload(participant_code, time_started, decisions):
+    """Builds the payload string of a single participant, as notarized in the oTree app.
+    Args:
+        participant_code (string): The participant code.\n
+        time_started (string): The time the participant started.\n
+        decisions (list): The decisions made.
+
+    Returns:
+        string: The payload.
+    """
+    return (
+        "participant_code: "
+        + str(participant_code)
+        + " time_started: "
+        + str(time_started)
+        + " decisions: "
+        + str(decisions)
+    )
+
+
+def _decision_repr(value):
+    # same representation as an element of str(list) in the oTree app, where missing decisions are None
+    if isinstance(value, float) and value != value:
+        return "None"
+    if hasattr(value, "item"):
+        # numpy scalar to plain Python value
+        value = value.item()
+    return repr(value)
+
+
+def _column_reprs(column):
+    # decisions usually take only a few different values, so each of them is converted only once
+    reprs = {value: _decision_repr(value) for value in column.unique()}
+    return column.map(reprs).tolist()
+
+
+def build_payloads(
+    data, participant_code_column, time_started_column, input_data_columns
+):
+    """Builds the payload strings of all rows of a DataFrame (e.g. an oTree data export).
+    Args:
+        data (DataFrame): The data.\n
+        participant_code_column (string): Name of the column with the participant codes.\n
+        time_started_column (string): Name of the column with the start times.\n
+        input_data_columns (list): Names of the columns with the decisions, in the order they were notarized.
+
+    Returns:
+        list: The payload of every row.
+    """
+    decisions = zip(*[_column_reprs(data[column]) for column in input_data_columns])
+    return [
+        f"participant_code: {participant_code} time_started: {time_started} decisions: [{', '.join(row_decisions)}]"
+        for participant_code, time_started, row_decisions in zip(
+            data[participant_code_column].astype(str).tolist(),
+            data[time_started_column].astype(str).tolist(),
+            decisions,
+        )
+    ]
+
+
+def _hash_chunk(payloads):
+    # runs in the worker processes
+    return [hashlib.sha256(payload.encode()).hexdigest() for payload in payloads]
+
+
+def hash_payloads(payloads, max_workers=None, chunk_size=100000):
+    """Calculates the SHA256 hash of many strings, in chunks on several processes.
+    Args:
+        payloads (list): The strings to hash.\n
+        max_workers (int, optional): Number of processes to use (defaults to None, i.e. the number of CPUs). With 1, everything is hashed in this process.\n
+        chunk_size (int, optional): Number of strings hashed per chunk (defaults to 100000). Fewer strings are hashed in this process.
+
+    Returns:
+        list: The hashes, in the order of the strings.
+    """
+    payloads = list(payloads)
+    if max_workers is None:
+        max_workers = os.cpu_count()
+    if max_workers == 1 or len(payloads) <= chunk_size:
+        return _hash_chunk(payloads)
+    chunks = [payloads[i : i + chunk_size] for i in range(0, len(payloads), chunk_size)]
+    hashes = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for chunk_hashes in executor.map(_hash_chunk, chunks):
+            hashes.extend(chunk_hashes)
+    return hashes
+
+
+def build_verification_strings(
+    data,
+    participant_code_column,
+    time_started_column,
+    input_data_columns,
+    max_workers=None,
+):
+    """Builds the strings that were stored on the blockchain for all rows of a DataFrame, i.e. the payload followed by " - " and its hash.
+    Args:
+        data (DataFrame): The data.\n
+        participant_code_column (string): Name of the column with the participant codes.\n
+        time_started_column (string): Name of the column with the start times.\n
+        input_data_columns (list): Names of the columns with the decisions, in the order they were notarized.\n
+        max_workers (int, optional): Number of processes to use for hashing (defaults to None, i.e. the number of CPUs).
+
+    Returns:
+        list: The verification string of every row.
+    """
+    payloads = build_payloads(
+        data, participant_code_column, time_started_column, input_data_columns
+    )
+    hashes = hash_payloads(payloads, max_workers=max_workers)
+    return [
+        payload + " - " + payload_hash
+        for payload, payload_hash in zip(payloads, hashes)
+    ]
+
+
+def resolve_tx_hashes(data, tx_hash_column, outbox_id_column, outbox):
+    """Looks up the tx_hashes of the notarizations of all rows of a DataFrame in the outbox they were sent from.
+    Rows without outbox id, or whose notarization was not sent yet, keep the tx_hash of the data.
+    Args:
+        data (DataFrame): The data.\n
+        tx_hash_column (string): Name of the column with the tx_hashes stored by the oTree app.\n
+        outbox_id_column (string): Name of the column with the outbox ids.\n
+        outbox (Outbox): The outbox of the oTree app.
+
+    Returns:
+        list: The tx_hash of every row.
+    """
+    tx_hashes = []
+    for tx_hash, outbox_id in zip(
+        data[tx_hash_column].tolist(), data[outbox_id_column].tolist()
+    ):
+        # missing ids are NaN in the export
+        item = outbox.get(int(outbox_id)) if outbox_id == outbox_id else None
+        if item is not None and item["tx_hash"] is not None:
+            tx_hash = item["tx_hash"]
+        tx_hashes.append(tx_hash)
+    return tx_hashes
@@ -0,0 +1,473 @@
+""" Crash-safe notarization outbox. Sending a notarization can fail, e.g. if the node is not reachable for a moment, and whatever was being sent when the process stops is lost. \n
+The class ``Outbox`` first records every payload to notarize in a SQLite database (in WAL mode, so recording is cheap and readers do not block the writer) and then keeps track of it as it moves through the states:
+"queued" (waiting to be sent), "sending" (taken by a worker), "signed" (the transaction was signed and is recorded with its tx_hash, but may not have been sent yet), "sent" (the transaction was sent),
+"confirmed" (the transaction was mined) and "failed" (given up after ``max_attempts`` attempts).
+A failed attempt is retried after ``retry_delay`` seconds, twice as long after every further attempt. A payload whose transaction was not signed yet is put back to "queued".
+Once a transaction was signed, it may have reached the node even if sending it failed or timed out, so the payload is never signed again with a new nonce (which could notarize it twice):
+the recorded transactions (the signed one and its replacements with higher fees, if any) are looked up and, if none of them was mined, the latest one is sent again. Only if its nonce was used by another transaction, the payload is queued again. \n
+The class ``OutboxWorker`` drains the outbox in the background: every ``interval`` seconds it sends up to ``batch_size`` due payloads via a ``SenderPool`` (see ``sender_pool.py``) and records the outcome.
+When a worker starts, ``OutboxWorker.recover`` picks up what a stopped process left behind: payloads that were taken but not signed are queued again
+and signed or sent transactions are looked up and sent again if they were not mined, then watched until they are mined.
+"""
+import sqlite3
+import threading
+import time
+
+from confirmation import CONFIRMED
+from confirmation import FAILED
+from nonce_manager import is_nonce_error
+from web3 import exceptions
+
+QUEUED = "queued"
+SENDING = "sending"
+SIGNED = "signed"
+SENT = "sent"
+
+# errors of nodes that already have the transaction that is sent again
+KNOWN_TRANSACTION_MESSAGES = ("already known", "known transaction", "already imported")
+
+COLUMNS = (
+    "id, payload, state, tx_hash, attempts, last_error, raw_transaction, tx_hashes"
+)
+
+
+class Outbox:
+    """Records payloads to notarize in a SQLite database and tracks their state. Can be shared between threads.
+
+    Attributes:
+        db_path (string): Path of the SQLite database (created if it does not exist).\n
+        max_attempts (int): Number of attempts after which a payload is given up on (defaults to 5).\n
+        retry_delay (float): Number of seconds to wait before the first retry, doubled for every further one (defaults to 30).
+    """
+
+    def __init__(self, db_path, max_attempts=5, retry_delay=30):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # with WAL, NORMAL does not lose committed items on a crash of the process, only on a power loss
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload BLOB NOT NULL,
+                state TEXT NOT NULL,
+                tx_hash TEXT,
+                attempts INTEGER NOT NULL,
+                last_error TEXT,
+                next_attempt_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                raw_transaction BLOB,
+                tx_hashes TEXT
+            )"""
+        )
+        columns = [
+            row[1]
+            for row in self._connection.execute("PRAGMA table_info(outbox)").fetchall()
+        ]
+        # outboxes created before signed transactions were recorded
+        for column, column_type in [("raw_transaction", "BLOB"), ("tx_hashes", "TEXT")]:
+            if column not in columns:
+                self._connection.execute(
+                    f"ALTER TABLE outbox ADD COLUMN {column} {column_type}"
+                )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state, next_attempt_at)"
+        )
+        self._connection.commit()
+
+    def _execute(self, query, parameters=()):
+        with self._lock:
+            cursor = self._connection.execute(query, parameters)
+            self._connection.commit()
+            return cursor
+
+    def _fetch(self, query, parameters=()):
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        return [
+            {
+                "id": row[0],
+                "payload": row[1],
+                "state": row[2],
+                "tx_hash": row[3],
+                "attempts": row[4],
+                "last_error": row[5],
+                "raw_transaction": row[6],
+                # hashes of all transactions signed for the item, e.g. replacements with higher fees
+                "tx_hashes": row[7].split(",") if row[7] else [],
+            }
+            for row in rows
+        ]
+
+    def add(self, payload):
+        """Records a payload to notarize.
+        Args:
+            payload (string or bytes): The string to save, see ``create_notarization_transaction``.
+
+        Returns:
+            int: The id of the outbox item.
+        """
+        now = time.time()
+        return self._execute(
+            "INSERT INTO outbox (payload, state, attempts, next_attempt_at, created_at, updated_at) VALUES (?, ?, 0, ?, ?, ?)",
+            (payload, QUEUED, now, now, now),
+        ).lastrowid
+
+    def get(self, item_id):
+        """Looks up an outbox item.
+        Args:
+            item_id (int): The id of the item.
+
+        Returns:
+            dictionary: Contains "id", "payload", "state", "tx_hash", "attempts", "last_error", "raw_transaction" (the signed transaction, None if not signed yet) and "tx_hashes" (the hashes of all transactions signed for the item), or None if there is no such item.
+        """
+        items = self._fetch(f"SELECT {COLUMNS} FROM outbox WHERE id = ?", (item_id,))
+        return items[0] if items else None
+
+    def take_due(self, limit):
+        """Takes queued and signed items that are due to be sent (oldest first). Queued items are marked as being sent,
+        signed items are not due again before ``retry_delay`` seconds, so that they are not taken twice while they are sent again.
+        Args:
+            limit (int): Maximum number of items to take.
+
+        Returns:
+            list: The items, see ``get``.
+        """
+        with self._lock:
+            now = time.time()
+            rows = self._connection.execute(
+                "SELECT id, state FROM outbox WHERE state IN (?, ?) AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (QUEUED, SIGNED, now, limit),
+            ).fetchall()
+            self._connection.executemany(
+                "UPDATE outbox SET state = ?, updated_at = ? WHERE id = ?",
+                [(SENDING, now, item_id) for item_id, state in rows if state == QUEUED],
+            )
+            self._connection.executemany(
+                "UPDATE outbox SET next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                [
+                    (now + self.retry_delay, now, item_id)
+                    for item_id, state in rows
+                    if state == SIGNED
+                ],
+            )
+            self._connection.commit()
+        return [self.get(item_id) for item_id, _ in rows]
+
+    def in_state(self, state):
+        """Returns all items in a state.
+        Args:
+            state (string): The state, e.g. "sent".
+
+        Returns:
+            list: The items, see ``get``.
+        """
+        return self._fetch(
+            f"SELECT {COLUMNS} FROM outbox WHERE state = ? ORDER BY id", (state,)
+        )
+
+    def mark_signed(self, item_id, tx_hash, raw_transaction):
+        """Records the signed transaction of an item before it is sent. An item that is being sent is marked as signed, the state of other items is kept (e.g. of a sent item whose transaction is replaced with higher fees).
+        Does nothing if the item was already mined or given up on.
+        Args:
+            item_id (int): The id of the item.\n
+            tx_hash (string): The transaction hash.\n
+            raw_transaction (bytes): The signed transaction, as it is sent to the node.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT tx_hashes FROM outbox WHERE id = ?", (item_id,)
+            ).fetchone()
+            tx_hashes = row[0].split(",") if row[0] else []
+            self._connection.execute(
+                "UPDATE outbox SET state = CASE WHEN state = ? THEN ? ELSE state END, tx_hash = ?, raw_transaction = ?, tx_hashes = ?, updated_at = ? WHERE id = ? AND state IN (?, ?, ?)",
+                (
+                    SENDING,
+                    SIGNED,
+                    tx_hash,
+                    raw_transaction,
+                    ",".join(tx_hashes + [tx_hash]),
+                    time.time(),
+                    item_id,
+                    SENDING,
+                    SIGNED,
+                    SENT,
+                ),
+            )
+            self._connection.commit()
+
+    def mark_sent(self, item_id, tx_hash):
+        """Records that the transaction of an item was sent. Does nothing if the item is not being sent anymore (e.g. because it was already mined).
+        Args:
+            item_id (int): The id of the item.\n
+            tx_hash (string): The transaction hash.
+        """
+        self._execute(
+            "UPDATE outbox SET state = ?, tx_hash = ?, updated_at = ? WHERE id = ? AND state IN (?, ?)",
+            (SENT, tx_hash, time.time(), item_id, SENDING, SIGNED),
+        )
+
+    def mark_confirmed(self, item_id, tx_hash):
+        """Records that the transaction of an item was mined.
+        Args:
+            item_id (int): The id of the item.\n
+            tx_hash (string): The hash of the mined transaction.
+        """
+        self._execute(
+            "UPDATE outbox SET state = ?, tx_hash = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+            (CONFIRMED, tx_hash, time.time(), item_id),
+        )
+
+    def mark_failed(self, item_id, error, resign=False):
+        """Records a failed attempt, or gives up on the item after ``max_attempts`` attempts.
+        An item whose transaction was signed stays signed and its transaction is sent again, other items are queued again.
+        Args:
+            item_id (int): The id of the item.\n
+            error (string): What went wrong.\n
+            resign (boolean, optional): Whether the signed transaction is dropped and the payload queued again to be signed with a new nonce, e.g. because the transaction was mined but failed (defaults to False).
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT attempts, raw_transaction FROM outbox WHERE id = ?", (item_id,)
+            ).fetchone()
+            attempts = row[0] + 1
+            signed = row[1] is not None and not resign
+            if attempts >= self.max_attempts:
+                state = FAILED
+            else:
+                state = SIGNED if signed else QUEUED
+            next_attempt_at = time.time() + self.retry_delay * 2 ** (attempts - 1)
+            self._connection.execute(
+                "UPDATE outbox SET state = ?, attempts = ?, last_error = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                (state, attempts, error, next_attempt_at, time.time(), item_id),
+            )
+            if not signed:
+                self._connection.execute(
+                    "UPDATE outbox SET raw_transaction = NULL, tx_hashes = NULL WHERE id = ?",
+                    (item_id,),
+                )
+            self._connection.commit()
+
+    def requeue(self, item_id):
+        """Queues an item again right away, without counting an attempt. Its signed transaction, if any, is dropped, so the payload is signed again with a new nonce.
+        Args:
+            item_id (int): The id of the item.
+        """
+        self._execute(
+            "UPDATE outbox SET state = ?, tx_hash = NULL, raw_transaction = NULL, tx_hashes = NULL, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+            (QUEUED, time.time(), time.time(), item_id),
+        )
+
+    def counts(self):
+        """Counts the items per state.
+
+        Returns:
+            dictionary: The number of items per state.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT state, COUNT(*) FROM outbox GROUP BY state"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        """Closes the database."""
+        with self._lock:
+            self._connection.close()
+
+
+class OutboxWorker:
+    """Sends the payloads of an outbox in batches in a background thread.
+
+    Attributes:
+        outbox (Outbox): The outbox to drain.\n
+        sender_pool (SenderPool): The sender pool the notarizations are sent with.\n
+        batch_size (int): Maximum number of payloads sent per round (defaults to 50).\n
+        interval (float): Number of seconds between two rounds (defaults to 1).\n
+        connect (function, optional): Called without arguments before every round, returns the web3 connection to send with (e.g. ``lambda: get_connection(url)``). If it raises, the round is skipped (defaults to None, i.e. the connection of the sender pool is kept).\n
+        callback (function, optional): Called as ``callback(tx_hash, status, tx_receipt)`` once the transaction of a payload is confirmed, failed or timed out, after the outcome was recorded.
+        A transaction that timed out is not given up on, it is looked up and sent again in a later round.
+    """
+
+    def __init__(
+        self,
+        outbox,
+        sender_pool,
+        batch_size=50,
+        interval=1,
+        connect=None,
+        callback=None,
+    ):
+        self.outbox = outbox
+        self.sender_pool = sender_pool
+        self.batch_size = batch_size
+        self.interval = interval
+        self.connect = connect
+        self.callback = callback
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _callback(self, item_id):
+        def record_outcome(tx_hash, status, tx_receipt):
+            if status == CONFIRMED:
+                self.outbox.mark_confirmed(item_id, tx_receipt["transactionHash"].hex())
+            else:
+                # a mined transaction that failed used up its nonce, the payload has to be signed again
+                self.outbox.mark_failed(
+                    item_id,
+                    f"Transaction {tx_hash} {status}.",
+                    resign=tx_receipt is not None,
+                )
+            if self.callback is not None:
+                self.callback(tx_hash, status, tx_receipt)
+
+        return record_outcome
+
+    def _signed_callback(self, item_id):
+        def record_signed(tx_hash, raw_transaction):
+            self.outbox.mark_signed(item_id, tx_hash, raw_transaction)
+
+        return record_signed
+
+    def _mined(self, item):
+        # looks up whether one of the transactions signed for the item was mined
+        for tx_hash in item["tx_hashes"] or [item["tx_hash"]]:
+            try:
+                tx_receipt = self.sender_pool.web3_connection.eth.getTransactionReceipt(
+                    tx_hash
+                )
+            except exceptions.TransactionNotFound:
+                continue
+            return tx_hash, tx_receipt
+        return None
+
+    def resend(self, item):
+        """Looks up the signed transaction of an item and sends it again if none of the transactions signed for the item was mined.
+        If the nonce of the transaction was used by another transaction, the item is queued again to be signed with a new nonce.
+        Args:
+            item (dictionary): The item, see ``Outbox.get``.
+        """
+        callback = self._callback(item["id"])
+        mined = self._mined(item)
+        if mined is not None:
+            tx_hash, tx_receipt = mined
+            callback(
+                tx_hash, CONFIRMED if tx_receipt["status"] == 1 else FAILED, tx_receipt
+            )
+            return
+        if item["raw_transaction"] is None:
+            # sent before signed transactions were recorded
+            self.outbox.mark_failed(
+                item["id"], f"Transaction {item['tx_hash']} was not mined.", resign=True
+            )
+            return
+        try:
+            self.sender_pool.web3_connection.eth.sendRawTransaction(
+                item["raw_transaction"]
+            )
+        except Exception as e:
+            if is_nonce_error(e):
+                # the transaction may have been mined in the meantime
+                if self._mined(item) is None:
+                    self.outbox.requeue(item["id"])
+                    return
+            elif not any(
+                message in str(e).lower() for message in KNOWN_TRANSACTION_MESSAGES
+            ):
+                self.outbox.mark_failed(item["id"], str(e))
+                return
+        self.outbox.mark_sent(item["id"], item["tx_hash"])
+        tracker = self.sender_pool.confirmation_tracker
+        if tracker is not None:
+            tracker.track(item["tx_hash"], callback=callback)
+            return
+        mined = self._mined(item)
+        if mined is None:
+            self.outbox.mark_failed(
+                item["id"], f"Transaction {item['tx_hash']} was not mined yet."
+            )
+            return
+        tx_hash, tx_receipt = mined
+        callback(
+            tx_hash, CONFIRMED if tx_receipt["status"] == 1 else FAILED, tx_receipt
+        )
+
+    def recover(self):
+        """Picks up the items a stopped process left behind. Items that were taken but not signed are queued again,
+        signed and sent transactions are looked up and sent again if they were not mined (see ``resend``)."""
+        for item in self.outbox.in_state(SENDING):
+            self.outbox.requeue(item["id"])
+        for item in self.outbox.in_state(SIGNED) + self.outbox.in_state(SENT):
+            self.resend(item)
+
+    def drain_once(self):
+        """Sends one batch of due payloads.
+
+        Returns:
+            int: The number of payloads taken from the outbox.
+        """
+        items = self.outbox.take_due(self.batch_size)
+        for item in items:
+            if item["state"] == SIGNED:
+                # signed before, but not sent or not mined in time
+                try:
+                    self.resend(item)
+                except Exception as e:
+                    self.outbox.mark_failed(item["id"], str(e))
+                continue
+            callback = self._callback(item["id"])
+            try:
+                result = self.sender_pool.notarize(
+                    item["payload"],
+                    callback=callback,
+                    # also records the replacements with higher fees, so the item always has the latest tx_hash
+                    signed_callback=self._signed_callback(item["id"]),
+                )
+            except Exception as e:
+                self.outbox.mark_failed(item["id"], str(e))
+                continue
+            self.outbox.mark_sent(item["id"], result["tx_hash"])
+            if "tx_receipt" in result:
+                # sent without confirmation tracker, already mined
+                status = CONFIRMED if result["tx_receipt"]["status"] == 1 else FAILED
+                callback(result["tx_hash"], status, result["tx_receipt"])
+            elif self.sender_pool.confirmation_tracker is None:
+                self.outbox.mark_failed(
+                    item["id"],
+                    f"Transaction {result['tx_hash']} was not mined in time.",
+                )
+        return len(items)
+
+    def _run(self):
+        recovered = False
+        while not self._stopped.is_set():
+            try:
+                if self.connect is not None:
+                    # before taking items, so that nothing is taken without a connection
+                    self.sender_pool.use_connection(self.connect())
+                if not recovered:
+                    self.recover()
+                    recovered = True
+                self.drain_once()
+            except Exception as e:
+                # e.g. no connection or the database is locked for a moment, try again in the next round
+                print(f"Could not drain the notarization outbox: {e}")
+            self._stopped.wait(self.interval)
+
+    def start(self):
+        """Starts the background thread if it is not running yet. Its first round recovers the items left behind by a stopped process."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the background thread after the current round."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
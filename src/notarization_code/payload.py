@@ -0,0 +1,84 @@
+""" Compact payloads. Storing a SHA256 hash as text takes 64 bytes of transaction data, although the hash itself is only 32 bytes, and every non-zero byte costs 16 gas. \n
+A compact payload stores the raw bytes of the hash instead, behind a short header: the magic bytes ``MAGIC``, a format version and the id of the hash algorithm (see ``ALGORITHMS``).
+For a SHA256 hash this makes 37 bytes instead of 64. The magic bytes start with a zero byte, which never occurs in the hex string of a hash, so compact payloads and the legacy text payloads cannot be confused. \n
+``encode_payload`` builds a compact payload that can be passed to ``create_notarization_transaction`` as ``string_to_save``, ``decode_payload`` reads both compact and legacy payloads back.
+"""
+MAGIC = b"\x00NT"
+VERSION = 1
+
+# name: (id, digest size in bytes)
+ALGORITHMS = {
+    "sha256": (1, 32),
+    "merkle-sha256": (2, 32),
+    # root of a Merkle tree over the chunks of a file, see ``chunked_digest.py``
+    "chunked-merkle-sha256": (3, 32),
+}
+
+HEADER_SIZE = len(MAGIC) + 2
+
+
+def encode_payload(hash_value, algorithm="sha256"):
+    """Builds the compact payload of a hash.
+    Args:
+        hash_value (string): The hash as hex string.\n
+        algorithm (string, optional): Name of the hash algorithm, one of ``ALGORITHMS`` (defaults to "sha256").
+
+    Returns:
+        bytes: The payload.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(
+            f"Unknown hash algorithm {algorithm}, use one of {', '.join(ALGORITHMS)}."
+        )
+    algorithm_id, digest_size = ALGORITHMS[algorithm]
+    digest = bytes.fromhex(hash_value)
+    if len(digest) != digest_size:
+        raise ValueError(
+            f"A {algorithm} hash has {digest_size} bytes, but {len(digest)} bytes were given."
+        )
+    return MAGIC + bytes([VERSION, algorithm_id]) + digest
+
+
+def is_compact_payload(data):
+    """Checks whether transaction data is a compact payload.
+    Args:
+        data (bytes): The data of the transaction.
+
+    Returns:
+        boolean: True if the data starts with the magic bytes.
+    """
+    return data[: len(MAGIC)] == MAGIC
+
+
+def decode_payload(data):
+    """Reads the hash from the data of a notarization transaction, which is either a compact payload or legacy text.
+    Args:
+        data (bytes or string): The data of the transaction, as bytes or hex string.
+
+    Returns a dictionary containing:
+        format (string): "compact" or "text".\n
+        algorithm (string): Name of the hash algorithm, None for legacy text.\n
+        hash_value (string): The hash as (lowercase) hex string, or the stored text for legacy text.
+    """
+    if isinstance(data, str):
+        data = bytes.fromhex(data[2:] if data[:2].lower() == "0x" else data)
+    if not is_compact_payload(data):
+        return {"format": "text", "algorithm": None, "hash_value": data.decode()}
+    if len(data) < HEADER_SIZE:
+        raise ValueError("The compact payload is incomplete.")
+    version, algorithm_id = data[len(MAGIC)], data[len(MAGIC) + 1]
+    if version != VERSION:
+        raise ValueError(f"Unknown compact payload version {version}.")
+    for algorithm, (known_id, digest_size) in ALGORITHMS.items():
+        if known_id == algorithm_id:
+            digest = data[HEADER_SIZE:]
+            if len(digest) != digest_size:
+                raise ValueError(
+                    f"A {algorithm} hash has {digest_size} bytes, but the payload contains {len(digest)} bytes."
+                )
+            return {
+                "format": "compact",
+                "algorithm": algorithm,
+                "hash_value": digest.hex(),
+            }
+    raise ValueError(f"Unknown hash algorithm id {algorithm_id}.")
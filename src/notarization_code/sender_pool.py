@@ -0,0 +1,185 @@
+""" Sending from several accounts. All transactions of one account are ordered by their nonce, so a single account limits how many notarizations can be pending at the same time. \n
+The class ``SenderPool`` is configured with several funded accounts and sends every notarization from the account with the fewest pending transactions (among equals, the one that sent the fewest so far).
+Nonces, balances and fees are kept locally for all accounts by a shared ``NonceManager``, ``BalanceLedger`` and ``FeeEstimator``.
+If the balance of an account does not cover a transaction, the next account is tried, so an account running dry does not stop the notarizations. \n
+With a ``ConfirmationTracker``, ``SenderPool.notarize`` does not wait for the transaction to be mined, which is what allows several pending transactions per account in the first place.
+``SenderPool.health`` reports the pending, confirmed and failed transactions, the available balance and the last error of every account.
+"""
+import threading
+
+from balance_ledger import BalanceLedger
+from confirmation import CONFIRMED
+from confirmation import FAILED
+from fees import FeeEstimator
+from nonce_manager import NonceManager
+from notarization import AccountBalanceInsufficient
+from notarization import create_notarization_transaction
+from notarization import send_transaction
+
+
+class SenderPool:
+    """Sends notarizations from several accounts. Can be shared between threads.
+
+    Attributes:
+        web3_connection (Web3 object): The web3 connection used to send the transactions.\n
+        accounts (list): The accounts as (address, private_key) pairs. Instead of the private key, a ``Signer`` (see ``signer.py``) can be given.\n
+        confirmation_tracker (ConfirmationTracker, optional): Tracker that watches for the receipts in the background (defaults to None, i.e. every notarization waits until it is mined).\n
+        fee_estimator (FeeEstimator, optional): Estimator of the fees (defaults to None, i.e. a new one with "standard" speed).\n
+        fee_bump_policy (FeeBumpPolicy, optional): Policy to replace transactions that are not mined in time with higher fees (defaults to None, i.e. they are never replaced).
+    """
+
+    def __init__(
+        self,
+        web3_connection,
+        accounts,
+        confirmation_tracker=None,
+        fee_estimator=None,
+        fee_bump_policy=None,
+    ):
+        if len(accounts) == 0:
+            raise ValueError("The sender pool needs at least one account.")
+        self.web3_connection = web3_connection
+        self.private_keys = dict(accounts)
+        self.confirmation_tracker = confirmation_tracker
+        self.fee_bump_policy = fee_bump_policy
+        self.nonce_manager = NonceManager(web3_connection)
+        self.balance_ledger = BalanceLedger(web3_connection)
+        self.fee_estimator = (
+            fee_estimator
+            if fee_estimator is not None
+            else FeeEstimator(web3_connection)
+        )
+        self._stats = {
+            account: {
+                "pending": 0,
+                "sent": 0,
+                "confirmed": 0,
+                "failed": 0,
+                "last_error": None,
+            }
+            for account in self.private_keys
+        }
+        self._lock = threading.Lock()
+
+    def use_connection(self, web3_connection):
+        """Switches all accounts to another web3 connection, e.g. after the connection was reset.
+        Args:
+            web3_connection (Web3 object): The new web3 connection.
+        """
+        self.web3_connection = web3_connection
+        self.nonce_manager.web3_connection = web3_connection
+        self.balance_ledger.web3_connection = web3_connection
+        self.fee_estimator.web3_connection = web3_connection
+        if self.confirmation_tracker is not None:
+            self.confirmation_tracker.web3_connection = web3_connection
+
+    def _accounts_by_load(self):
+        with self._lock:
+            return sorted(
+                self._stats,
+                key=lambda account: (
+                    self._stats[account]["pending"],
+                    self._stats[account]["sent"],
+                ),
+            )
+
+    def _finish(self, account, status, error=None):
+        with self._lock:
+            stats = self._stats[account]
+            stats["pending"] -= 1
+            if status == CONFIRMED:
+                stats["confirmed"] += 1
+            elif status is not None:
+                stats["failed"] += 1
+            if error is not None:
+                stats["last_error"] = error
+
+    def notarize(
+        self, string_to_save, callback=None, time_limit=120, signed_callback=None
+    ):
+        """Sends a notarization from the account with the fewest pending transactions.
+        Args:
+            string_to_save (string or bytes): The string to save, see ``create_notarization_transaction``.\n
+            callback (function, optional): Only used with a confirmation tracker. Called as ``callback(tx_hash, status, tx_receipt)`` once the transaction is confirmed, failed or timed out.\n
+            time_limit (int, optional): Number of seconds to wait for the transaction to be mined (defaults to 120).\n
+            signed_callback (function, optional): Called as ``signed_callback(tx_hash, raw_transaction)`` after the transaction is signed and before it is sent, see ``send_transaction``.
+
+        Returns a dictionary containing:
+            account (string): The account the notarization was sent from.\n
+            tx_hash (string): The transaction hash.\n
+            tx_receipt (only if mined and not tracked in the background, dictionary): The transaction receipt.
+        """
+        insufficient = None
+        for account in self._accounts_by_load():
+            try:
+                tx = create_notarization_transaction(
+                    web3_connection=self.web3_connection,
+                    account=account,
+                    string_to_save=string_to_save,
+                    nonce_manager=self.nonce_manager,
+                    balance_ledger=self.balance_ledger,
+                    fee_estimator=self.fee_estimator,
+                )
+            except AccountBalanceInsufficient as e:
+                # try the next account
+                insufficient = e
+                with self._lock:
+                    self._stats[account]["last_error"] = str(e)
+                continue
+            return self._send(account, tx, callback, time_limit, signed_callback)
+        raise insufficient
+
+    def _send(self, account, tx, callback, time_limit, signed_callback):
+        with self._lock:
+            self._stats[account]["pending"] += 1
+            self._stats[account]["sent"] += 1
+        tracked_callback = None
+        if self.confirmation_tracker is not None:
+
+            def tracked_callback(tx_hash, status, tx_receipt):
+                self._finish(account, status)
+                if callback is not None:
+                    callback(tx_hash, status, tx_receipt)
+
+        try:
+            result = send_transaction(
+                web3_connection=self.web3_connection,
+                transaction=tx,
+                private_key=self.private_keys[account],
+                time_limit=time_limit,
+                nonce_manager=self.nonce_manager,
+                confirmation_tracker=self.confirmation_tracker,
+                callback=tracked_callback,
+                balance_ledger=self.balance_ledger,
+                fee_bump_policy=self.fee_bump_policy,
+                signed_callback=signed_callback,
+            )
+        except Exception as e:
+            self._finish(account, FAILED, error=str(e))
+            raise
+        if self.confirmation_tracker is None:
+            if "tx_receipt" not in result:
+                self._finish(account, None, error="Transaction has not been mined yet.")
+            elif result["tx_receipt"]["status"] == 1:
+                self._finish(account, CONFIRMED)
+            else:
+                self._finish(account, FAILED)
+        return dict(result, account=account)
+
+    def health(self):
+        """Reports the state of every account.
+
+        Returns:
+            dictionary: Per account a dictionary with the number of "pending", "sent", "confirmed" and "failed" transactions, the "available_balance" (in wei, None if unknown) and the "last_error" (None if there was none).
+        """
+        report = {}
+        for account in self.private_keys:
+            try:
+                available_balance = self.balance_ledger.available(account)
+            except Exception:
+                available_balance = None
+            with self._lock:
+                report[account] = dict(
+                    self._stats[account], available_balance=available_balance
+                )
+        return report
@@ -0,0 +1,125 @@
+""" Signing with a key that is loaded once. ``send_transaction`` given a private key as string parses and checks the key again for every transaction it signs.
+The class ``Signer`` does that only once, when it is created from a private key or, via ``Signer.from_keystore``, from an encrypted keystore file (whose slow decryption then also happens only once).
+A ``Signer`` can be passed to ``send_transaction``, ``replace_transaction`` and ``SenderPool`` wherever a private key is expected. \n
+``Signer.sign_many`` signs many transactions at once, e.g. when thousands of transactions are signed in advance to be sent back-to-back.
+Signing is CPU-bound, so from ``parallel_threshold`` transactions on they are spread over a pool of ``processes`` processes, which is started the first time it is needed and kept until ``close``.
+"""
+import binascii
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from eth_account import Account
+
+# the account of a worker process of the pool, loaded once per process
+_worker_account = None
+
+
+def _init_worker(key):
+    global _worker_account
+    _worker_account = Account.from_key(key)
+
+
+def _sign_chunk(transactions):
+    return [_worker_account.sign_transaction(tx) for tx in transactions]
+
+
+class Signer:
+    """Signs transactions with a private key that is parsed and checked only once. Exits with a message if the private key is invalid. Can be shared between threads.
+
+    Attributes:
+        private_key (string or bytes): The private key.\n
+        processes (int, optional): Number of processes ``sign_many`` spreads large batches over (defaults to None, i.e. the number of CPUs).\n
+        parallel_threshold (int): Number of transactions from which on ``sign_many`` uses the process pool (defaults to 200).
+    """
+
+    def __init__(self, private_key, processes=None, parallel_threshold=200):
+        try:
+            self._account = Account.from_key(private_key)
+        except binascii.Error:
+            print(
+                "The private key you specified is invalid. It may only contain [0-9a-fA-F] characters. Execution aborted."
+            )
+            sys.exit()
+        except ValueError as e:
+            print(
+                "The private key you specified is invalid.",
+                str(e),
+                "Execution aborted.",
+            )
+            sys.exit()
+        self.processes = processes
+        self.parallel_threshold = parallel_threshold
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_keystore(cls, keystore, password, **kwargs):
+        """Creates a signer from an encrypted keystore (as created by geth or ``Account.encrypt``). The keystore is decrypted right away, so only once.
+        Args:
+            keystore (string or dictionary): Path of the keystore file, or its content.\n
+            password (string): The password of the keystore.\n
+            kwargs: Further arguments of ``Signer``.
+
+        Returns:
+            Signer: The signer.
+        """
+        if isinstance(keystore, str):
+            with open(keystore) as f:
+                keystore = json.load(f)
+        return cls(Account.decrypt(keystore, password), **kwargs)
+
+    @property
+    def address(self):
+        """The address of the account the signer signs for."""
+        return self._account.address
+
+    def sign(self, transaction):
+        """Signs a transaction.
+        Args:
+            transaction (dictionary): A dictionary specifying the details of the transaction.
+
+        Returns:
+            signed_tx: The signed transaction, containing the transaction hash and the raw transaction to send.
+        """
+        return self._account.sign_transaction(transaction)
+
+    def sign_many(self, transactions):
+        """Signs many transactions, in a pool of processes if there are at least ``parallel_threshold`` of them.
+        Args:
+            transactions (list): The transactions (dictionaries).
+
+        Returns:
+            list: The signed transactions, in the order of the transactions.
+        """
+        transactions = list(transactions)
+        if len(transactions) < self.parallel_threshold:
+            return [self.sign(tx) for tx in transactions]
+        processes = self.processes or os.cpu_count()
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=processes,
+                    initializer=_init_worker,
+                    initargs=(self._account.key,),
+                )
+            pool = self._pool
+        # a few chunks per process, so that processes that finish early get more work
+        chunk_size = -(-len(transactions) // (4 * processes))
+        chunks = [
+            transactions[i : i + chunk_size]
+            for i in range(0, len(transactions), chunk_size)
+        ]
+        signed_txs = []
+        for signed_chunk in pool.map(_sign_chunk, chunks):
+            signed_txs += signed_chunk
+        return signed_txs
+
+    def close(self):
+        """Shuts the process pool down, if it was started."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
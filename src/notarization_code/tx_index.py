@@ -0,0 +1,83 @@
+""" Local index of notarization transactions. Once a transaction is final, its input data and the timestamp of its block never change, so there is no need to ask the node again. \n
+The class ``NotarizationIndex`` stores the input data, block number and block timestamp of every looked up transaction in a SQLite database.
+A transaction counts as final once ``confirmations`` blocks have been mined on top of its block. Transactions that are not final yet are stored as well, but are looked up again by the verification functions. \n
+``verify_via_transaction`` and ``verify_many`` read the index first and fill it with every transaction they have to fetch, so verifying the same data again works without the node.
+"""
+import sqlite3
+import threading
+
+
+class NotarizationIndex:
+    """Stores looked up notarization transactions in a SQLite database. Can be shared between threads.
+
+    Attributes:
+        db_path (string): Path of the SQLite database (created if it does not exist).\n
+        confirmations (int): Number of blocks that need to be mined on top of the block of a transaction before it is final (defaults to 12).
+    """
+
+    def __init__(self, db_path, confirmations=12):
+        self.db_path = db_path
+        self.confirmations = confirmations
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS transactions (
+                tx_hash TEXT PRIMARY KEY,
+                input_data TEXT NOT NULL,
+                block_number INTEGER NOT NULL,
+                timestamp INTEGER NOT NULL,
+                final INTEGER NOT NULL
+            )"""
+        )
+        self._connection.commit()
+
+    def get(self, tx_hash):
+        """Looks up a transaction in the index.
+        Args:
+            tx_hash (string): The transaction hash.
+
+        Returns:
+            dictionary: Contains "tx_hash", "input_data" (hex string), "block_number", "timestamp" and "final", or None if the transaction is not in the index.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT tx_hash, input_data, block_number, timestamp, final FROM transactions WHERE tx_hash = ?",
+                (tx_hash.lower(),),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "tx_hash": row[0],
+            "input_data": row[1],
+            "block_number": row[2],
+            "timestamp": row[3],
+            "final": bool(row[4]),
+        }
+
+    def put(self, tx_hash, input_data, block_number, timestamp, latest_block_number):
+        """Stores a mined transaction.
+        Args:
+            tx_hash (string): The transaction hash.\n
+            input_data (string): The input data of the transaction as hex string.\n
+            block_number (int): The number of the block the transaction was mined in.\n
+            timestamp (int): The timestamp of that block.\n
+            latest_block_number (int): The number of the latest block, to decide whether the transaction is final.
+        """
+        final = latest_block_number - block_number >= self.confirmations
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?)",
+                (tx_hash.lower(), input_data, block_number, timestamp, int(final)),
+            )
+            self._connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM transactions"
+            ).fetchone()[0]
+
+    def close(self):
+        """Closes the database."""
+        with self._lock:
+            self._connection.close()
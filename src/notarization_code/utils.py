@@ -2,11 +2,13 @@
 Because I use infura I add an exception class ``NoInfuraConnection`` that allows me to report back nice error messages in case there is an issue.
 This is used in the function ``establish_infura_connection`` which I use to connect to the ETH network via infura. \n
 The function ``create_transaction_etherscan_link`` is just a handy tool for creating etherscan links based on tx_hashes. \n
-The functions ``file_as_bytes``, ``calculate_hash_of_file_directly`` and ``calculate_hash_of_file_via_path`` are all for convenient hashing in other places. """
-import hashlib
-import sys
-
-from web3 import Web3
+The functions ``file_as_bytes``, ``calculate_hash_of_file_directly`` and ``calculate_hash_of_file_via_path`` are all for convenient hashing in other places, they live in ``hashing.py`` and can be imported from there or from here.
+web3 is only imported once ``establish_infura_connection`` is called, so importing this module for hashing stays fast. """
+from hashing import calculate_hash_of_file_directly
+from hashing import calculate_hash_of_file_via_path
+from hashing import DEFAULT_BUFFER_SIZE
+from hashing import file_as_bytes
+from instrumentation import instrument
 
 
 class NoInfuraConnection(Exception):
@@ -30,49 +32,6 @@ class NoInfuraConnection(Exception):
         return f"{self.message} Infura URL used: {self.infura_url}"
 
 
-def file_as_bytes(file):
-    """Reads file as binary.
-    Args:
-        file: File to read as binary
-
-    Returns:
-        binary file
-    """
-    with file:
-        return file.read()
-
-
-def calculate_hash_of_file_directly(file):
-    """Calculate SHA256 checksum of binary file.
-    IMPORTANT: File needs to be encoded as binary.
-    Args:
-        file (binary): Binary file
-
-    Returns:
-        calculated hash
-    """
-
-    return hashlib.sha256(file_as_bytes(file)).hexdigest()
-
-
-def calculate_hash_of_file_via_path(path):
-    """Read file in as binary and apply hash.
-    Args:
-        path (string): Path to the file that is to be hashed
-
-    Returns:
-        string: calculated hash
-    """
-    try:
-        with open(path, "rb") as f:
-            return calculate_hash_of_file_directly(f)
-    except FileNotFoundError:
-        print(
-            f"No file exists under the specified path ({path}). Please make sure that you provide the full and correct path to the file."
-        )
-        sys.exit()
-
-
 def create_transaction_etherscan_link(tx_hash, network):
     """Creates etherscan link for a transaction.
     Args:
@@ -96,14 +55,16 @@ def create_transaction_etherscan_link(tx_hash, network):
 
 
 def establish_infura_connection(infura_url):
-    """Establishes web3 connection via infura URL. Raises exception if URL is invalid.
+    """Establishes web3 connection via infura URL. Raises exception if URL is invalid. The requests of the connection are recorded in the shared metrics (see ``instrumentation.py``).
     Args:
         infura_url (string): Infura URL to connect to network.
 
     Returns:
         web3_connection: A Web3 connection object that can be used in the following.
     """
-    web3_connection = Web3(Web3.HTTPProvider(infura_url))
+    from web3 import Web3
+
+    web3_connection = instrument(Web3(Web3.HTTPProvider(infura_url)))
     if web3_connection.isConnected() == False:
         raise NoInfuraConnection(infura_url=infura_url)
     else:
@@ -1,14 +1,32 @@
 """ The verification function. This is a relatively simple function that just "looks up" a transaction on the blockchain and compares the input_data of the transaction to
-the hash of a file or a directly provided hash. """
+the hash of a file or a directly provided hash. \n
+If the transaction stores the root of a Merkle tree (see ``create_batch_notarization_transaction``), the inclusion proof of the file or hash needs to be passed as well. \n
+To verify many transactions at once (e.g. a whole oTree data export), ``verify_many`` looks up all transactions and blocks with JSON-RPC batch requests instead of two requests per transaction.
+Both functions keep the timestamps of confirmed blocks in a ``BlockTimestampCache`` (see ``block_cache.py``), so each block is only fetched once.
+With a ``NotarizationIndex`` (see ``tx_index.py``), final transactions are even looked up without the node. \n
+The stored hash may be a compact payload (see ``payload.py``) or legacy text, both are recognized. A file notarized with its chunked digest (see ``chunked_digest.py``) is hashed the same way to verify it. \n
+web3 and requests are only imported once a transaction is looked up, so importing this module (e.g. to hash files first) is fast. """
 import sys
 from datetime import datetime
 
-from utils import calculate_hash_of_file_via_path
-from web3 import exceptions
-from web3 import Web3
+from block_cache import block_timestamp_cache
+from chunked_digest import ALGORITHM as CHUNKED_ALGORITHM
+from chunked_digest import chunked_digest
+from hashing import calculate_hash_of_file_via_path
+from instrumentation import metrics
+from merkle import verify_merkle_proof
+from payload import decode_payload
 
 
-def verify_via_transaction(web3_connection, tx_hash, filepath="", hash_value=""):
+def verify_via_transaction(
+    web3_connection,
+    tx_hash,
+    filepath="",
+    hash_value="",
+    proof=None,
+    block_cache=block_timestamp_cache,
+    tx_index=None,
+):
     """Verifies that a specified file (or hash_value) matches the hash value in a specified transaction.
 
     Args:
@@ -16,38 +34,310 @@ def verify_via_transaction(web3_connection, tx_hash, filepath="", hash_value="")
         tx_hash (string): The transaction hash for the transaction to look up.\n
         filepath (string): Path to the file that is to be verified.\n
         hash_value (string, optional): Instead of a filepath, the hash value to compare can be specified directly.\n
+        proof (list, optional): Merkle inclusion proof of the file or hash, needed if the transaction was created with ``create_batch_notarization_transaction``.\n
+        block_cache (BlockTimestampCache, optional): Cache of block timestamps (defaults to the cache shared in the process). None disables caching.\n
+        tx_index (NotarizationIndex, optional): Local index of transactions. Final transactions are taken from it instead of the node, fetched transactions are added to it (defaults to None).\n
 
     Returns:
         result (dictionary): A dictionary specifying whether the file was verified and the timestamp of the block the transaction was mined in.
     """
 
-    # get transaction
-    try:
-        fetched_tx = web3_connection.eth.getTransaction(tx_hash)
-    except exceptions.TransactionNotFound:
-        print(
-            f"Could not find transaction with hash ({tx_hash}). Please double check if the hash is correct."
-        )
-        sys.exit()
+    from web3 import exceptions
 
-    # get input string from transaction and convert from Hex to Text
-    tx_string = Web3.toText(fetched_tx["input"])
+    # final transactions do not change, no need to ask the node
+    indexed_tx = tx_index.get(tx_hash) if tx_index is not None else None
+    if indexed_tx is not None and indexed_tx["final"]:
+        input_data = indexed_tx["input_data"]
+        mining_timestamp = indexed_tx["timestamp"]
+    else:
+        with metrics.phase("lookup"):
+            # get transaction
+            try:
+                fetched_tx = web3_connection.eth.getTransaction(tx_hash)
+            except exceptions.TransactionNotFound:
+                print(
+                    f"Could not find transaction with hash ({tx_hash}). Please double check if the hash is correct."
+                )
+                sys.exit()
+            input_data = get_input_data(fetched_tx)
 
-    # get timestamp via block
-    # fetched_block = web3_connection.eth.getBlock(fetched_tx["blockHash"])
-    fetched_block = web3_connection.eth.get_block(fetched_tx["blockNumber"])
-    mining_timestamp = fetched_block["timestamp"]
-    timestamp_string = datetime.utcfromtimestamp(mining_timestamp).strftime(
-        "%Y-%m-%d %H:%M:%S"
-    )
+            # get timestamp via block
+            # fetched_block = web3_connection.eth.getBlock(fetched_tx["blockHash"])
+            if block_cache is not None:
+                mining_timestamp = block_cache.get_timestamp(
+                    web3_connection, fetched_tx["blockNumber"]
+                )
+            else:
+                fetched_block = web3_connection.eth.get_block(fetched_tx["blockNumber"])
+                mining_timestamp = fetched_block["timestamp"]
+
+        if tx_index is not None:
+            tx_index.put(
+                tx_hash,
+                input_data,
+                fetched_tx["blockNumber"],
+                mining_timestamp,
+                web3_connection.eth.block_number,
+            )
 
-    # to actually verify we want to calculate hash of file here and compare with tx_string
+    timestamp_string = format_timestamp(mining_timestamp)
+
+    # to actually verify we want to calculate hash of file here and compare with the stored hash
     if filepath != "":
-        validation = (
-            True if tx_string == calculate_hash_of_file_via_path(filepath) else False
-        )
-    elif hash_value != "":
-        validation = True if tx_string == hash_value else False
+        with metrics.phase("hash"):
+            hash_value = hash_file_for_payload(filepath, input_data)
+    validation = compare_with_input_data(input_data, hash_value, proof)
 
     result = {"timestamp": timestamp_string, "verified": validation}
     return result
+
+
+def verify_many(
+    web3_connection,
+    items,
+    batch_size=100,
+    max_workers=4,
+    block_cache=block_timestamp_cache,
+    tx_index=None,
+):
+    """Verifies many hash values at once. Transactions and blocks are looked up with JSON-RPC batch requests.
+    Unlike ``verify_via_transaction``, a transaction that cannot be found does not stop the execution, it is reported in the result of the item instead.
+
+    Args:
+        web3_connection (Web3 object): The web3 connection, initialized via ' Web3(Web3.HTTPProvider( ))'.\n
+        items (list): (tx_hash, hash_value) pairs, or (tx_hash, hash_value, proof) for batch notarizations.\n
+        batch_size (int, optional): Maximum number of requests per batch (defaults to 100).\n
+        max_workers (int, optional): Maximum number of batches sent at the same time (defaults to 4).\n
+        block_cache (BlockTimestampCache, optional): Cache of block timestamps (defaults to the cache shared in the process). None disables caching.\n
+        tx_index (NotarizationIndex, optional): Local index of transactions. Final transactions are taken from it instead of the node, fetched transactions are added to it (defaults to None).
+
+    Returns:
+        list: One dictionary per item, in the order of the items, with keys "tx_hash", "timestamp" and "verified". If the transaction could not be looked up or its data could not be read, "verified" is False and the key "error" explains why (and "timestamp" is None if it could not be looked up).
+    """
+    from batch_rpc import batch_request
+
+    # every transaction and block is only looked up once
+    tx_hashes = list(dict.fromkeys(item[0] for item in items))
+    # input data and timestamp of transactions that are known, by tx_hash
+    known_txs = {}
+    if tx_index is not None:
+        for tx_hash in tx_hashes:
+            indexed_tx = tx_index.get(tx_hash)
+            if indexed_tx is not None and indexed_tx["final"]:
+                known_txs[tx_hash] = indexed_tx
+    missing_tx_hashes = [tx_hash for tx_hash in tx_hashes if tx_hash not in known_txs]
+    tx_responses = batch_request(
+        web3_connection,
+        [("eth_getTransactionByHash", [tx_hash]) for tx_hash in missing_tx_hashes],
+        batch_size=batch_size,
+        max_workers=max_workers,
+    )
+    fetched_txs = dict(zip(missing_tx_hashes, tx_responses))
+    block_numbers = list(
+        dict.fromkeys(
+            to_int(response["result"]["blockNumber"])
+            for response in tx_responses
+            if response.get("result") is not None
+            and response["result"]["blockNumber"] is not None
+        )
+    )
+    timestamps = {}
+    if block_cache is not None and block_numbers:
+        chain_id = block_cache.chain_id(web3_connection)
+        for number in block_numbers:
+            timestamp = block_cache.get(chain_id, number)
+            if timestamp is not None:
+                timestamps[number] = timestamp
+    missing_block_numbers = [
+        number for number in block_numbers if number not in timestamps
+    ]
+    block_requests = [
+        ("eth_getBlockByNumber", [hex(number), False])
+        for number in missing_block_numbers
+    ]
+    # the latest block number tells the caches which blocks are deep enough to keep
+    need_latest_block_number = len(block_numbers) > 0 and (
+        tx_index is not None
+        or (block_cache is not None and len(missing_block_numbers) > 0)
+    )
+    if need_latest_block_number:
+        block_requests.append(("eth_blockNumber", []))
+    block_responses = batch_request(
+        web3_connection,
+        block_requests,
+        batch_size=batch_size,
+        max_workers=max_workers,
+    )
+    latest_block_number = None
+    if need_latest_block_number:
+        latest_block_number = block_responses.pop().get("result")
+        if latest_block_number is not None:
+            latest_block_number = to_int(latest_block_number)
+            if block_cache is not None:
+                block_cache.update_latest_block_number(chain_id, latest_block_number)
+    block_errors = {}
+    for number, response in zip(missing_block_numbers, block_responses):
+        if response.get("result") is not None:
+            timestamps[number] = to_int(response["result"]["timestamp"])
+            if block_cache is not None:
+                block_cache.put(chain_id, number, timestamps[number])
+        else:
+            block_errors[number] = response.get(
+                "error", f"Could not find block ({number})."
+            )
+
+    for tx_hash, response in fetched_txs.items():
+        fetched_tx = response.get("result")
+        if fetched_tx is None:
+            continue
+        block_number = fetched_tx["blockNumber"]
+        if block_number is None or to_int(block_number) not in timestamps:
+            continue
+        known_txs[tx_hash] = {
+            "input_data": get_input_data(fetched_tx),
+            "timestamp": timestamps[to_int(block_number)],
+        }
+        if tx_index is not None and latest_block_number is not None:
+            tx_index.put(
+                tx_hash,
+                known_txs[tx_hash]["input_data"],
+                to_int(block_number),
+                known_txs[tx_hash]["timestamp"],
+                latest_block_number,
+            )
+
+    results = []
+    for item in items:
+        tx_hash, hash_value = item[0], item[1]
+        proof = item[2] if len(item) > 2 else None
+        if tx_hash in known_txs:
+            result = {
+                "tx_hash": tx_hash,
+                "timestamp": format_timestamp(known_txs[tx_hash]["timestamp"]),
+            }
+            try:
+                result["verified"] = compare_with_input_data(
+                    known_txs[tx_hash]["input_data"], hash_value, proof
+                )
+            except ValueError as e:
+                # e.g. a compact payload of an unknown version
+                result["verified"] = False
+                result["error"] = str(e)
+            results.append(result)
+        elif fetched_txs[tx_hash].get("result") is None:
+            error = fetched_txs[tx_hash].get(
+                "error", f"Could not find transaction with hash ({tx_hash})."
+            )
+            results.append(
+                {
+                    "tx_hash": tx_hash,
+                    "timestamp": None,
+                    "verified": False,
+                    "error": error,
+                }
+            )
+        else:
+            block_number = fetched_txs[tx_hash]["result"]["blockNumber"]
+            if block_number is not None and to_int(block_number) in block_errors:
+                # the transaction is mined, but its block could not be fetched
+                error = block_errors[to_int(block_number)]
+                if isinstance(error, dict):
+                    error = error.get("message", error)
+                error = f"Could not look up block ({to_int(block_number)}) of transaction ({tx_hash}): {error}"
+            else:
+                error = f"Transaction ({tx_hash}) has not been mined yet."
+            results.append(
+                {
+                    "tx_hash": tx_hash,
+                    "timestamp": None,
+                    "verified": False,
+                    "error": error,
+                }
+            )
+    return results
+
+
+def hash_file_for_payload(filepath, input_data):
+    """Hashes a file with the algorithm the payload of a transaction was created with: the chunked digest (see ``chunked_digest.py``) for "chunked-merkle-sha256", otherwise the flat SHA256 hash.
+    Args:
+        filepath (string): Path to the file.\n
+        input_data (string): The input data of the transaction as hex string.
+
+    Returns:
+        string: The hash of the file as hex string.
+    """
+    try:
+        algorithm = decode_payload(input_data)["algorithm"]
+    except (ValueError, UnicodeDecodeError):
+        algorithm = None
+    if algorithm == CHUNKED_ALGORITHM:
+        return chunked_digest(filepath)["root"]
+    return calculate_hash_of_file_via_path(filepath)
+
+
+def compare_with_input_data(input_data, hash_value, proof=None):
+    """Compares a hash value with the data of a transaction, which is either a compact payload or legacy text.
+    Args:
+        input_data (string): The input data of the transaction as hex string.\n
+        hash_value (string): The hash value to compare.\n
+        proof (list, optional): Merkle inclusion proof, if the transaction stores the root of a Merkle tree.
+
+    Returns:
+        boolean: True if the hash value matches.
+    """
+    payload = decode_payload(input_data)
+    if payload["format"] == "text":
+        return compare_with_input_string(payload["hash_value"], hash_value, proof)
+    # hashes are compared case-insensitively, the payload only contains the bytes
+    if proof is not None:
+        return verify_merkle_proof(hash_value, proof, payload["hash_value"])
+    return payload["hash_value"] == hash_value.lower()
+
+
+def compare_with_input_string(tx_string, hash_value, proof=None):
+    """Compares a hash value with the string stored in a transaction.
+    Args:
+        tx_string (string): The string stored in the transaction.\n
+        hash_value (string): The hash value to compare.\n
+        proof (list, optional): Merkle inclusion proof, if the transaction stores the root of a Merkle tree.
+
+    Returns:
+        boolean: True if the hash value matches.
+    """
+    if proof is not None:
+        # batch notarization: tx_string is the Merkle root
+        return verify_merkle_proof(hash_value, proof, tx_string)
+    return True if tx_string == hash_value else False
+
+
+def get_input_data(fetched_tx):
+    """Gets the input data of a transaction.
+    Args:
+        fetched_tx (dictionary): The transaction as returned by the node.
+
+    Returns:
+        string: The input data as hex string.
+    """
+    # local test chains return the input data under the key "data"
+    tx_input = fetched_tx["input"] if "input" in fetched_tx else fetched_tx["data"]
+    if isinstance(tx_input, str):
+        return tx_input
+    return "0x" + bytes(tx_input).hex()
+
+
+def format_timestamp(timestamp):
+    """Formats the timestamp of a block.
+    Args:
+        timestamp (int): Unix timestamp.
+
+    Returns:
+        string: The timestamp in UTC, formatted as "%Y-%m-%d %H:%M:%S".
+    """
+    return datetime.utcfromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def to_int(value):
+    """Converts a number returned by the node (either int or hex string) to int."""
+    if isinstance(value, str):
+        return int(value, 16)
+    return value
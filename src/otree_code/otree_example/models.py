@@ -12,17 +12,20 @@ from otree.api import models
 from otree.api import widgets
 
 sys.path.insert(0, os.path.abspath("../notarization_code"))
-from notarization import (
-    create_notarization_transaction,
-    send_transaction,
-)
-from utils import (
-    create_transaction_etherscan_link,
-    establish_infura_connection,
-)
+# only modules that do not load web3, the modules that send are imported once the first notarization is sent,
+# so that starting an oTree worker does not have to wait for web3, eth_account and requests
+from otree_hashing import build_payload
+from utils import create_transaction_etherscan_link
 
 sys.path.insert(0, os.path.abspath(".."))
-from blockchain_config import INFURA_URL, ACCOUNT, PK
+import blockchain_config
+from blockchain_config import INFURA_URL
+
+# several accounts can be configured as ACCOUNTS = [(address, private_key), ...], otherwise ACCOUNT and PK are used
+if hasattr(blockchain_config, "ACCOUNTS"):
+    SENDER_ACCOUNTS = blockchain_config.ACCOUNTS
+else:
+    SENDER_ACCOUNTS = [(blockchain_config.ACCOUNT, blockchain_config.PK)]
 
 author = "Stefan Timmermann"
 
@@ -75,56 +78,158 @@ class Player(BasePlayer):
     del j  # do this because otherwise you get NonModelFieldAttr: Player has attribute "j", which is not a model field, and will therefore not be saved to the database.
 
     tx_hash = models.StringField()  # transaction hash of the placed transaction
+    # id of the notarization in the outbox, exported so that the tx_hash can be looked up if it was not sent yet when the player was saved (see ``resolve_tx_hashes``)
+    outbox_id = models.IntegerField()
 
     def notarize_player_input(self):
         """Function to notarize the input of the player.
         Try-except is there to ensure the app does not get stuck if there is an error when sending stuff to blockchain.
         """
-        # the data the participant put in, as one list
-        input_data = str(self.participant.vars["mpl_decisions_made"])
         # payload is the string to be saved in blockchain transaction
-        payload = (
-            "participant_code: "
-            + str(self.participant.code)
-            + " time_started: "
-            + str(self.participant.time_started)
-            + " decisions: "
-            + input_data
+        # (built by the same function that rebuilds it from the data export for verification)
+        payload = build_payload(
+            participant_code=self.participant.code,
+            time_started=self.participant.time_started,
+            decisions=self.participant.vars["mpl_decisions_made"],
         )
         # hash the payload
         payload_hash = str(hashlib.sha256(payload.encode()).hexdigest())
         try:
-            tx_hash_to_store = notarize(" - ".join([payload, payload_hash]))
-            self.tx_hash = tx_hash_to_store
+            self.outbox_id = notarize(" - ".join([payload, payload_hash]))
+            self.tx_hash = "Queued for notarization."
         # if any exceptions are raised, just store the following as tx_hash:
         except:
             self.tx_hash = "Notarization failed. Please review logs."
 
+    def update_tx_hash(self):
+        """Function to store the tx_hash once the notarization was sent from the outbox.
+        The outbox keeps the hash of the latest replacement with higher fees and, once mined, of the transaction that was mined.
+        Called when the Results page is shown and again for every player by ``custom_export``, since the transaction is usually sent (and replaced) only later on.
+
+        Returns:
+            dictionary: The outbox item of the notarization (see ``Outbox.get``), None if there is none. \n
+        """
+        if self.outbox_id is None:
+            return None
+        item = get_outbox().get(self.outbox_id)
+        if item is None:
+            return None
+        if item["tx_hash"] is not None:
+            self.tx_hash = item["tx_hash"]
+        elif item["state"] == "failed":
+            self.tx_hash = "Notarization failed. Please review logs."
+        return item
+
+
+# shared by all participants: notarizations are first recorded in the outbox and then sent in the background,
+# spread over the configured accounts, so that the page does not have to wait for the node and nothing is lost if it is not reachable
+# the outbox lies in the oTree project directory, whatever the working directory is, unless OUTBOX_PATH is set in the blockchain_config
+OUTBOX_PATH = getattr(
+    blockchain_config,
+    "OUTBOX_PATH",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "notarization_outbox.sqlite3",
+    ),
+)
+outbox = None
+outbox_worker = None
+sender_pool = None
+# notarizations that are not mined within 30 seconds are sent again with higher fees, up to 200 gwei per gas
+FEE_BUMP_MAX_FEE_PER_GAS = 200 * 10**9
+FEE_BUMP_WAIT = 30
+
+
+def report_confirmation(tx_hash, status, tx_receipt):
+    """Callback of the confirmation tracker, reports the outcome of a notarization in the logs."""
+    if tx_receipt is not None:
+        # the mined transaction may be a replacement with higher fees
+        tx_hash = tx_receipt["transactionHash"].hex()
+    print(
+        f"Notarization transaction {status}. You can look up your transaction under the following Etherscan link: \n",
+        create_transaction_etherscan_link(tx_hash, "ropsten"),
+    )
+
+
+def get_outbox():
+    """Function to open the outbox the notarizations are recorded in, once per process.
+
+    Returns:
+        Outbox: The outbox. \n
+    """
+    global outbox
+    from outbox import Outbox
+
+    if outbox is None:
+        outbox = Outbox(OUTBOX_PATH)
+    return outbox
+
+
+def custom_export(players):
+    """Custom data export of oTree (in the data tab of the admin pages), with the columns needed for verification.
+    The tx_hash of every player is updated from the outbox first and saved with the player, so once a notarization is mined it is the hash of the mined transaction, also in the regular data export."""
+    yield ["participant.code", "participant.time_started"] + [
+        "player." + decision for decision in Constants.decisions
+    ] + ["player.outbox_id", "player.tx_hash", "player.notarization_state"]
+    for player in players:
+        item = player.update_tx_hash()
+        state = item["state"] if item is not None else None
+        yield [player.participant.code, player.participant.time_started] + [
+            getattr(player, decision) for decision in Constants.decisions
+        ] + [player.outbox_id, player.tx_hash, state]
+
+
+def start_outbox_worker():
+    """Function to start sending the notarizations recorded in the outbox in the background. Needs a connection to the node."""
+    global sender_pool, outbox_worker
+    from confirmation import ConfirmationTracker
+    from connection import get_connection
+    from fees import FeeBumpPolicy
+    from outbox import OutboxWorker
+    from sender_pool import SenderPool
+    from signer import Signer
+
+    # the connection is shared by all participants and only re-checked every now and then
+    web3_connection = get_connection(INFURA_URL)
+    sender_pool = SenderPool(
+        web3_connection,
+        # the keys are parsed once instead of for every transaction
+        [(account, Signer(private_key)) for account, private_key in SENDER_ACCOUNTS],
+        confirmation_tracker=ConfirmationTracker(web3_connection),
+        fee_bump_policy=FeeBumpPolicy(
+            max_fee_per_gas=FEE_BUMP_MAX_FEE_PER_GAS, wait=FEE_BUMP_WAIT
+        ),
+    )
+    outbox_worker = OutboxWorker(
+        get_outbox(),
+        sender_pool,
+        # the connection may have been replaced after a failure
+        connect=lambda: get_connection(INFURA_URL),
+        callback=report_confirmation,
+    )
+    outbox_worker.start()
+
 
 # just giving this a shot
 def notarize(string_to_save):
     """Function to do notarizatin within oTree app.
+    The string is recorded in the outbox first and sent in the background, the outcome is reported in the logs once it is known.
+    If the node is not reachable, it is sent later on.
 
     Args:
         string_to_save (string): The string to save in the transaction. \n
 
     Returns:
-        string: The tx_hash of the transaction where the hash has been saved. \n
+        int: The id of the notarization in the outbox, see ``Player.update_tx_hash``. \n
     """
+    from connection import connection_manager
 
-    web3_connection = establish_infura_connection(INFURA_URL)
-    account = ACCOUNT
-    private_key = PK
-    tx = create_notarization_transaction(
-        web3_connection=web3_connection,
-        account=account,
-        string_to_save=string_to_save,
-    )
-    tx_hash = send_transaction(
-        web3_connection=web3_connection, transaction=tx, private_key=private_key
-    )["tx_hash"]
-    print(
-        "You can look up your transaction under the following Etherscan link: \n",
-        create_transaction_etherscan_link(tx_hash, "ropsten"),
-    )
-    return tx_hash
+    outbox_id = get_outbox().add(string_to_save)
+    if outbox_worker is None:
+        try:
+            start_outbox_worker()
+        except Exception as e:
+            # the notarization is recorded, the worker is started with the next one
+            print(f"Could not start sending notarizations: {e}")
+            connection_manager.reset(INFURA_URL)
+    return outbox_id
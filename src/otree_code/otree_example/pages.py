@@ -38,7 +38,11 @@ class MPL(Page):
 
 
 class Results(Page):
-    pass
+    def vars_for_template(self):
+        # the notarization may have been replaced with higher fees in the meantime
+        if Constants.blockchain_notarization == True:
+            self.player.update_tx_hash()
+        return dict()
 
 
 page_sequence = [Intro, MPL, Results]
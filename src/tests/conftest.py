@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.fixture
+def local_chain():
+    """
+    Local in-process chain (eth-tester) with a funded account, so tests do not depend on infura.
+    """
+    web3 = pytest.importorskip("web3")
+    pytest.importorskip("eth_tester")
+    provider = web3.EthereumTesterProvider()
+    account_key = provider.ethereum_tester.backend.account_keys[0]
+    return {
+        "web3_connection": web3.Web3(provider),
+        "account": account_key.public_key.to_checksum_address(),
+        "private_key": account_key.to_hex(),
+    }
@@ -0,0 +1,156 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from balance_ledger import BalanceLedger
+from nonce_manager import NonceManager
+from notarization import (
+    AccountBalanceInsufficient,
+    create_notarization_transaction,
+    send_transaction,
+)
+
+
+class CountingEth:
+    """
+    Wraps web3_connection.eth and counts the balance lookups.
+    """
+
+    def __init__(self, eth):
+        self.eth = eth
+        self.balance_calls = 0
+
+    def getBalance(self, account):
+        self.balance_calls += 1
+        return self.eth.getBalance(account)
+
+    def __getattr__(self, name):
+        return getattr(self.eth, name)
+
+
+def test_balance_is_fetched_once(local_chain):
+    """
+    Creating several transactions asks the node for the balance only once and reserves every fee locally.
+    """
+    web3_connection = local_chain["web3_connection"]
+    account = local_chain["account"]
+    balance = web3_connection.eth.getBalance(account)
+    ledger = BalanceLedger(web3_connection)
+    counting_eth = CountingEth(web3_connection.eth)
+    ledger.web3_connection = type("Connection", (), {"eth": counting_eth})()
+    nonce_manager = NonceManager(web3_connection)
+    for i in range(3):
+        create_notarization_transaction(
+            web3_connection=web3_connection,
+            account=account,
+            string_to_save=f"Test {i}",
+            gas_limit=30000,
+            gas_price=1,
+            nonce_manager=nonce_manager,
+            balance_ledger=ledger,
+        )
+    assert counting_eth.balance_calls == 1
+    assert ledger.available(account) == balance - 3 * 30000 * 10**9
+
+
+def test_insufficient_balance_from_ledger(local_chain):
+    """
+    A transaction whose worst-case fee exceeds the unreserved balance is rejected and its nonce is handed out again.
+    """
+    web3_connection = local_chain["web3_connection"]
+    account = local_chain["account"]
+    ledger = BalanceLedger(web3_connection)
+    nonce_manager = NonceManager(web3_connection)
+    gas_price = web3_connection.eth.getBalance(account) // (30000 * 10**9)
+    create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=account,
+        string_to_save="Test",
+        gas_limit=30000,
+        gas_price=gas_price,
+        nonce_manager=nonce_manager,
+        balance_ledger=ledger,
+    )
+    with pytest.raises(AccountBalanceInsufficient):
+        create_notarization_transaction(
+            web3_connection=web3_connection,
+            account=account,
+            string_to_save="Test",
+            gas_limit=30000,
+            gas_price=gas_price,
+            nonce_manager=nonce_manager,
+            balance_ledger=ledger,
+        )
+    ledger.release(account, 0)
+    assert nonce_manager.next_nonce(account) == 0
+
+
+def test_reservation_is_settled_after_receipt(local_chain):
+    """
+    Once the transaction is mined, the reservation is dropped and the actual balance is fetched again.
+    """
+    web3_connection = local_chain["web3_connection"]
+    account = local_chain["account"]
+    ledger = BalanceLedger(web3_connection)
+    tx = create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=account,
+        string_to_save="Test",
+        gas_limit=30000,
+        gas_price=1,
+        balance_ledger=ledger,
+    )
+    send_transaction(
+        web3_connection=web3_connection,
+        transaction=tx,
+        private_key=local_chain["private_key"],
+        balance_ledger=ledger,
+    )
+    assert ledger.available(account) == web3_connection.eth.getBalance(account)
+
+
+def test_refresh_drops_mined_reservations(local_chain):
+    """
+    Reservations of transactions that were mined without being settled are dropped when the balance is fetched again.
+    """
+    web3_connection = local_chain["web3_connection"]
+    account = local_chain["account"]
+    ledger = BalanceLedger(web3_connection)
+    tx = create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=account,
+        string_to_save="Test",
+        gas_limit=30000,
+        gas_price=1,
+        balance_ledger=ledger,
+    )
+    send_transaction(
+        web3_connection=web3_connection,
+        transaction=tx,
+        private_key=local_chain["private_key"],
+    )
+    ledger.reserve(account, 1, 10)
+    ledger.refresh(account)
+    assert ledger.available(account) == web3_connection.eth.getBalance(account) - 10
+
+
+def test_replacement_takes_the_place_of_its_reservation():
+    """
+    Reserving again for the same nonce replaces the earlier reservation instead of adding to it.
+    """
+
+    class Eth:
+        def getTransactionCount(self, account):
+            return 0
+
+        def getBalance(self, account):
+            return 100
+
+    ledger = BalanceLedger(type("Connection", (), {"eth": Eth()})())
+    ledger.reserve("0xA", 0, 60)
+    ledger.reserve("0xA", 0, 66)
+    assert ledger.available("0xA") == 34
+    with pytest.raises(AccountBalanceInsufficient):
+        ledger.reserve("0xA", 1, 35)
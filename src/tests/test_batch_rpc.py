@@ -0,0 +1,188 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from batch_rpc import batch_request
+
+
+@pytest.fixture
+def http_node(local_chain):
+    """
+    Serves the local chain via HTTP (with support for batch requests) and counts the HTTP requests.
+    """
+    from web3 import Web3
+
+    local_web3 = local_chain["web3_connection"]
+    received = []
+    # requests of these methods are answered with an error without id
+    failing_methods = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            received.append(payload)
+            # single requests (e.g. eth_chainId) are answered like a batch of one
+            single = isinstance(payload, dict)
+            responses = []
+            for request in [payload] if single else payload:
+                if request["method"] in failing_methods:
+                    responses.append(
+                        {
+                            "jsonrpc": "2.0",
+                            "id": None,
+                            "error": {"code": -32600, "message": "Invalid request"},
+                        }
+                    )
+                    continue
+                try:
+                    result = local_web3.manager.request_blocking(
+                        request["method"], request["params"]
+                    )
+                    responses.append(
+                        {
+                            "jsonrpc": "2.0",
+                            "id": request["id"],
+                            "result": json.loads(Web3.toJSON(result)),
+                        }
+                    )
+                except Exception as e:
+                    responses.append(
+                        {
+                            "jsonrpc": "2.0",
+                            "id": request["id"],
+                            "error": {"code": -32000, "message": str(e)},
+                        }
+                    )
+            # answer in reverse order, ids have to be matched
+            body = json.dumps(responses[0] if single else responses[::-1]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield {
+        "web3_connection": Web3(
+            Web3.HTTPProvider(f"http://127.0.0.1:{server.server_port}")
+        ),
+        "received": received,
+        "failing_methods": failing_methods,
+    }
+    server.shutdown()
+
+
+def test_batch_request_over_http(http_node):
+    """
+    Requests are sent in batches and the responses come back in the order of the requests.
+    """
+    requests_to_send = [("eth_getBlockByNumber", [hex(0), False])] + [
+        ("eth_getTransactionByHash", ["0x" + str(i) * 64]) for i in range(4)
+    ]
+    responses = batch_request(
+        http_node["web3_connection"], requests_to_send, batch_size=2, max_workers=1
+    )
+    assert len(http_node["received"]) == 3
+    assert responses[0]["result"]["number"] == 0
+    assert responses[1:] == [{"result": None}] * 4
+
+
+def test_verify_many_over_http(http_node, local_chain):
+    """
+    verify_many gives the same results via batch requests as via the local chain directly.
+    """
+    from notarization import create_notarization_transaction, send_transaction
+    from verification import verify_many
+
+    tx_hash = send_transaction(
+        web3_connection=local_chain["web3_connection"],
+        transaction=create_notarization_transaction(
+            web3_connection=local_chain["web3_connection"],
+            account=local_chain["account"],
+            string_to_save="abc",
+            gas_price=1,
+        ),
+        private_key=local_chain["private_key"],
+    )["tx_hash"]
+    items = [(tx_hash, "abc"), (tx_hash, "abd")]
+    assert verify_many(http_node["web3_connection"], items) == verify_many(
+        local_chain["web3_connection"], items
+    )
+    # one batch for the transactions, one for the blocks and, once per connection, the chain id
+    assert len(http_node["received"]) == 3
+    verify_many(http_node["web3_connection"], items)
+    assert len(http_node["received"]) == 5
+
+
+def test_batch_requests_are_recorded_per_method(http_node):
+    """
+    Besides the batches, every request in them is recorded under its method.
+    """
+    from instrumentation import metrics
+
+    metrics.reset()
+    batch_request(
+        http_node["web3_connection"],
+        [("eth_getBlockByNumber", [hex(0), False]), ("eth_getBalance", ["0x12"])]
+        + [("eth_getTransactionByHash", ["0x" + str(i) * 64]) for i in range(3)],
+        batch_size=2,
+        max_workers=1,
+    )
+    rpc = metrics.stats()["rpc"]
+    assert rpc["batch"]["count"] == 3
+    assert rpc["eth_getBlockByNumber"]["count"] == 1
+    assert rpc["eth_getTransactionByHash"]["count"] == 3
+    assert rpc["eth_getTransactionByHash"]["errors"] == 0
+    # the local chain rejects the invalid address
+    assert rpc["eth_getBalance"]["errors"] == 1
+
+
+def test_error_without_id_fails_the_batch(http_node):
+    """
+    An error response without id does not break the batch request, the unanswered requests of its batch get the error.
+    """
+    http_node["failing_methods"].add("eth_getBalance")
+    responses = batch_request(
+        http_node["web3_connection"],
+        [("eth_getBalance", ["0x12"]), ("eth_getBlockByNumber", [hex(0), False])]
+        + [("eth_getTransactionByHash", ["0x" + str(i) * 64]) for i in range(2)],
+        batch_size=2,
+        max_workers=1,
+    )
+    assert responses[0] == {"error": {"code": -32600, "message": "Invalid request"}}
+    assert responses[1]["result"]["number"] == 0
+    assert responses[2:] == [{"result": None}] * 2
+
+
+def test_verify_many_reports_failed_block_lookup(http_node, local_chain):
+    """
+    A mined transaction whose block could not be fetched is reported as a lookup error, not as not mined yet.
+    """
+    from notarization import create_notarization_transaction, send_transaction
+    from verification import verify_many
+
+    tx_hash = send_transaction(
+        web3_connection=local_chain["web3_connection"],
+        transaction=create_notarization_transaction(
+            web3_connection=local_chain["web3_connection"],
+            account=local_chain["account"],
+            string_to_save="abc",
+            gas_price=1,
+        ),
+        private_key=local_chain["private_key"],
+    )["tx_hash"]
+    http_node["failing_methods"].add("eth_getBlockByNumber")
+    result = verify_many(http_node["web3_connection"], [(tx_hash, "abc")])[0]
+    assert result["verified"] is False
+    assert result["error"].startswith("Could not look up block")
+    assert "Invalid request" in result["error"]
@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/benchmarks"))
+from common import percentile
+from run_benchmarks import compare
+
+
+def test_percentile():
+    """
+    Percentiles are interpolated linearly between the closest ranks.
+    """
+    values = [4, 1, 3, 2, 5]
+    assert percentile(values, 0) == 1
+    assert percentile(values, 50) == 3
+    assert percentile(values, 100) == 5
+    assert percentile(values, 95) == pytest.approx(4.8)
+    assert percentile([], 50) is None
+
+
+def test_compare_with_baseline():
+    """
+    Lower throughput and higher p95 latency beyond the tolerance are reported as regressions, smaller changes are not.
+    """
+    baseline = {"hashing": {"1024": {"per_second": 100, "p95_ms": 10, "p50_ms": 5}}}
+    results = {"hashing": {"1024": {"per_second": 90, "p95_ms": 13, "p50_ms": 50}}}
+    assert compare(baseline, results, tolerance=0.2) == [
+        "hashing/1024/p95_ms rose from 10.00 to 13.00"
+    ]
+    assert compare(baseline, results, tolerance=0.5) == []
+
+
+def test_benchmarks_run(local_chain):
+    """
+    Both benchmarks run against the local chain and report every step.
+    """
+    import bench_chain
+    import bench_hashing
+
+    chain_results = bench_chain.run(transactions=3)
+    assert set(chain_results) == {
+        "create_notarization_transaction",
+        "send_transaction",
+        "verify_via_transaction",
+    }
+    assert all(summary["count"] == 3 for summary in chain_results.values())
+    hashing_results = bench_hashing.run(sizes=[1024], repetitions=2)
+    assert hashing_results["1024"]["mib_per_second"] > 0
+
+
+def test_import_benchmark():
+    """
+    Import times are measured in fresh processes, and a module that newly loads web3 is reported as regression.
+    """
+    import bench_imports
+
+    results = bench_imports.run(modules=["hashing"], repetitions=1)
+    assert results["hashing"]["count"] == 1
+    assert results["hashing"]["loaded"] == []
+    assert compare(
+        {"imports": results},
+        {"imports": {"hashing": dict(results["hashing"], loaded=["web3"])}},
+    ) == ["imports/hashing/loaded now includes web3"]
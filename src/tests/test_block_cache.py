@@ -0,0 +1,89 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from block_cache import BlockTimestampCache
+
+
+def test_only_confirmed_blocks_are_cached():
+    """
+    Blocks are only cached once enough blocks have been mined on top of them.
+    """
+    cache = BlockTimestampCache(confirmation_depth=12)
+    cache.update_latest_block_number(1, 100)
+    cache.put(1, 90, 1000)
+    assert cache.get(1, 90) is None
+    cache.put(1, 88, 1000)
+    assert cache.get(1, 88) == 1000
+
+
+def test_blocks_are_cached_per_chain():
+    """
+    The same block number on another chain is neither confirmed nor returned from the cache.
+    """
+    cache = BlockTimestampCache(confirmation_depth=12)
+    cache.update_latest_block_number(1, 100)
+    cache.put(1, 50, 1000)
+    cache.put(11155111, 50, 2000)
+    assert cache.get(11155111, 50) is None
+    cache.update_latest_block_number(11155111, 100)
+    cache.put(11155111, 50, 2000)
+    assert cache.get(1, 50) == 1000
+    assert cache.get(11155111, 50) == 2000
+
+
+def test_least_recently_used_block_is_evicted():
+    """
+    Once the cache is full, the block used least recently is evicted.
+    """
+    cache = BlockTimestampCache(max_size=2, confirmation_depth=0)
+    cache.update_latest_block_number(1, 10)
+    cache.put(1, 1, 100)
+    cache.put(1, 2, 200)
+    cache.get(1, 1)
+    cache.put(1, 3, 300)
+    assert len(cache) == 2
+    assert cache.get(1, 2) is None
+    assert cache.get(1, 1) == 100
+    assert cache.get(1, 3) == 300
+
+
+def test_verification_uses_cache(local_chain):
+    """
+    Once the block of a transaction is confirmed, verifying it again does not fetch the block again.
+    """
+    from notarization import create_notarization_transaction, send_transaction
+    from verification import verify_many, verify_via_transaction
+
+    web3_connection = local_chain["web3_connection"]
+    tx_hash = send_transaction(
+        web3_connection=web3_connection,
+        transaction=create_notarization_transaction(
+            web3_connection=web3_connection,
+            account=local_chain["account"],
+            string_to_save="abc",
+            gas_price=1,
+        ),
+        private_key=local_chain["private_key"],
+    )["tx_hash"]
+    cache = BlockTimestampCache(confirmation_depth=3)
+    verify_via_transaction(
+        web3_connection, tx_hash, hash_value="abc", block_cache=cache
+    )
+    assert len(cache) == 0
+
+    web3_connection.provider.ethereum_tester.mine_blocks(3)
+    first = verify_via_transaction(
+        web3_connection, tx_hash, hash_value="abc", block_cache=cache
+    )
+    assert len(cache) == 1
+    block_number = web3_connection.eth.getTransaction(tx_hash)["blockNumber"]
+    # a changed timestamp in the cache shows that the block is not fetched again
+    cache._timestamps[(web3_connection.eth.chain_id, block_number)] = 0
+    second = verify_via_transaction(
+        web3_connection, tx_hash, hash_value="abc", block_cache=cache
+    )
+    assert first["timestamp"] != second["timestamp"] == "1970-01-01 00:00:00"
+    assert verify_many(web3_connection, [(tx_hash, "abc")], block_cache=cache)[0][
+        "timestamp"
+    ] == ("1970-01-01 00:00:00")
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from chunked_digest import (
+    ALGORITHM,
+    chunk_root,
+    chunked_digest,
+    update_chunked_digest,
+    verify_chunked_digest,
+)
+
+CHUNK_SIZE = 1024
+
+
+def test_chunked_digest(tmp_path):
+    """
+    Every chunk is hashed on its own, the root is the same no matter how many threads hash, and an empty file is one empty chunk.
+    """
+    path = tmp_path / "data.bin"
+    content = os.urandom(10 * CHUNK_SIZE + 100)
+    path.write_bytes(content)
+    digest = chunked_digest(str(path), chunk_size=CHUNK_SIZE, max_workers=4)
+    assert digest["algorithm"] == ALGORITHM
+    assert digest["size"] == len(content)
+    assert digest["chunk_hashes"] == [
+        hashlib.sha256(content[i : i + CHUNK_SIZE]).hexdigest()
+        for i in range(0, len(content), CHUNK_SIZE)
+    ]
+    assert digest["root"] == chunk_root(digest["chunk_hashes"])
+    assert (
+        chunked_digest(str(path), chunk_size=CHUNK_SIZE, max_workers=1)["root"]
+        == digest["root"]
+    )
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    assert chunked_digest(str(empty))["chunk_hashes"] == [
+        hashlib.sha256(b"").hexdigest()
+    ]
+
+
+@pytest.mark.parametrize("initial_size", [0, 3 * CHUNK_SIZE, 3 * CHUNK_SIZE + 10])
+def test_update_after_append(tmp_path, initial_size):
+    """
+    Updating the digest after data was appended gives the same digest as hashing the whole file again.
+    """
+    path = tmp_path / "export.csv"
+    path.write_bytes(os.urandom(initial_size))
+    digest = chunked_digest(str(path), chunk_size=CHUNK_SIZE)
+    with open(path, "ab") as f:
+        f.write(os.urandom(2 * CHUNK_SIZE + 5))
+    assert update_chunked_digest(digest, str(path)) == chunked_digest(
+        str(path), chunk_size=CHUNK_SIZE
+    )
+
+
+def test_verification_reports_mismatching_ranges(tmp_path):
+    """
+    A changed file is reported with the ranges of chunks and bytes that differ, an unchanged file is verified.
+    """
+    path = tmp_path / "data.bin"
+    content = bytearray(os.urandom(10 * CHUNK_SIZE))
+    path.write_bytes(content)
+    digest = chunked_digest(str(path), chunk_size=CHUNK_SIZE)
+    assert verify_chunked_digest(str(path), digest) == {
+        "verified": True,
+        "mismatches": [],
+        "root": digest["root"],
+    }
+    # change chunks 2 and 3 and append a chunk
+    content[2 * CHUNK_SIZE + 5] ^= 1
+    content[3 * CHUNK_SIZE] ^= 1
+    path.write_bytes(content + b"appended")
+    report = verify_chunked_digest(str(path), digest)
+    assert not report["verified"]
+    assert report["mismatches"] == [
+        {"chunks": [2, 3], "bytes": [2 * CHUNK_SIZE, 4 * CHUNK_SIZE]},
+        {"chunks": [10, 10], "bytes": [10 * CHUNK_SIZE, 10 * CHUNK_SIZE + 8]},
+    ]
+    with pytest.raises(ValueError):
+        verify_chunked_digest(str(path), dict(digest, root="00" * 32))
+
+
+def test_verify_via_transaction_with_chunked_digest(local_chain, tmp_path):
+    """
+    A file notarized with its chunked digest is verified by the algorithm id of the payload.
+    """
+    from notarization import create_notarization_transaction, send_transaction
+    from payload import encode_payload
+    from verification import verify_via_transaction
+
+    web3_connection = local_chain["web3_connection"]
+    path = tmp_path / "data.bin"
+    path.write_bytes(os.urandom(3 * 1024 * 1024))
+    tx = create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=local_chain["account"],
+        string_to_save=encode_payload(
+            chunked_digest(str(path))["root"], algorithm=ALGORITHM
+        ),
+    )
+    tx_hash = send_transaction(
+        web3_connection=web3_connection,
+        transaction=tx,
+        private_key=local_chain["private_key"],
+    )["tx_hash"]
+    assert verify_via_transaction(
+        web3_connection, tx_hash, filepath=str(path), block_cache=None
+    )["verified"]
+    with open(path, "ab") as f:
+        f.write(b"x")
+    assert not verify_via_transaction(
+        web3_connection, tx_hash, filepath=str(path), block_cache=None
+    )["verified"]
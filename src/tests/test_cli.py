@@ -0,0 +1,197 @@
+import csv
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from cli import main
+
+
+@pytest.fixture
+def files(tmp_path):
+    """
+    Directory with a few files to notarize.
+    """
+    directory = tmp_path / "data"
+    directory.mkdir()
+    for i in range(5):
+        (directory / f"file_{i}.txt").write_text(f"content {i}")
+    return directory
+
+
+def run(local_chain, args):
+    from signer import Signer
+
+    return main(
+        args,
+        web3_connection=local_chain["web3_connection"],
+        account=local_chain["account"],
+        signer=Signer(local_chain["private_key"]),
+    )
+
+
+@pytest.mark.parametrize("mode", ["batch", "single"])
+def test_notarize_and_verify(local_chain, files, tmp_path, mode):
+    """
+    All files of a directory are notarized and verified end-to-end, in both modes.
+    """
+    receipts = tmp_path / "receipts.json"
+    assert (
+        run(
+            local_chain,
+            [
+                "notarize",
+                str(files),
+                "--local",
+                "--mode",
+                mode,
+                "--output",
+                str(receipts),
+            ],
+        )
+        == 0
+    )
+    results = json.loads(receipts.read_text())
+    assert len(results) == 5
+    assert all(result["status"] == "confirmed" for result in results)
+    assert len({result["tx_hash"] for result in results}) == (
+        1 if mode == "batch" else 5
+    )
+    verification = tmp_path / "verification.csv"
+    assert (
+        run(
+            local_chain,
+            [
+                "verify",
+                str(files / "*.txt"),
+                "--local",
+                "--receipts",
+                str(receipts),
+                "--output",
+                str(verification),
+            ],
+        )
+        == 0
+    )
+    with open(verification, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 5
+    assert all(row["verified"] == "True" for row in rows)
+
+
+def test_verify_reports_changed_and_unknown_files(local_chain, files, tmp_path):
+    """
+    A changed file and a file that was never notarized fail the verification, the other files still pass.
+    """
+    receipts = tmp_path / "receipts.csv"
+    run(local_chain, ["notarize", str(files), "--local", "--output", str(receipts)])
+    (files / "file_0.txt").write_text("changed")
+    (files / "new.txt").write_text("new")
+    verification = tmp_path / "verification.json"
+    assert (
+        run(
+            local_chain,
+            [
+                "verify",
+                str(files),
+                "--local",
+                "--receipts",
+                str(receipts),
+                "--output",
+                str(verification),
+            ],
+        )
+        == 1
+    )
+    results = {
+        os.path.basename(result["path"]): result
+        for result in json.loads(verification.read_text())
+    }
+    assert not results["file_0.txt"]["verified"]
+    assert not results["new.txt"]["verified"]
+    assert results["new.txt"]["error"] == "The file was not notarized."
+    assert all(results[f"file_{i}.txt"]["verified"] for i in range(1, 5))
+
+
+def test_verbose_keeps_stdout_open(local_chain, files, tmp_path, capsys):
+    """
+    With --verbose, the output of the calls is shown and stdout stays usable afterwards.
+    """
+    receipts = tmp_path / "receipts.json"
+    run(
+        local_chain,
+        ["notarize", str(files), "--local", "--verbose", "--output", str(receipts)],
+    )
+    print("still open")
+    assert "still open" in capsys.readouterr().out
+
+
+def test_progress_is_reported_per_file(files, capsys, monkeypatch):
+    """
+    All files are hashed in one run and the progress is reported as files are done.
+    """
+    import cli
+
+    monkeypatch.setattr(cli, "PROGRESS_CHUNK", 2)
+    entries = cli.hash_inputs([str(files)], max_workers=2)
+    assert len(entries) == 5
+    assert capsys.readouterr().err.splitlines() == [
+        "Hashed 2/5 files.",
+        "Hashed 4/5 files.",
+        "Hashed 5/5 files.",
+    ]
+
+
+def test_stopped_run_writes_results_so_far(local_chain, files, tmp_path, monkeypatch):
+    """
+    If the node rejects a transaction, the error is reported, the results of the transactions sent before are written and the exit status is not 0.
+    """
+    import notarization
+
+    send_transaction = notarization.send_transaction
+    sent = []
+
+    def send_two(**kwargs):
+        if len(sent) == 2:
+            # like a node answering "insufficient funds"
+            sys.exit()
+        sent.append(kwargs["transaction"])
+        return send_transaction(**kwargs)
+
+    monkeypatch.setattr(notarization, "send_transaction", send_two)
+    receipts = tmp_path / "receipts.json"
+    assert (
+        run(
+            local_chain,
+            [
+                "notarize",
+                str(files),
+                "--local",
+                "--mode",
+                "single",
+                "--output",
+                str(receipts),
+            ],
+        )
+        == 2
+    )
+    results = json.loads(receipts.read_text())
+    assert len(results) == 2
+    assert all(result["status"] == "confirmed" for result in results)
+
+
+def test_account_must_belong_to_key(monkeypatch):
+    """
+    An --account that is not the account of the key is rejected, instead of sending the notarizations to it.
+    """
+    from cli import connect, parse_args
+
+    monkeypatch.setenv("NOTARIZATION_PRIVATE_KEY", "0x" + "11" * 32)
+    args = parse_args(
+        ["notarize", "data", "--url", "http://localhost", "--output", "r.json"]
+        + ["--account", "0x" + "22" * 20]
+    )
+    with pytest.raises(ValueError):
+        connect(args)
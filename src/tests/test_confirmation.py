@@ -0,0 +1,239 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from confirmation import ConfirmationTracker
+
+
+def test_send_without_waiting(local_chain):
+    """
+    send_transaction returns right away and the tracker reports the confirmation via status and callback.
+    """
+    from notarization import create_notarization_transaction, send_transaction
+
+    web3_connection = local_chain["web3_connection"]
+    tracker = ConfirmationTracker(web3_connection, poll_interval=0.05)
+    confirmed = []
+    tx = create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=local_chain["account"],
+        string_to_save="Test",
+        gas_price=1,
+    )
+    result = send_transaction(
+        web3_connection=web3_connection,
+        transaction=tx,
+        private_key=local_chain["private_key"],
+        confirmation_tracker=tracker,
+        callback=lambda tx_hash, status, tx_receipt: confirmed.append(
+            (tx_hash, status)
+        ),
+    )
+    assert "tx_receipt" not in result
+    status = tracker.wait(result["tx_hash"], timeout=5)
+    tracker.stop()
+    assert status["status"] == "confirmed"
+    assert status["tx_receipt"]["transactionHash"].hex() == result["tx_hash"]
+    assert confirmed == [(result["tx_hash"], "confirmed")]
+
+
+def test_timeout(local_chain):
+    """
+    A transaction that is never mined times out.
+    """
+    tracker = ConfirmationTracker(
+        local_chain["web3_connection"], poll_interval=0.05, time_limit=0.2
+    )
+    tx_hash = "0x" + "ab" * 32
+    tracker.track(tx_hash)
+    assert tracker.status(tx_hash)["status"] == "pending"
+    assert tracker.wait(tx_hash, timeout=5)["status"] == "timeout"
+    tracker.stop()
+
+
+def test_untracked_transaction(local_chain):
+    """
+    Looking up the status of a transaction that is not tracked raises a KeyError.
+    """
+    tracker = ConfirmationTracker(local_chain["web3_connection"])
+    with pytest.raises(KeyError):
+        tracker.status("0x" + "ab" * 32)
+
+
+def _send_pending(web3_connection, count):
+    # the local chain only keeps one pending transaction per account, so every transaction is sent from another account
+    from notarization import create_notarization_transaction
+
+    account_keys = web3_connection.provider.ethereum_tester.backend.account_keys
+    tx_hashes = []
+    for account_key in account_keys[:count]:
+        tx = create_notarization_transaction(
+            web3_connection=web3_connection,
+            account=account_key.public_key.to_checksum_address(),
+            string_to_save="Test",
+            gas_price=1,
+        )
+        signed_tx = web3_connection.eth.account.sign_transaction(
+            tx, account_key.to_hex()
+        )
+        tx_hashes.append(
+            web3_connection.eth.sendRawTransaction(signed_tx.rawTransaction).hex()
+        )
+    return tx_hashes
+
+
+def test_load_scales_with_blocks(local_chain):
+    """
+    Many pending transactions cost one block lookup per block, receipts are only looked up once when tracked and once when mined.
+    """
+    web3_connection = local_chain["web3_connection"]
+    ethereum_tester = web3_connection.provider.ethereum_tester
+    ethereum_tester.disable_auto_mine_transactions()
+    tx_hashes = _send_pending(web3_connection, 10)
+    requests = []
+
+    def counting_middleware(make_request, web3_connection):
+        def middleware(method, params):
+            requests.append(method)
+            return make_request(method, params)
+
+        return middleware
+
+    web3_connection.middleware_onion.add(counting_middleware)
+    tracker = ConfirmationTracker(web3_connection, poll_interval=0.02)
+    for tx_hash in tx_hashes:
+        tracker.track(tx_hash)
+    time.sleep(0.3)
+    assert requests.count("eth_getTransactionReceipt") == 10
+    assert requests.count("eth_getBlockByNumber") == 0
+    # the local chain must not be used by two threads at once
+    tracker.stop()
+    ethereum_tester.mine_blocks(1)
+    tracker.poll()
+    statuses = [tracker.status(tx_hash)["status"] for tx_hash in tx_hashes]
+    assert statuses == ["confirmed"] * 10
+    assert requests.count("eth_getBlockByNumber") == 1
+    assert requests.count("eth_getTransactionReceipt") == 20
+
+
+def test_confirmation_depth(local_chain):
+    """
+    With several confirmations, a mined transaction is only confirmed once enough blocks were added on top of it.
+    """
+    web3_connection = local_chain["web3_connection"]
+    ethereum_tester = web3_connection.provider.ethereum_tester
+    tracker = ConfirmationTracker(web3_connection, poll_interval=0.02, confirmations=3)
+    (tx_hash,) = _send_pending(web3_connection, 1)
+    tracker.track(tx_hash)
+    while tracker.status(tx_hash)["status"] == "pending":
+        time.sleep(0.02)
+    time.sleep(0.1)
+    tracker.stop()
+    assert tracker.status(tx_hash)["status"] == "mined"
+    ethereum_tester.mine_blocks(1)
+    tracker.poll()
+    assert tracker.status(tx_hash)["status"] == "mined"
+    ethereum_tester.mine_blocks(1)
+    tracker.poll()
+    status = tracker.status(tx_hash)
+    assert status["status"] == "confirmed"
+    assert status["tx_receipt"]["transactionHash"].hex() == tx_hash
+
+
+def test_reincluded_after_reorg(local_chain):
+    """
+    A transaction whose block was dropped is looked up directly again, so it is found even if it is included again at a height that was scanned already.
+    """
+    web3_connection = local_chain["web3_connection"]
+    ethereum_tester = web3_connection.provider.ethereum_tester
+    tracker = ConfirmationTracker(web3_connection, poll_interval=0.02, confirmations=3)
+    (tx_hash,) = _send_pending(web3_connection, 1)
+    tracker.track(tx_hash)
+    while tracker.status(tx_hash)["status"] == "pending":
+        time.sleep(0.02)
+    time.sleep(0.1)
+    tracker.stop()
+    ethereum_tester.mine_blocks(2)
+    # the node does not know the receipt for a moment, as during a reorganization
+    tracker._receipt = lambda sent_tx_hash: None
+    tracker.poll()
+    assert tracker.status(tx_hash)["status"] == "pending"
+    del tracker._receipt
+    tracker.poll()
+    assert tracker.status(tx_hash)["status"] == "confirmed"
+
+
+def test_resolved_transactions_are_forgotten(local_chain):
+    """
+    Transactions with a final status are kept only up to max_resolved, and only for keep_resolved seconds.
+    """
+    tracker = ConfirmationTracker(
+        local_chain["web3_connection"], time_limit=0, max_resolved=2
+    )
+    tx_hashes = ["0x" + f"{i:02x}" * 32 for i in range(3)]
+    for tx_hash in tx_hashes:
+        tracker.track(tx_hash, callback=lambda tx_hash, status, tx_receipt: None)
+    # polled by hand from here on
+    tracker.stop()
+    tracker.poll()
+    with pytest.raises(KeyError):
+        tracker.status(tx_hashes[0])
+    for tx_hash in tx_hashes[1:]:
+        assert tracker.status(tx_hash)["status"] == "timeout"
+        assert tracker._transactions[tx_hash]["callback"] is None
+    tracker.keep_resolved = 0
+    tracker.poll()
+    assert tracker._transactions == {}
+
+
+def test_replacement_is_found_in_block(local_chain):
+    """
+    A replacement sent by the fee bump is tracked under the first tx_hash and found when its block is looked at.
+    """
+    from fees import FeeBumpPolicy
+    from notarization import (
+        create_notarization_transaction,
+        replace_transaction,
+        sign_transaction,
+    )
+    from web3 import Web3
+
+    web3_connection = local_chain["web3_connection"]
+    ethereum_tester = web3_connection.provider.ethereum_tester
+    tx = create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=local_chain["account"],
+        string_to_save="Test",
+    )
+    policy = FeeBumpPolicy(max_fee_per_gas=10 * tx["maxFeePerGas"])
+    ethereum_tester.disable_auto_mine_transactions()
+    try:
+        signed_tx = sign_transaction(web3_connection, tx, local_chain["private_key"])
+        web3_connection.eth.sendRawTransaction(signed_tx.rawTransaction)
+        tx_hash = Web3.toHex(signed_tx[1])
+        replacements = []
+
+        def fee_bump():
+            replacement = replace_transaction(
+                web3_connection, tx, local_chain["private_key"], policy
+            )
+            replacements.append(replacement["tx_hash"])
+            return replacement["tx_hash"]
+
+        tracker = ConfirmationTracker(web3_connection)
+        tracker.track(tx_hash, fee_bump=fee_bump, fee_bump_interval=3600)
+        # polled by hand from here on, the local chain must not be used by two threads at once
+        tracker.stop()
+        tracker._transactions[tx_hash]["next_fee_bump"] = 0
+        tracker.poll()
+        assert len(replacements) == 1
+        ethereum_tester.mine_blocks(1)
+        tracker.poll()
+    finally:
+        ethereum_tester.enable_auto_mine_transactions()
+    status = tracker.status(tx_hash)
+    assert status["status"] == "confirmed"
+    assert status["tx_hash"] == replacements[0]
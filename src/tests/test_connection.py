@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+web3 = pytest.importorskip("web3")
+pytest.importorskip("eth_tester")
+from connection import ConnectionManager
+from utils import NoInfuraConnection
+
+
+class CountingProvider(web3.EthereumTesterProvider):
+    """
+    Local test chain provider that counts connection checks and can be switched off.
+    """
+
+    checks = 0
+    available = True
+
+    def is_connected(self):
+        CountingProvider.checks += 1
+        return CountingProvider.available
+
+    isConnected = is_connected
+
+
+@pytest.fixture
+def connection_manager():
+    CountingProvider.checks = 0
+    CountingProvider.available = True
+    return ConnectionManager(
+        health_check_interval=60,
+        provider_factory=lambda url, session: CountingProvider(),
+    )
+
+
+def test_connection_is_reused(connection_manager):
+    """
+    The same connection is returned for the same URL and only checked once within the interval.
+    """
+    first = connection_manager.get_connection("http://node")
+    second = connection_manager.get_connection("http://node")
+    assert first is second
+    assert CountingProvider.checks == 1
+    assert connection_manager.get_connection("http://other-node") is not first
+
+
+def test_check_is_repeated_after_interval(connection_manager):
+    """
+    The connection is checked again once the interval has passed.
+    """
+    connection_manager.health_check_interval = 0
+    connection_manager.get_connection("http://node")
+    connection_manager.get_connection("http://node")
+    assert CountingProvider.checks == 2
+
+
+def test_reconnect_after_failure(connection_manager):
+    """
+    A failing check raises the usual exception, afterwards a fresh connection is created.
+    """
+    CountingProvider.available = False
+    with pytest.raises(NoInfuraConnection):
+        connection_manager.get_connection("http://node")
+    CountingProvider.available = True
+    first = connection_manager.get_connection("http://node")
+    connection_manager.reset("http://node")
+    assert connection_manager.get_connection("http://node") is not first
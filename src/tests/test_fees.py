@@ -0,0 +1,220 @@
+import os
+import sys
+
+import pytest
+from web3 import Web3
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from fees import bump_fees, FeeBumpPolicy, FeeEstimator, intrinsic_gas
+from notarization import create_notarization_transaction, send_transaction
+
+
+def test_intrinsic_gas():
+    """
+    Zero and non-zero bytes of the data are counted separately, and the gas never falls below the floor cost of the data (EIP-7623).
+    """
+    assert intrinsic_gas(b"") == 21000
+    assert intrinsic_gas(b"\x00\x01") == 21000 + 10 * (1 + 4)
+    assert intrinsic_gas(Web3.toHex(text="Test")) == 21000 + 10 * 4 * 4
+
+
+def test_intrinsic_gas_floor_of_notarizations():
+    """
+    Both a compact payload and a hash as hex text get the floor cost, not the lower standard cost.
+    """
+    from payload import encode_payload
+
+    # one zero byte in the header, 36 non-zero bytes (standard cost 21580)
+    compact_payload = encode_payload("11" * 32)
+    assert intrinsic_gas(compact_payload) == 22450
+    # 64 non-zero bytes (standard cost 22024)
+    assert intrinsic_gas(Web3.toHex(text="ab" * 32)) == 23560
+
+
+def test_unknown_speed():
+    """
+    Only the known speed targets are accepted.
+    """
+    with pytest.raises(ValueError):
+        FeeEstimator(None, speed="instant")
+
+
+def test_fee_history_is_used():
+    """
+    The priority fee is the median of recent tips and the maximum fee leaves room for rising base fees.
+    """
+
+    class Eth:
+        def fee_history(self, block_count, newest_block, reward_percentiles):
+            assert reward_percentiles == [90]
+            return {
+                "baseFeePerGas": [10, 12, 14],
+                "reward": [[1], [3], [2]],
+            }
+
+    estimator = FeeEstimator(type("Connection", (), {"eth": Eth()})(), speed="fast")
+    assert estimator.estimate() == {"maxFeePerGas": 30, "maxPriorityFeePerGas": 2}
+
+
+def test_send_eip1559_transaction(local_chain):
+    """
+    Without gas limit and gas price, a type 2 transaction with exactly the needed gas is created and mined.
+    The local chain does not support eth_feeHistory, so the latest block is used instead.
+    """
+    web3_connection = local_chain["web3_connection"]
+    tx = create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=local_chain["account"],
+        string_to_save="Test",
+    )
+    assert tx["type"] == 2
+    assert tx["gas"] == intrinsic_gas(tx["data"])
+    assert tx["maxFeePerGas"] >= tx["maxPriorityFeePerGas"]
+    result = send_transaction(
+        web3_connection=web3_connection,
+        transaction=tx,
+        private_key=local_chain["private_key"],
+    )
+    assert result["tx_receipt"]["status"] == 1
+    # the local chain does not apply the floor cost of EIP-7623, it charges the standard cost
+    assert result["tx_receipt"]["gasUsed"] == 21000 + 4 * 16 <= tx["gas"]
+
+
+def test_default_estimator_is_shared(local_chain, monkeypatch):
+    """
+    Transactions created without an estimator share one per connection, so the fees and the chain id are looked up once, not for every transaction.
+    """
+    from fees import shared_fee_estimator
+
+    web3_connection = local_chain["web3_connection"]
+    lookups = []
+    from_latest_block = FeeEstimator._from_latest_block
+
+    def counting(self):
+        lookups.append(self)
+        return from_latest_block(self)
+
+    monkeypatch.setattr(FeeEstimator, "_from_latest_block", counting)
+    for i in range(3):
+        create_notarization_transaction(
+            web3_connection=web3_connection,
+            account=local_chain["account"],
+            string_to_save=f"Test {i}",
+        )
+    assert len(lookups) == 1
+    assert lookups[0] is shared_fee_estimator(web3_connection)
+    assert lookups[0]._chain_id is not None
+
+
+def test_bump_fees():
+    """
+    Fees are raised by the multiplier and never beyond the cap.
+    """
+    policy = FeeBumpPolicy(max_fee_per_gas=250)
+    tx = {"maxFeePerGas": 200, "maxPriorityFeePerGas": 10}
+    replacement = bump_fees(tx, policy)
+    assert replacement == {"maxFeePerGas": 225, "maxPriorityFeePerGas": 12}
+    assert bump_fees(replacement, policy)["maxFeePerGas"] == 250
+    assert bump_fees({"maxFeePerGas": 250, "maxPriorityFeePerGas": 1}, policy) is None
+    assert bump_fees({"gasPrice": 100}, policy) == {"gasPrice": 113}
+    with pytest.raises(ValueError):
+        FeeBumpPolicy(max_fee_per_gas=250, multiplier=1.05)
+
+
+def test_no_underpriced_replacement_at_the_cap():
+    """
+    If the cap leaves less than 10% more for the maximum fee, the priority fee or the gas price, there is no replacement the node would accept.
+    """
+    policy = FeeBumpPolicy(max_fee_per_gas=240)
+    assert bump_fees({"maxFeePerGas": 220, "maxPriorityFeePerGas": 10}, policy) is None
+    assert bump_fees({"maxFeePerGas": 200, "maxPriorityFeePerGas": 215}, policy) is None
+    assert bump_fees({"gasPrice": 230}, policy) is None
+    assert bump_fees({"gasPrice": 218}, policy) == {"gasPrice": 240}
+
+
+@pytest.fixture
+def stuck_chain(local_chain):
+    """
+    Local chain that only mines when told to, so transactions stay pending.
+    """
+    ethereum_tester = local_chain["web3_connection"].provider.ethereum_tester
+    ethereum_tester.disable_auto_mine_transactions()
+    yield local_chain
+    ethereum_tester.enable_auto_mine_transactions()
+
+
+@pytest.fixture
+def mined_on_replacement(stuck_chain, monkeypatch):
+    """
+    Mines a block right after the first replacement was sent, in the thread that sent it.
+    The local chain is not thread-safe, so with a confirmation tracker it must only be used by the tracker's thread, never by the test at the same time.
+    """
+    import notarization
+
+    web3_connection = stuck_chain["web3_connection"]
+    replace_transaction = notarization.replace_transaction
+
+    def replace_and_mine(*args, **kwargs):
+        replacement = replace_transaction(*args, **kwargs)
+        web3_connection.provider.ethereum_tester.mine_blocks(1)
+        return replacement
+
+    monkeypatch.setattr(notarization, "replace_transaction", replace_and_mine)
+    return stuck_chain
+
+
+def test_stuck_transaction_is_replaced(mined_on_replacement):
+    """
+    A transaction that is not mined in time is replaced with higher fees and the hash of the mined replacement is returned.
+    """
+    stuck_chain = mined_on_replacement
+    web3_connection = stuck_chain["web3_connection"]
+    tx = create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=stuck_chain["account"],
+        string_to_save="Test",
+    )
+    policy = FeeBumpPolicy(
+        max_fee_per_gas=10 * tx["maxFeePerGas"], wait=0.05, poll_interval=0.02
+    )
+    result = send_transaction(
+        web3_connection=web3_connection,
+        transaction=tx,
+        private_key=stuck_chain["private_key"],
+        time_limit=5,
+        fee_bump_policy=policy,
+    )
+    assert len(result["replaced_tx_hashes"]) == 1
+    assert result["tx_receipt"]["transactionHash"].hex() == result["tx_hash"]
+    mined_tx = web3_connection.eth.getTransaction(result["tx_hash"])
+    assert mined_tx["maxFeePerGas"] > tx["maxFeePerGas"]
+
+
+def test_stuck_transaction_is_replaced_in_background(mined_on_replacement):
+    """
+    With a confirmation tracker, the replacements are sent in the background and the status tells the mined hash.
+    The test thread only waits, the chain is mined by the tracker's thread.
+    """
+    from confirmation import ConfirmationTracker
+
+    stuck_chain = mined_on_replacement
+    web3_connection = stuck_chain["web3_connection"]
+    tracker = ConfirmationTracker(web3_connection, poll_interval=0.02)
+    tx = create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=stuck_chain["account"],
+        string_to_save="Test",
+    )
+    policy = FeeBumpPolicy(max_fee_per_gas=10 * tx["maxFeePerGas"], wait=0.1)
+    tx_hash = send_transaction(
+        web3_connection=web3_connection,
+        transaction=tx,
+        private_key=stuck_chain["private_key"],
+        confirmation_tracker=tracker,
+        fee_bump_policy=policy,
+    )["tx_hash"]
+    status = tracker.wait(tx_hash, timeout=5)
+    tracker.stop()
+    assert status["status"] == "confirmed"
+    assert status["tx_hash"] != tx_hash
+    assert status["tx_receipt"]["transactionHash"].hex() == status["tx_hash"]
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from hash_cache import HashCache
+from utils import calculate_hash_of_file_via_path
+
+
+def write_old_file(path, content):
+    """
+    Writes a file and sets its modification time to one minute ago, so it is old enough to be cached.
+    """
+    path.write_bytes(content)
+    old = time.time() - 60
+    os.utime(path, (old, old))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    hash_cache = HashCache(str(tmp_path / "cache.sqlite"))
+    yield hash_cache
+    hash_cache.close()
+
+
+def test_unchanged_file_is_not_read_again(tmp_path, cache):
+    """
+    The stored hash of an unchanged file is returned, so changing the stored hash shows up in the result.
+    """
+    path = tmp_path / "data.csv"
+    write_old_file(path, b"1,2,3\n")
+    assert calculate_hash_of_file_via_path(str(path), cache=cache) == (
+        hashlib.sha256(b"1,2,3\n").hexdigest()
+    )
+    assert cache.get(str(path)) == hashlib.sha256(b"1,2,3\n").hexdigest()
+    # tamper with the cache to see that the file is not read again
+    cache._connection.execute("UPDATE file_hashes SET hash = 'cached'")
+    assert calculate_hash_of_file_via_path(str(path), cache=cache) == "cached"
+    # paranoid mode reads the file and repairs the cache
+    assert calculate_hash_of_file_via_path(str(path), cache=cache, paranoid=True) == (
+        hashlib.sha256(b"1,2,3\n").hexdigest()
+    )
+    assert cache.get(str(path)) == hashlib.sha256(b"1,2,3\n").hexdigest()
+
+
+def test_changed_file_is_read_again(tmp_path, cache):
+    """
+    A file with a different size or modification time is hashed again.
+    """
+    path = tmp_path / "data.csv"
+    write_old_file(path, b"1,2,3\n")
+    calculate_hash_of_file_via_path(str(path), cache=cache)
+    write_old_file(path, b"1,2,4\n")
+    os.utime(path, (time.time() - 30, time.time() - 30))
+    assert cache.get(str(path)) is None
+    assert calculate_hash_of_file_via_path(str(path), cache=cache) == (
+        hashlib.sha256(b"1,2,4\n").hexdigest()
+    )
+
+
+def test_recently_modified_file_is_not_cached(tmp_path, cache):
+    """
+    Files modified just now are not cached, a change within the same clock tick could go unnoticed.
+    """
+    path = tmp_path / "data.csv"
+    path.write_bytes(b"1,2,3\n")
+    calculate_hash_of_file_via_path(str(path), cache=cache)
+    assert len(cache) == 0
+
+
+def test_eviction(tmp_path):
+    """
+    The least recently used files are evicted once the cache is full.
+    """
+    cache = HashCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    paths = [tmp_path / f"{i}.csv" for i in range(3)]
+    for i, path in enumerate(paths):
+        write_old_file(path, str(i).encode())
+        calculate_hash_of_file_via_path(str(path), cache=cache)
+        time.sleep(0.01)
+    cache.evict()
+    assert len(cache) == 2
+    assert cache.get(str(paths[0])) is None
+    assert cache.get(str(paths[2])) is not None
+    cache.close()
+
+
+def test_cache_hits_are_written_in_one_transaction(tmp_path, cache):
+    """
+    Using a stored hash does not write to the database, hash_files writes the times of use of all hits at the end.
+    """
+    from manifest import hash_files
+
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"data_{i}.csv"
+        write_old_file(path, f"{i}\n".encode())
+        paths.append(str(path))
+    hash_files(paths, max_workers=1, cache=cache)
+    cache._connection.execute("UPDATE file_hashes SET last_used = 0")
+    cache._connection.commit()
+    assert cache.get(paths[0]) is not None
+    assert cache._connection.execute(
+        "SELECT COUNT(*) FROM file_hashes WHERE last_used = 0"
+    ).fetchone() == (3,)
+    hash_files(paths, max_workers=1, cache=cache)
+    assert cache._connection.execute(
+        "SELECT COUNT(*) FROM file_hashes WHERE last_used = 0"
+    ).fetchone() == (0,)
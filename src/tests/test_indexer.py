@@ -0,0 +1,147 @@
+import hashlib
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from indexer import ChainIndexer
+from payload import encode_payload
+
+
+def _notarize(local_chain, string_to_save):
+    from notarization import create_notarization_transaction, send_transaction
+
+    tx = create_notarization_transaction(
+        web3_connection=local_chain["web3_connection"],
+        account=local_chain["account"],
+        string_to_save=string_to_save,
+    )
+    return send_transaction(
+        web3_connection=local_chain["web3_connection"],
+        transaction=tx,
+        private_key=local_chain["private_key"],
+    )["tx_hash"]
+
+
+def test_find_notarizations(local_chain, tmp_path):
+    """
+    Compact and legacy notarizations of our account are found by their hash, other transactions are ignored.
+    """
+    web3_connection = local_chain["web3_connection"]
+    file_path = tmp_path / "data.txt"
+    file_path.write_bytes(b"Test")
+    hash_value = hashlib.sha256(b"Test").hexdigest()
+    compact_tx_hash = _notarize(local_chain, encode_payload(hash_value))
+    text_tx_hash = _notarize(local_chain, hash_value)
+    # a transfer to another account is no notarization
+    other_account = web3_connection.eth.accounts[1]
+    web3_connection.eth.send_transaction(
+        {"from": other_account, "to": local_chain["account"], "value": 1}
+    )
+    indexer = ChainIndexer(
+        web3_connection,
+        [local_chain["account"]],
+        str(tmp_path / "index.db"),
+        confirmations=0,
+        batch_size=2,
+    )
+    assert indexer.scan() == 2
+    notarizations = indexer.find_file(str(file_path))
+    assert [n["tx_hash"] for n in notarizations] == [compact_tx_hash, text_tx_hash]
+    assert [n["algorithm"] for n in notarizations] == ["sha256", None]
+    assert indexer.lookup(hashlib.sha256(b"Other").hexdigest()) == []
+    indexer.close()
+
+
+def test_resume_from_checkpoint(local_chain, tmp_path):
+    """
+    A new scan starts at the checkpoint of the last one, also after the database was opened again, and skips blocks that are not deep enough.
+    """
+    web3_connection = local_chain["web3_connection"]
+    db_path = str(tmp_path / "index.db")
+    first_hash = hashlib.sha256(b"first").hexdigest()
+    _notarize(local_chain, encode_payload(first_hash))
+    indexer = ChainIndexer(
+        web3_connection, [local_chain["account"]], db_path, confirmations=0
+    )
+    assert indexer.scan() == 1
+    assert indexer.next_block == web3_connection.eth.block_number + 1
+    indexer.close()
+
+    second_hash = hashlib.sha256(b"second").hexdigest()
+    _notarize(local_chain, encode_payload(second_hash))
+    _notarize(local_chain, encode_payload(hashlib.sha256(b"third").hexdigest()))
+    indexer = ChainIndexer(
+        web3_connection, [local_chain["account"]], db_path, confirmations=1
+    )
+    # the block of the third notarization is not deep enough yet
+    assert indexer.scan() == 1
+    assert len(indexer) == 2
+    assert len(indexer.lookup(first_hash)) == 1
+    assert len(indexer.lookup(second_hash)) == 1
+    indexer.close()
+
+
+def test_added_account_is_scanned_from_start(local_chain, tmp_path):
+    """
+    An account added to an existing index is scanned from the start block on, not from the checkpoint of the other accounts.
+    """
+    web3_connection = local_chain["web3_connection"]
+    db_path = str(tmp_path / "index.db")
+    other_account = web3_connection.eth.accounts[1]
+    other_hash = hashlib.sha256(b"other").hexdigest()
+    web3_connection.eth.send_transaction(
+        {
+            "from": other_account,
+            "to": other_account,
+            "value": 0,
+            "data": encode_payload(other_hash),
+        }
+    )
+    _notarize(local_chain, encode_payload(hashlib.sha256(b"first").hexdigest()))
+    indexer = ChainIndexer(
+        web3_connection, [local_chain["account"]], db_path, confirmations=0
+    )
+    assert indexer.scan() == 1
+    indexer.close()
+
+    indexer = ChainIndexer(
+        web3_connection,
+        [local_chain["account"], other_account],
+        db_path,
+        confirmations=0,
+    )
+    assert indexer.next_block == 0
+    indexer.scan()
+    assert len(indexer.lookup(other_hash)) == 1
+    assert len(indexer) == 2
+    assert indexer.next_block == web3_connection.eth.block_number + 1
+    indexer.close()
+
+
+def test_find_file_notarized_with_chunked_digest(local_chain, tmp_path):
+    """
+    A file notarized with its chunked digest is found as well as one notarized with its flat hash.
+    """
+    from chunked_digest import ALGORITHM, chunked_digest
+
+    file_path = tmp_path / "data.bin"
+    file_path.write_bytes(os.urandom(3 * 1024 * 1024))
+    flat_tx_hash = _notarize(
+        local_chain,
+        encode_payload(hashlib.sha256(file_path.read_bytes()).hexdigest()),
+    )
+    chunked_tx_hash = _notarize(
+        local_chain,
+        encode_payload(chunked_digest(str(file_path))["root"], algorithm=ALGORITHM),
+    )
+    indexer = ChainIndexer(
+        local_chain["web3_connection"],
+        [local_chain["account"]],
+        str(tmp_path / "index.db"),
+        confirmations=0,
+    )
+    indexer.scan()
+    notarizations = indexer.find_file(str(file_path))
+    assert [n["tx_hash"] for n in notarizations] == [flat_tx_hash, chunked_tx_hash]
+    assert [n["algorithm"] for n in notarizations] == ["sha256", ALGORITHM]
+    indexer.close()
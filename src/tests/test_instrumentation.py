@@ -0,0 +1,84 @@
+import os
+import sys
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from instrumentation import instrument, metrics, Metrics, serve_metrics
+
+
+def test_notarization_is_recorded(local_chain):
+    """
+    The requests of an instrumented connection and the phases of a notarization are counted and timed.
+    """
+    from notarization import create_notarization_transaction, send_transaction
+
+    web3_connection = instrument(instrument(local_chain["web3_connection"]))
+    metrics.reset()
+    tx = create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=local_chain["account"],
+        string_to_save="Test",
+    )
+    send_transaction(
+        web3_connection=web3_connection,
+        transaction=tx,
+        private_key=local_chain["private_key"],
+    )
+    stats = metrics.stats()
+    # instrumented twice, but every request is only recorded once
+    assert stats["rpc"]["eth_sendRawTransaction"]["count"] == 1
+    assert stats["rpc"]["eth_getBalance"]["errors"] == 0
+    assert set(stats["phases"]) == {
+        "fees",
+        "balance",
+        "nonce",
+        "sign",
+        "send",
+        "confirm",
+    }
+    assert all(phase["count"] == 1 for phase in stats["phases"].values())
+
+
+def test_histogram_and_errors():
+    """
+    Latencies are sorted into cumulative buckets and failed phases are counted as errors.
+    """
+    own_metrics = Metrics(buckets=(0.1, 1))
+    own_metrics.record_rpc("eth_getBalance", 0.05)
+    own_metrics.record_rpc("eth_getBalance", 0.5)
+    own_metrics.record_rpc("eth_getBalance", 5, error=True)
+    with pytest.raises(ValueError):
+        with own_metrics.phase("sign"):
+            raise ValueError("invalid key")
+    stats = own_metrics.stats()
+    assert stats["rpc"]["eth_getBalance"]["histogram"] == {
+        "0.1": 1,
+        "1": 2,
+        "+Inf": 3,
+    }
+    assert stats["rpc"]["eth_getBalance"]["errors"] == 1
+    assert stats["phases"]["sign"] == dict(stats["phases"]["sign"], count=1, errors=1)
+    text = own_metrics.prometheus_text()
+    assert (
+        'notarization_rpc_duration_seconds_bucket{method="eth_getBalance",le="1"} 2'
+        in text
+    )
+    assert 'notarization_phase_errors_total{phase="sign"} 1' in text
+
+
+def test_serve_metrics():
+    """
+    The metrics are served as Prometheus text via HTTP.
+    """
+    own_metrics = Metrics()
+    own_metrics.record_phase("confirm", 12)
+    server = serve_metrics(port=0, host="127.0.0.1", metrics=own_metrics)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            text = response.read().decode()
+    finally:
+        server.shutdown()
+    assert 'notarization_phase_duration_seconds_count{phase="confirm"} 1' in text
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from manifest import collect_files, hash_directory, hash_files, read_manifest
+
+
+@pytest.fixture
+def directory(tmp_path):
+    (tmp_path / "sub").mkdir()
+    contents = {
+        "a.csv": b"participant,decision\n1,A\n",
+        "sub/b.csv": b"participant,decision\n2,B\n",
+        "sub/c.txt": os.urandom(300000),
+    }
+    for name, content in contents.items():
+        (tmp_path / name).write_bytes(content)
+    return {"path": tmp_path, "contents": contents}
+
+
+def test_collect_files(directory):
+    """
+    Directories are searched recursively and glob patterns are expanded.
+    """
+    path = directory["path"]
+    assert collect_files([str(path / "sub")]) == [
+        str(path / "sub" / "b.csv"),
+        str(path / "sub" / "c.txt"),
+    ]
+    assert collect_files([str(path / "**" / "*.csv")]) == [
+        str(path / "a.csv"),
+        str(path / "sub" / "b.csv"),
+    ]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_hash_directory(directory, tmp_path_factory, max_workers):
+    """
+    Hashes, sizes and relative paths end up in the manifest, no matter how many processes are used.
+    """
+    path = directory["path"]
+    manifest_path = str(tmp_path_factory.mktemp("manifest") / "manifest.txt")
+    result = hash_directory(
+        [str(path)],
+        manifest_path=manifest_path,
+        root=str(path),
+        max_workers=max_workers,
+    )
+    expected = [
+        {
+            "path": name,
+            "size": len(content),
+            "hash": hashlib.sha256(content).hexdigest(),
+        }
+        for name, content in sorted(directory["contents"].items())
+    ]
+    assert read_manifest(manifest_path) == expected
+    with open(manifest_path, "rb") as f:
+        assert result["manifest_hash"] == hashlib.sha256(f.read()).hexdigest()
+
+
+def test_manifest_is_deterministic(directory, tmp_path_factory):
+    """
+    Hashing the same directory twice gives the same manifest hash.
+    """
+    path = str(directory["path"])
+    first = hash_directory(
+        [path],
+        manifest_path=str(tmp_path_factory.mktemp("first") / "manifest.txt"),
+        root=path,
+    )
+    second = hash_directory(
+        [path],
+        manifest_path=str(tmp_path_factory.mktemp("second") / "manifest.txt"),
+        root=path,
+        max_workers=1,
+    )
+    assert first["manifest_hash"] == second["manifest_hash"]
+
+
+def test_hash_directory_with_cache(directory, tmp_path_factory):
+    """
+    A second run with a hash cache gives the same result without reading the unchanged files.
+    """
+    from hash_cache import HashCache
+
+    path = directory["path"]
+    for name in directory["contents"]:
+        os.utime(path / name, (0, 1000000000))
+    cache = HashCache(str(tmp_path_factory.mktemp("cache") / "cache.sqlite"))
+    first = hash_directory([str(path)], cache=cache, max_workers=1)
+    assert len(cache) == 3
+    second = hash_directory([str(path)], cache=cache, max_workers=1)
+    assert first["entries"] == second["entries"]
+    cache.close()
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_hash_files_callback(directory, max_workers):
+    """
+    The callback is called once per file, as soon as it is hashed.
+    """
+    paths = collect_files([str(directory["path"])])
+    done = []
+    entries = hash_files(paths, max_workers=max_workers, callback=done.append)
+    assert sorted(done) == [entry["path"] for entry in entries] == sorted(paths)
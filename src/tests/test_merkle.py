@@ -0,0 +1,90 @@
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from merkle import (
+    build_merkle_tree,
+    merkle_proof,
+    merkle_root,
+    verify_merkle_proof,
+)
+
+
+@pytest.fixture
+def hashes():
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(7)]
+
+
+def test_all_proofs_verify(hashes):
+    """
+    Every leaf of a tree with an odd number of leaves can be verified against the root.
+    """
+    tree = build_merkle_tree(hashes)
+    root = merkle_root(tree)
+    for index, leaf in enumerate(hashes):
+        assert verify_merkle_proof(leaf, merkle_proof(tree, index), root) == True
+
+
+def test_proof_fails_for_other_leaf(hashes):
+    """
+    A proof does not verify a leaf it was not created for.
+    """
+    tree = build_merkle_tree(hashes)
+    root = merkle_root(tree)
+    assert verify_merkle_proof(hashes[1], merkle_proof(tree, 0), root) == False
+    assert verify_merkle_proof("0", merkle_proof(tree, 0), root) == False
+
+
+def test_single_leaf():
+    """
+    A tree with a single leaf has an empty proof.
+    """
+    tree = build_merkle_tree(["abc"])
+    assert merkle_proof(tree, 0) == []
+    assert verify_merkle_proof("abc", [], merkle_root(tree)) == True
+
+
+def test_empty_tree():
+    """
+    Building a tree without leaves is not possible.
+    """
+    with pytest.raises(ValueError):
+        build_merkle_tree([])
+
+
+def test_batch_notarization_and_verification(local_chain, hashes):
+    """
+    Notarizes a batch of hashes in one transaction and verifies each of them via its proof.
+    """
+    from notarization import create_batch_notarization_transaction, send_transaction
+    from verification import verify_via_transaction
+
+    batch = create_batch_notarization_transaction(
+        web3_connection=local_chain["web3_connection"],
+        account=local_chain["account"],
+        hashes_to_save=hashes,
+        gas_price=1,
+    )
+    tx_hash = send_transaction(
+        web3_connection=local_chain["web3_connection"],
+        transaction=batch["tx"],
+        private_key=local_chain["private_key"],
+    )["tx_hash"]
+    for item in batch["proofs"]:
+        result = verify_via_transaction(
+            web3_connection=local_chain["web3_connection"],
+            tx_hash=tx_hash,
+            hash_value=item["hash"],
+            proof=item["proof"],
+        )
+        assert result["verified"] == True
+    result = verify_via_transaction(
+        web3_connection=local_chain["web3_connection"],
+        tx_hash=tx_hash,
+        hash_value=hashes[0],
+        proof=batch["proofs"][1]["proof"],
+    )
+    assert result["verified"] == False
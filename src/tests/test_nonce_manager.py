@@ -0,0 +1,97 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from nonce_manager import is_nonce_error, NonceManager
+
+
+def test_is_nonce_error():
+    """
+    Nonce errors of a node and of the local test chain are recognized, others are not.
+    """
+    assert is_nonce_error(ValueError({"code": -32000, "message": "nonce too low"}))
+    assert is_nonce_error(Exception("Invalid transaction nonce: Expected 1, but got 0"))
+    assert not is_nonce_error(
+        ValueError(
+            {"code": -32000, "message": "insufficient funds for gas * price + value"}
+        )
+    )
+
+
+def test_nonces_are_handed_out_locally(local_chain):
+    """
+    Consecutive nonces are handed out without the first transaction being sent.
+    """
+    nonce_manager = NonceManager(local_chain["web3_connection"])
+    assert nonce_manager.next_nonce(local_chain["account"]) == 0
+    assert nonce_manager.next_nonce(local_chain["account"]) == 1
+    nonce_manager.resync(local_chain["account"])
+    assert nonce_manager.next_nonce(local_chain["account"]) == 0
+
+
+def test_send_transactions_back_to_back(local_chain):
+    """
+    Several transactions can be created before sending any of them and are all mined.
+    """
+    from notarization import create_notarization_transaction, send_transaction
+
+    web3_connection = local_chain["web3_connection"]
+    nonce_manager = NonceManager(web3_connection)
+    transactions = [
+        create_notarization_transaction(
+            web3_connection=web3_connection,
+            account=local_chain["account"],
+            string_to_save=f"Test {i}",
+            gas_price=1,
+            nonce_manager=nonce_manager,
+        )
+        for i in range(3)
+    ]
+    assert [tx["nonce"] for tx in transactions] == [0, 1, 2]
+    for tx in transactions:
+        result = send_transaction(
+            web3_connection=web3_connection,
+            transaction=tx,
+            private_key=local_chain["private_key"],
+            nonce_manager=nonce_manager,
+        )
+        assert "tx_receipt" in result
+    assert web3_connection.eth.getTransactionCount(local_chain["account"]) == 3
+
+
+def test_resync_after_nonce_too_low(local_chain):
+    """
+    If the local nonce is outdated, the nonce manager is synced and the transaction is sent again.
+    """
+    from notarization import create_notarization_transaction, send_transaction
+
+    web3_connection = local_chain["web3_connection"]
+    nonce_manager = NonceManager(web3_connection)
+    nonce_manager.sync(local_chain["account"])
+    # another process uses nonce 0 behind the nonce manager's back
+    send_transaction(
+        web3_connection=web3_connection,
+        transaction=create_notarization_transaction(
+            web3_connection=web3_connection,
+            account=local_chain["account"],
+            string_to_save="Other process",
+            gas_price=1,
+        ),
+        private_key=local_chain["private_key"],
+    )
+    tx = create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=local_chain["account"],
+        string_to_save="Test",
+        gas_price=1,
+        nonce_manager=nonce_manager,
+    )
+    assert tx["nonce"] == 0
+    result = send_transaction(
+        web3_connection=web3_connection,
+        transaction=tx,
+        private_key=local_chain["private_key"],
+        nonce_manager=nonce_manager,
+    )
+    assert web3_connection.eth.getTransaction(result["tx_hash"])["nonce"] == 1
+    assert nonce_manager.next_nonce(local_chain["account"]) == 2
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from otree_hashing import (
+    build_payload,
+    build_payloads,
+    build_verification_strings,
+    hash_payloads,
+    resolve_tx_hashes,
+)
+
+pd = pytest.importorskip("pandas")
+
+
+@pytest.fixture
+def otree_data():
+    data = pd.read_csv(os.path.abspath("src/examples/example_file_otree.csv"))
+    data.columns = data.columns.str.replace(".", "_")
+    return data
+
+
+def test_same_format_as_otree_app(otree_data):
+    """
+    The payloads built from the data export match the payloads built within the oTree app.
+    """
+    columns = ["player_decision_0", "player_decision_5", "player_decision_10"]
+    payloads = build_payloads(
+        otree_data, "participant_code", "participant_time_started", columns
+    )
+    for index, row in otree_data.iterrows():
+        assert payloads[index] == build_payload(
+            participant_code=row["participant_code"],
+            time_started=row["participant_time_started"],
+            decisions=[row[column] for column in columns],
+        )
+    assert payloads[1] == (
+        "participant_code: hijw47wl time_started: 2021-03-24 11:13:56.750840 decisions: ['A', 'B', 'A']"
+    )
+
+
+def test_missing_and_numeric_decisions():
+    """
+    Missing decisions are None (as in the oTree app) and numbers are plain numbers.
+    """
+    data = pd.DataFrame(
+        {
+            "code": ["a", "b"],
+            "time": ["t1", "t2"],
+            "decision": ["A", None],
+            "amount": [1, 2],
+        }
+    )
+    payloads = build_payloads(data, "code", "time", ["decision", "amount"])
+    assert list(payloads) == [
+        build_payload("a", "t1", ["A", 1]),
+        build_payload("b", "t2", [None, 2]),
+    ]
+
+
+def test_verification_strings(otree_data):
+    """
+    The verification strings consist of payload and hash, the hashes do not depend on the number of processes.
+    """
+    columns = ["player_decision_0", "player_decision_5", "player_decision_10"]
+    verification_strings = build_verification_strings(
+        otree_data, "participant_code", "participant_time_started", columns
+    )
+    payloads = build_payloads(
+        otree_data, "participant_code", "participant_time_started", columns
+    )
+    for payload, verification_string in zip(payloads, verification_strings):
+        assert verification_string == (
+            payload + " - " + hashlib.sha256(payload.encode()).hexdigest()
+        )
+    many_payloads = [str(i) for i in range(1000)]
+    assert hash_payloads(many_payloads, max_workers=2, chunk_size=64) == hash_payloads(
+        many_payloads, max_workers=1
+    )
+
+
+def test_resolve_tx_hashes(tmp_path):
+    """
+    Placeholders of notarizations sent from the outbox are replaced by their tx_hash, other rows are kept.
+    """
+    from outbox import Outbox
+
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    sent_id, queued_id = outbox.add("Sent"), outbox.add("Queued")
+    outbox.take_due(1)
+    outbox.mark_sent(sent_id, "0x01")
+    data = pd.DataFrame(
+        {
+            "player_tx_hash": [
+                "Queued for notarization.",
+                "Queued for notarization.",
+                "0x02",
+            ],
+            "player_outbox_id": [sent_id, queued_id, None],
+        }
+    )
+    assert resolve_tx_hashes(data, "player_tx_hash", "player_outbox_id", outbox) == [
+        "0x01",
+        "Queued for notarization.",
+        "0x02",
+    ]
+    outbox.close()
@@ -0,0 +1,220 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from outbox import Outbox, OutboxWorker
+from sender_pool import SenderPool
+
+
+class FailingPool:
+    """
+    Sender pool that cannot reach the node.
+    """
+
+    confirmation_tracker = None
+
+    def notarize(self, string_to_save, callback=None, signed_callback=None):
+        raise ConnectionError("Node not reachable.")
+
+
+def test_outbox_is_persistent(tmp_path):
+    """
+    Recorded payloads survive closing the outbox, bytes and strings alike.
+    """
+    db_path = str(tmp_path / "outbox.sqlite3")
+    outbox = Outbox(db_path)
+    text_id = outbox.add("Test")
+    bytes_id = outbox.add(b"\x00NT")
+    outbox.close()
+    outbox = Outbox(db_path)
+    assert outbox.get(text_id)["payload"] == "Test"
+    assert outbox.get(bytes_id)["payload"] == b"\x00NT"
+    assert outbox.counts() == {"queued": 2}
+    outbox.close()
+
+
+def test_failed_items_are_retried_later(tmp_path):
+    """
+    A failed attempt queues the item again after the retry delay, until the maximum number of attempts is reached.
+    """
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"), max_attempts=2, retry_delay=0)
+    worker = OutboxWorker(outbox, FailingPool())
+    item_id = outbox.add("Test")
+    assert worker.drain_once() == 1
+    item = outbox.get(item_id)
+    assert item["state"] == "queued"
+    assert item["attempts"] == 1
+    assert item["last_error"] == "Node not reachable."
+    assert worker.drain_once() == 1
+    assert outbox.get(item_id)["state"] == "failed"
+    assert worker.drain_once() == 0
+
+    outbox.retry_delay = 3600
+    item_id = outbox.add("Test")
+    worker.drain_once()
+    # not due yet
+    assert worker.drain_once() == 0
+    outbox.close()
+
+
+def test_worker_sends_in_batches(tmp_path, local_chain):
+    """
+    The worker sends up to batch_size items per round and records the mined transactions.
+    """
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    pool = SenderPool(
+        local_chain["web3_connection"],
+        [(local_chain["account"], local_chain["private_key"])],
+    )
+    worker = OutboxWorker(outbox, pool, batch_size=2)
+    item_ids = [outbox.add(f"Test {i}") for i in range(3)]
+    assert worker.drain_once() == 2
+    assert worker.drain_once() == 1
+    assert outbox.counts() == {"confirmed": 3}
+    for item_id in item_ids:
+        tx_hash = outbox.get(item_id)["tx_hash"]
+        assert local_chain["web3_connection"].eth.getTransactionReceipt(tx_hash)
+    outbox.close()
+
+
+def test_recover_after_restart(tmp_path, local_chain):
+    """
+    Items that were being sent when the process stopped are queued again, sent ones are looked up.
+    """
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    pool = SenderPool(
+        local_chain["web3_connection"],
+        [(local_chain["account"], local_chain["private_key"])],
+    )
+    sending_id, sent_id = outbox.add("Sending"), outbox.add("Sent")
+    outbox.take_due(2)
+    tx_hash = pool.notarize("Sent")["tx_hash"]
+    outbox.mark_sent(sent_id, tx_hash)
+    worker = OutboxWorker(outbox, pool)
+    worker.recover()
+    assert outbox.get(sending_id)["state"] == "queued"
+    assert outbox.get(sent_id)["state"] == "confirmed"
+    outbox.close()
+
+
+def test_timed_out_transaction_is_sent_again(tmp_path, local_chain):
+    """
+    A transaction that is not mined in time is sent again as it was signed, so the payload is not notarized twice.
+    """
+    import functools
+
+    web3_connection = local_chain["web3_connection"]
+    ethereum_tester = web3_connection.provider.ethereum_tester
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"), retry_delay=0)
+    pool = SenderPool(
+        web3_connection, [(local_chain["account"], local_chain["private_key"])]
+    )
+    pool.notarize = functools.partial(pool.notarize, time_limit=0.1)
+    worker = OutboxWorker(outbox, pool)
+    item_id = outbox.add("Test")
+    ethereum_tester.disable_auto_mine_transactions()
+    try:
+        worker.drain_once()
+        item = outbox.get(item_id)
+        assert item["state"] == "signed"
+        assert item["tx_hashes"] == [item["tx_hash"]]
+        # still pending, sent again
+        worker.drain_once()
+        assert outbox.get(item_id)["tx_hash"] == item["tx_hash"]
+        ethereum_tester.mine_blocks(1)
+    finally:
+        ethereum_tester.enable_auto_mine_transactions()
+    worker.drain_once()
+    assert outbox.get(item_id)["state"] == "confirmed"
+    assert outbox.get(item_id)["tx_hash"] == item["tx_hash"]
+    assert web3_connection.eth.getTransactionCount(local_chain["account"]) == 1
+    outbox.close()
+
+
+def test_recover_signed_transactions(tmp_path, local_chain):
+    """
+    Signed transactions that a stopped process may or may not have sent are looked up and sent again, not signed again.
+    If the nonce was used by another transaction in the meantime, the payload is queued to be signed again.
+    """
+    from notarization import create_notarization_transaction, sign_transaction
+    from web3 import Web3
+
+    web3_connection = local_chain["web3_connection"]
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    pool = SenderPool(
+        web3_connection, [(local_chain["account"], local_chain["private_key"])]
+    )
+    item_ids = [outbox.add(f"Test {i}") for i in range(3)]
+    outbox.take_due(3)
+    signed_txs = []
+    for i, item_id in enumerate(item_ids):
+        tx = create_notarization_transaction(
+            web3_connection=web3_connection,
+            account=local_chain["account"],
+            string_to_save=f"Test {i}",
+        )
+        # the same nonce for the last two items
+        tx["nonce"] = min(i, 1)
+        signed_tx = sign_transaction(web3_connection, tx, local_chain["private_key"])
+        outbox.mark_signed(
+            item_id, Web3.toHex(signed_tx[1]), bytes(signed_tx.rawTransaction)
+        )
+        signed_txs.append(signed_tx)
+    # stopped after sending the first and the second transaction, but before recording it
+    web3_connection.eth.sendRawTransaction(signed_txs[0].rawTransaction)
+    web3_connection.eth.sendRawTransaction(signed_txs[1].rawTransaction)
+    worker = OutboxWorker(outbox, pool)
+    worker.recover()
+    for item_id, signed_tx in zip(item_ids[:2], signed_txs):
+        assert outbox.get(item_id)["state"] == "confirmed"
+        assert outbox.get(item_id)["tx_hash"] == Web3.toHex(signed_tx[1])
+    # its nonce was used by the second transaction
+    assert outbox.get(item_ids[2])["state"] == "queued"
+    assert outbox.get(item_ids[2])["tx_hash"] is None
+    worker.drain_once()
+    assert outbox.counts() == {"confirmed": 3}
+    assert web3_connection.eth.getTransactionCount(local_chain["account"]) == 3
+    outbox.close()
+
+
+def test_replacements_are_recorded(tmp_path, local_chain, monkeypatch):
+    """
+    Replacements with higher fees are recorded with the item as they are signed, the item ends up with the hash of the mined one.
+    """
+    import notarization
+    from fees import FeeBumpPolicy
+
+    web3_connection = local_chain["web3_connection"]
+    ethereum_tester = web3_connection.provider.ethereum_tester
+    replace_transaction = notarization.replace_transaction
+
+    def replace_and_mine(*args, **kwargs):
+        replacement = replace_transaction(*args, **kwargs)
+        ethereum_tester.mine_blocks(1)
+        return replacement
+
+    monkeypatch.setattr(notarization, "replace_transaction", replace_and_mine)
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+    pool = SenderPool(
+        web3_connection,
+        [(local_chain["account"], local_chain["private_key"])],
+        fee_bump_policy=FeeBumpPolicy(
+            max_fee_per_gas=1000 * 10**9, wait=0.05, poll_interval=0.02
+        ),
+    )
+    worker = OutboxWorker(outbox, pool)
+    item_id = outbox.add("Test")
+    ethereum_tester.disable_auto_mine_transactions()
+    try:
+        worker.drain_once()
+    finally:
+        ethereum_tester.enable_auto_mine_transactions()
+    item = outbox.get(item_id)
+    assert item["state"] == "confirmed"
+    assert len(item["tx_hashes"]) == 2
+    assert item["tx_hash"] == item["tx_hashes"][-1]
+    assert web3_connection.eth.getTransactionReceipt(item["tx_hash"])
+    # replacements signed after the transaction was mined are not recorded
+    outbox.mark_signed(item_id, "0x01", b"\x01")
+    assert outbox.get(item_id) == item
+    outbox.close()
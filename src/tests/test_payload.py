@@ -0,0 +1,84 @@
+import hashlib
+import os
+import sys
+
+import pytest
+from web3 import Web3
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from fees import intrinsic_gas
+from payload import decode_payload, encode_payload
+
+HASH_VALUE = hashlib.sha256(b"Test").hexdigest()
+
+
+def test_encode_and_decode_payload():
+    """
+    A compact payload is much shorter than the hex string and decodes to the same hash.
+    """
+    payload = encode_payload(HASH_VALUE.upper())
+    assert len(payload) == 37
+    assert intrinsic_gas(payload) < intrinsic_gas(Web3.toHex(text=HASH_VALUE))
+    assert decode_payload(payload) == {
+        "format": "compact",
+        "algorithm": "sha256",
+        "hash_value": HASH_VALUE,
+    }
+    assert decode_payload(Web3.toHex(payload))["hash_value"] == HASH_VALUE
+
+
+def test_decode_legacy_text():
+    """
+    Text payloads of earlier notarizations are still read.
+    """
+    assert decode_payload(Web3.toHex(text=HASH_VALUE)) == {
+        "format": "text",
+        "algorithm": None,
+        "hash_value": HASH_VALUE,
+    }
+
+
+def test_invalid_payloads():
+    """
+    Hashes of the wrong size, unknown algorithms and unknown versions are rejected.
+    """
+    with pytest.raises(ValueError):
+        encode_payload(HASH_VALUE[:10])
+    with pytest.raises(ValueError):
+        encode_payload(HASH_VALUE, algorithm="md5")
+    payload = encode_payload(HASH_VALUE)
+    with pytest.raises(ValueError):
+        decode_payload(payload[:3] + b"\x09" + payload[4:])
+    with pytest.raises(ValueError):
+        decode_payload(payload[:4] + b"\x09" + payload[5:])
+
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_verify_compact_and_legacy(local_chain, compact):
+    """
+    verify_via_transaction recognizes both the compact payload and the legacy text.
+    """
+    from notarization import create_notarization_transaction, send_transaction
+    from verification import verify_via_transaction
+
+    web3_connection = local_chain["web3_connection"]
+    tx = create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=local_chain["account"],
+        string_to_save=encode_payload(HASH_VALUE) if compact else HASH_VALUE,
+    )
+    tx_hash = send_transaction(
+        web3_connection=web3_connection,
+        transaction=tx,
+        private_key=local_chain["private_key"],
+    )["tx_hash"]
+    result = verify_via_transaction(
+        web3_connection=web3_connection, tx_hash=tx_hash, hash_value=HASH_VALUE
+    )
+    assert result["verified"] == True
+    result = verify_via_transaction(
+        web3_connection=web3_connection,
+        tx_hash=tx_hash,
+        hash_value=hashlib.sha256(b"Other").hexdigest(),
+    )
+    assert result["verified"] == False
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from confirmation import ConfirmationTracker
+from sender_pool import SenderPool
+
+
+@pytest.fixture
+def accounts(local_chain):
+    """
+    Three funded accounts of the local chain as (address, private_key) pairs.
+    """
+    provider = local_chain["web3_connection"].provider
+    return [
+        (key.public_key.to_checksum_address(), key.to_hex())
+        for key in provider.ethereum_tester.backend.account_keys[:3]
+    ]
+
+
+def test_empty_pool():
+    """
+    A pool without accounts is rejected.
+    """
+    with pytest.raises(ValueError):
+        SenderPool(None, [])
+
+
+def test_notarizations_are_spread_over_accounts(local_chain, accounts):
+    """
+    Consecutive notarizations are sent from the account with the fewest pending transactions, i.e. round robin here.
+    """
+    web3_connection = local_chain["web3_connection"]
+    tracker = ConfirmationTracker(web3_connection, poll_interval=0.05)
+    pool = SenderPool(web3_connection, accounts, confirmation_tracker=tracker)
+    results = [pool.notarize(f"Test {i}") for i in range(6)]
+    assert [result["account"] for result in results] == [
+        account for account, _ in accounts
+    ] * 2
+    for result in results:
+        assert tracker.wait(result["tx_hash"], timeout=10)["status"] == "confirmed"
+    health = pool.health()
+    for account, _ in accounts:
+        assert health[account]["sent"] == 2
+        assert health[account]["confirmed"] == 2
+        assert health[account]["pending"] == 0
+        assert health[account]["available_balance"] == (
+            web3_connection.eth.getBalance(account)
+        )
+    tracker.stop()
+
+
+def test_account_without_balance_is_skipped(local_chain, accounts):
+    """
+    If the balance of an account is not sufficient, the notarization is sent from another account.
+    """
+    web3_connection = local_chain["web3_connection"]
+    pool = SenderPool(web3_connection, accounts[:2])
+    first_account = accounts[0][0]
+    pool.balance_ledger.reserve(
+        first_account, 1000, web3_connection.eth.getBalance(first_account)
+    )
+    result = pool.notarize("Test")
+    assert result["account"] == accounts[1][0]
+    assert result["tx_receipt"]["status"] == 1
+    health = pool.health()
+    assert health[first_account]["sent"] == 0
+    assert "not sufficient" in health[first_account]["last_error"]
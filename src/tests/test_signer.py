@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+
+import pytest
+from eth_account import Account
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from signer import Signer
+
+PRIVATE_KEY = "0x" + "11" * 32
+
+
+def _transactions(count):
+    return [
+        {
+            "nonce": nonce,
+            "to": Account.from_key(PRIVATE_KEY).address,
+            "value": 0,
+            "gas": 21000,
+            "gasPrice": 1,
+            "data": "0x",
+            "chainId": 1,
+        }
+        for nonce in range(count)
+    ]
+
+
+def test_sign_like_account():
+    """
+    A signer signs exactly like signing with the raw private key.
+    """
+    signer = Signer(PRIVATE_KEY)
+    tx = _transactions(1)[0]
+    assert signer.address == Account.from_key(PRIVATE_KEY).address
+    assert (
+        signer.sign(tx).rawTransaction
+        == Account.sign_transaction(tx, PRIVATE_KEY).rawTransaction
+    )
+
+
+def test_sign_many_in_processes():
+    """
+    Large batches are signed in a process pool, in the order of the transactions.
+    """
+    transactions = _transactions(20)
+    signer = Signer(PRIVATE_KEY, processes=2, parallel_threshold=10)
+    try:
+        signed_txs = signer.sign_many(transactions)
+    finally:
+        signer.close()
+    assert [signed_tx.rawTransaction for signed_tx in signed_txs] == [
+        Account.sign_transaction(tx, PRIVATE_KEY).rawTransaction for tx in transactions
+    ]
+
+
+def test_from_keystore(tmp_path):
+    """
+    A signer can be created from an encrypted keystore file.
+    """
+    keystore_path = tmp_path / "keystore.json"
+    keystore_path.write_text(
+        json.dumps(Account.encrypt(PRIVATE_KEY, "secret", kdf="pbkdf2", iterations=2))
+    )
+    signer = Signer.from_keystore(str(keystore_path), "secret")
+    assert signer.address == Account.from_key(PRIVATE_KEY).address
+    with pytest.raises(ValueError):
+        Signer.from_keystore(str(keystore_path), "wrong")
+
+
+def test_invalid_private_key():
+    """
+    An invalid private key is reported when the signer is created.
+    """
+    with pytest.raises(SystemExit):
+        Signer("0x" + "zz" * 32)
+    with pytest.raises(SystemExit):
+        Signer("0x1234")
+
+
+def test_send_with_signer(local_chain):
+    """
+    send_transaction accepts a signer instead of the private key.
+    """
+    from notarization import create_notarization_transaction, send_transaction
+
+    web3_connection = local_chain["web3_connection"]
+    tx = create_notarization_transaction(
+        web3_connection=web3_connection,
+        account=local_chain["account"],
+        string_to_save="Test",
+    )
+    result = send_transaction(
+        web3_connection=web3_connection,
+        transaction=tx,
+        private_key=Signer(local_chain["private_key"]),
+    )
+    assert result["tx_receipt"]["status"] == 1
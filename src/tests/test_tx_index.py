@@ -0,0 +1,81 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("src/notarization_code"))
+from tx_index import NotarizationIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    notarization_index = NotarizationIndex(
+        str(tmp_path / "index.sqlite"), confirmations=3
+    )
+    yield notarization_index
+    notarization_index.close()
+
+
+def test_put_and_get(index):
+    """
+    Transactions are final once enough blocks are mined on top of them.
+    """
+    index.put("0xAB", "0x6869", 10, 1000, latest_block_number=12)
+    assert index.get("0xab") == {
+        "tx_hash": "0xab",
+        "input_data": "0x6869",
+        "block_number": 10,
+        "timestamp": 1000,
+        "final": False,
+    }
+    index.put("0xab", "0x6869", 10, 1000, latest_block_number=13)
+    assert index.get("0xAB")["final"] == True
+    assert index.get("0xcd") is None
+
+
+def test_repeat_verification_is_offline(local_chain, index):
+    """
+    Once a transaction is final, verifying it again works without the node.
+    """
+    from web3 import Web3
+    from notarization import create_notarization_transaction, send_transaction
+    from verification import verify_many, verify_via_transaction
+
+    web3_connection = local_chain["web3_connection"]
+    tx_hash = send_transaction(
+        web3_connection=web3_connection,
+        transaction=create_notarization_transaction(
+            web3_connection=web3_connection,
+            account=local_chain["account"],
+            string_to_save="abc",
+            gas_price=1,
+        ),
+        private_key=local_chain["private_key"],
+    )["tx_hash"]
+    result = verify_via_transaction(
+        web3_connection, tx_hash, hash_value="abc", tx_index=index
+    )
+    assert index.get(tx_hash)["final"] == False
+
+    web3_connection.provider.ethereum_tester.mine_blocks(3)
+    assert verify_many(web3_connection, [(tx_hash, "abc")], tx_index=index)[0] == {
+        "tx_hash": tx_hash,
+        "timestamp": result["timestamp"],
+        "verified": True,
+    }
+    assert index.get(tx_hash)["final"] == True
+
+    # nothing listens on this port
+    offline_connection = Web3(Web3.HTTPProvider("http://127.0.0.1:9"))
+    assert (
+        verify_via_transaction(
+            offline_connection, tx_hash, hash_value="abc", tx_index=index
+        )
+        == result
+    )
+    assert verify_many(
+        offline_connection, [(tx_hash, "abc"), (tx_hash, "abd")], tx_index=index
+    ) == [
+        {"tx_hash": tx_hash, "timestamp": result["timestamp"], "verified": True},
+        {"tx_hash": tx_hash, "timestamp": result["timestamp"], "verified": False},
+    ]
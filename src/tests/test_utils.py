@@ -1,14 +1,17 @@
+import hashlib
+import io
+import subprocess
 import os
 import sys
 
 import pytest
-from web3 import Web3
 
 sys.path.insert(0, os.path.abspath("src"))
 from blockchain_config import INFURA_URL
 
 sys.path.insert(0, os.path.abspath("src/notarization_code"))
 from utils import (
+    calculate_hash_of_file_directly,
     calculate_hash_of_file_via_path,
     establish_infura_connection,
     NoInfuraConnection,
@@ -53,3 +56,73 @@ def test_file_does_not_exist():
     with pytest.raises(SystemExit) as pytest_wrapped_e:
         calculate_hash_of_file_via_path(path)
     assert pytest_wrapped_e.type == SystemExit
+
+
+@pytest.mark.parametrize("buffer_size", [1, 7, 4096, 1024 * 1024])
+def test_hash_independent_of_buffer_size(buffer_size):
+    """
+    Reading the file in chunks of any size gives the same hash as hashing it at once.
+    """
+    path = sys.path[1] + "/tests/test_data.csv"
+    calculated_hash = calculate_hash_of_file_via_path(path, buffer_size=buffer_size)
+    assert (
+        calculated_hash
+        == "15679810d4ef3bcdb4a00608f36297c0dcc46697aa08fbd28e8c95178984c6a3"
+    )
+
+
+def test_calculate_hash_of_file_directly():
+    """
+    Hashing a binary file object (including an empty one) gives the SHA256 checksum of its content.
+    """
+    content = os.urandom(100000)
+    assert (
+        calculate_hash_of_file_directly(io.BytesIO(content), buffer_size=4096)
+        == hashlib.sha256(content).hexdigest()
+    )
+    assert (
+        calculate_hash_of_file_directly(io.BytesIO(b""))
+        == hashlib.sha256(b"").hexdigest()
+    )
+
+
+def otree_app_imports():
+    # modules of notarization_code the oTree app imports when it is loaded, i.e. at module level of its models.py
+    import ast
+
+    with open("src/otree_code/otree_example/models.py") as f:
+        tree = ast.parse(f.read())
+    return [
+        node.module
+        for node in tree.body
+        if isinstance(node, ast.ImportFrom)
+        and os.path.exists(f"src/notarization_code/{node.module}.py")
+    ]
+
+
+def test_hashing_imports_without_web3():
+    """
+    Hashing and the modules built on it, as well as what the oTree app imports when it is loaded, can be imported without loading web3, which is only imported once it is needed.
+    """
+    assert "otree_hashing" in otree_app_imports()
+    modules = [
+        "hashing",
+        "utils",
+        "manifest",
+        "payload",
+        "verification",
+        "notarization",
+    ] + otree_app_imports()
+    loaded = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; sys.path.insert(0, 'src/notarization_code'); "
+            + "; ".join(f"import {module}" for module in modules)
+            + "; print([name for name in ('web3', 'eth_account', 'requests') if name in sys.modules])",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    assert loaded == "[]"
@@ -78,3 +78,54 @@ def test_verification_with_hash_fail(test_input):
         hash_value=test_input["hash_2"],
     )
     assert result["verified"] == False
+
+
+@pytest.fixture
+def notarized_hashes(local_chain):
+    """
+    Notarizes three hashes on the local chain and returns them together with their tx_hashes.
+    """
+    from notarization import create_notarization_transaction, send_transaction
+
+    hashes = [str(i) * 64 for i in range(3)]
+    tx_hashes = [
+        send_transaction(
+            web3_connection=local_chain["web3_connection"],
+            transaction=create_notarization_transaction(
+                web3_connection=local_chain["web3_connection"],
+                account=local_chain["account"],
+                string_to_save=hash_value,
+                gas_price=1,
+            ),
+            private_key=local_chain["private_key"],
+        )["tx_hash"]
+        for hash_value in hashes
+    ]
+    return {"hashes": hashes, "tx_hashes": tx_hashes}
+
+
+def test_verify_many(local_chain, notarized_hashes):
+    """Verifies many hashes at once, results are in the order of the input."""
+    from verification import verify_many
+
+    hashes = notarized_hashes["hashes"]
+    tx_hashes = notarized_hashes["tx_hashes"]
+    items = [
+        (tx_hashes[2], hashes[2]),
+        (tx_hashes[0], hashes[0]),
+        (tx_hashes[1], "0"),
+        ("0x" + "ab" * 32, hashes[0]),
+    ]
+    results = verify_many(local_chain["web3_connection"], items, batch_size=2)
+    assert [result["verified"] for result in results] == [True, True, False, False]
+    assert [result["tx_hash"] for result in results] == [item[0] for item in items]
+    assert (
+        results[0]["timestamp"]
+        == verify_via_transaction(
+            web3_connection=local_chain["web3_connection"],
+            tx_hash=tx_hashes[2],
+            hash_value=hashes[2],
+        )["timestamp"]
+    )
+    assert results[3]["timestamp"] is None
+    assert "Could not find transaction" in results[3]["error"]